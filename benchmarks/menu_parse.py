@@ -0,0 +1,117 @@
+"""Menu parsing benchmark: full json.loads against the streaming, field-selective parser.
+
+Builds a synthetic menu shaped like the MENU_URL response, and reports the median time and the peak memory allocated
+while parsing (measured with tracemalloc in a separate run) for each mode.
+
+    python benchmarks/menu_parse.py --schedules 5000
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mealpy import stream  # noqa: E402 pylint: disable=wrong-import-position
+
+
+def build_menu(count):
+    city = {'id': 'city_id', 'name': 'San Francisco', 'timezone_offset_hours': -7}
+    return {
+        'city': city,
+        'generated_at': '2019-04-01T00:00:00Z',
+        'schedules': [
+            {
+                'id': f'schedule{i}',
+                'priority': i % 10,
+                'is_featured': i % 7 == 0,
+                'date': '20190401',
+                'meal': {
+                    'id': f'meal{i}',
+                    'name': f'Meal {i}',
+                    'description': 'Grilled something with something else on a bed of greens. ' * 4,
+                    'cuisine': 'asian',
+                    'image': f'https://example.com/meals/{i}.jpg',
+                    'portion': 2,
+                    'veg': i % 3 == 0,
+                },
+                'restaurant': {
+                    'id': f'restaurant{i}',
+                    'name': f'Restaurant {i}',
+                    'address': f'{i} Market St.',
+                    'state': 'CA',
+                    'latitude': '37.7749',
+                    'longitude': '-122.4194',
+                    'neighborhood': {'id': 'neighborhood_id', 'name': 'Financial District'},
+                    'city': city,
+                    'open': '2019-04-01T11:00:00Z',
+                    'close': '2019-04-01T14:00:00Z',
+                    'mpn_open': '2019-04-01T11:00:00Z',
+                    'mpn_close': '2019-04-01T14:00:00Z',
+                },
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def get_modes(target):
+    def full(chunks):
+        return json.loads(b''.join(chunks))['schedules']
+
+    def streamed(chunks):
+        return list(stream.iter_schedules(chunks))
+
+    def projected(chunks):
+        return list(stream.iter_schedules(chunks, fields=stream.RESERVE_FIELDS))
+
+    def early_stop(chunks):
+        for schedule in stream.iter_schedules(chunks, fields=stream.RESERVE_FIELDS):
+            if schedule['restaurant']['name'] == target:
+                return schedule
+        raise LookupError(target)
+
+    return {
+        'full json.loads': full,
+        'stream': streamed,
+        'stream + fields': projected,
+        'stream + early stop': early_stop,
+    }
+
+
+def measure(func, chunks, repeat):
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func(chunks)
+        timings.append(time.perf_counter() - started_at)
+
+    tracemalloc.start()
+    result = func(chunks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return statistics.median(timings), peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--schedules', type=int, default=2000, help='Number of schedules on the synthetic menu.')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per mode; the median is reported.')
+    args = parser.parse_args(argv)
+
+    body = json.dumps(build_menu(args.schedules)).encode()
+    chunks = [body[i:i + stream.CHUNK_SIZE] for i in range(0, len(body), stream.CHUNK_SIZE)]
+    print(f'{args.schedules} schedules, {len(body) / 1024:.0f}KiB in {len(chunks)} chunks')
+
+    print(f'{"MODE":<22} {"TIME":>9} {"PEAK MEMORY":>12}')
+    for name, func in get_modes(f'Restaurant {args.schedules // 2}').items():
+        elapsed, peak = measure(func, chunks, args.repeat)
+        print(f'{name:<22} {elapsed * 1000:>7.1f}ms {peak / 1024:>10.0f}KiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Memory benchmark: raw API dicts against models.Schedule objects for the same menus.
+
+Decodes a synthetic menu (see menu_parse.py) once per city and reports what stays allocated afterwards, measured with
+tracemalloc, as well as the time to scan every menu for a restaurant name. MenuSnapshot keeps its payload once models
+are built, so "dicts + models" is what get_schedules(as_models=True) actually retains; "models" alone is the floor.
+
+    python benchmarks/models_memory.py --cities 8 --schedules 2000
+"""
+import argparse
+import gc
+import json
+import operator
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from menu_parse import build_menu  # noqa: E402 pylint: disable=wrong-import-position
+from mealpy import models  # noqa: E402 pylint: disable=wrong-import-position
+
+
+def load_dicts(body):
+    return json.loads(body)['schedules']
+
+
+def load_models(body):
+    return models.load_schedules(json.loads(body)['schedules'])
+
+
+def load_dicts_and_models(body):
+    schedules = json.loads(body)['schedules']
+    return schedules, models.load_schedules(schedules)
+
+
+def measure(load, restaurant_name, bodies):
+    gc.collect()
+    tracemalloc.start()
+    menus = [load(i) for i in bodies]
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if isinstance(menus[-1], tuple):  # Only the models are scanned, the payload is just kept alive
+        menus = [i[-1] for i in menus]
+
+    target = f'Restaurant {len(menus[-1]) - 1}'
+    started_at = time.perf_counter()
+    for menu in menus:
+        for schedule in menu:
+            if restaurant_name(schedule) == target:
+                break
+    return retained, time.perf_counter() - started_at
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cities', type=int, default=8, help='Number of menus kept, as in the menu cache.')
+    parser.add_argument('--schedules', type=int, default=2000, help='Number of schedules on each menu.')
+    args = parser.parse_args(argv)
+
+    bodies = [json.dumps(build_menu(args.schedules)) for _ in range(args.cities)]
+    print(f'{args.cities} menus of {args.schedules} schedules')
+
+    print(f'{"REPRESENTATION":<16} {"RETAINED":>10} {"SCAN":>9}')
+    representations = (
+        ('dicts', load_dicts, lambda schedule: schedule['restaurant']['name']),
+        ('models', load_models, operator.attrgetter('restaurant.name')),
+        ('dicts + models', load_dicts_and_models, operator.attrgetter('restaurant.name')),
+    )
+    for name, load, restaurant_name in representations:
+        retained, scan = measure(load, restaurant_name, bodies)
+        print(f'{name:<16} {retained / 1024 / 1024:>7.1f}MiB {scan * 1000:>7.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
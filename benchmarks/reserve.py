@@ -0,0 +1,148 @@
+"""Time-to-reservation benchmark of execute_reserve_meal against the local stand-in server (see standin.py).
+
+Each run opens a fresh kitchen shortly after it starts, with competing clients going for the same restaurant, and
+has execute_reserve_meal fire at the expected opening with one of its engines. Reports the success rate, p50/p99 of
+the time from the actual opening to the server accepting mealpy's reservation, and the mean number of requests
+mealpy sent after logging in. --skew opens the kitchen that many seconds after (or, negative, before) the expected
+opening, as when the user's clock or the kitchen's schedule is off. The 'on open' engine sends at the expected
+opening like 'single' does, or earlier if it sees the kitchen open first, so it only pays off with a negative --skew.
+
+    python benchmarks/reserve.py --runs 20 --competitors 50 --inventory 10 --latency 0.02 --error-rate 0.05
+    python benchmarks/reserve.py --engine single --engine 'on open' --competitors 0 --skew -0.3
+"""
+import argparse
+import contextlib
+import io
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import standin  # noqa: E402 pylint: disable=wrong-import-position
+from mealpy import cache  # noqa: E402 pylint: disable=wrong-import-position
+from mealpy import config  # noqa: E402 pylint: disable=wrong-import-position
+from mealpy import mealpy  # noqa: E402 pylint: disable=wrong-import-position
+from mealpy import scheduler  # noqa: E402 pylint: disable=wrong-import-position
+from mealpy import sessions  # noqa: E402 pylint: disable=wrong-import-position
+
+TIMING = '12:15pm-12:30pm'
+RESTAURANT = 'Restaurant 0'
+SCHEDULE_ID = 'schedule0'
+FALLBACKS = (
+    mealpy.Choice('Restaurant 1', None, TIMING),
+    mealpy.Choice(None, 'Meal 2', TIMING),
+)
+
+ENGINES = {
+    'single': {'concurrency': 1},
+    'burst': {'concurrency': 4},
+    'fallbacks': {'concurrency': 1, 'fallbacks': FALLBACKS},
+    'fallbacks async': {'concurrency': 4, 'fallbacks': FALLBACKS},
+    'on open': {'concurrency': 1, 'wait_for_open': True},
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile, or None without values."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+@contextlib.contextmanager
+def use_server(server, cache_dir):
+    """Point mealpy at the stand-in: sessions are rerouted and logged in, caches and clocks are local."""
+    create_session = mealpy.create_session
+    logins = []
+
+    def initialize_mealpal(email=None, tracer=None, pool_size=mealpy.POOL_SIZE):  # pylint: disable=unused-argument
+        mealpal = mealpy.MealPal(pool_size=pool_size, tracer=tracer)
+        mealpal.login('benchmark@example.com', 'password')
+        logins.append(mealpal.session_token)
+        return mealpal
+
+    for factory in (cache.get_city_index, cache.get_menu_cache, sessions.get_session_store):
+        factory.cache_clear()
+
+    with mock.patch.object(config, 'CACHE_DIR', cache_dir), \
+            mock.patch.object(mealpy, 'create_session', lambda *args, **kwargs: standin.route_session(
+                create_session(*args, **kwargs),
+                server.url,
+            )), \
+            mock.patch.object(mealpy, 'initialize_mealpal', initialize_mealpal), \
+            mock.patch.object(scheduler, 'estimate_clock_offset', lambda *args, **kwargs: scheduler.ClockOffset(0, 0)):
+        yield logins
+
+
+def run_once(engine, args, cache_dir):
+    """Returns (seconds from the opening to mealpy's reservation or None if it didn't get one, requests sent)."""
+    expected_at = time.time() + args.lead
+    opening_at = expected_at + args.skew
+    give_up_at = max(expected_at, opening_at) + args.timeout
+    kitchen = standin.Kitchen(
+        opening_at,
+        inventory=args.inventory,
+        latency=args.latency,
+        jitter=args.latency / 2,
+        error_rate=args.error_rate,
+    )
+
+    with standin.StandInServer(kitchen) as server, use_server(server, cache_dir) as logins:
+        competitors = [
+            standin.Competitor(server, SCHEDULE_ID, reaction=args.reaction, give_up_at=give_up_at)
+            for _ in range(args.competitors)
+        ]
+        for competitor in competitors:
+            competitor.start()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            mealpy.execute_reserve_meal(
+                RESTAURANT,
+                TIMING,
+                standin.CITY_NAME,
+                fire_at=expected_at,
+                deadline=give_up_at,
+                **engine,
+            )
+
+        for competitor in competitors:
+            competitor.join()
+
+    reservation = kitchen.reservations.get(logins[0])
+    return None if reservation is None else reservation[1] - opening_at, kitchen.requests_by_token[logins[0]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='Kitchen openings per engine.')
+    parser.add_argument('--engine', choices=ENGINES, action='append', help='Engines to run (default: all).')
+    parser.add_argument('--competitors', type=int, default=20, help='Other clients going for the same restaurant.')
+    parser.add_argument('--reaction', type=float, default=0.02, help='Mean delay of competitors after the opening.')
+    parser.add_argument('--inventory', type=int, default=5, help='Meals per schedule.')
+    parser.add_argument('--latency', type=float, default=0.01, help='Mean server latency in seconds.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of reservations answered with a 503.')
+    parser.add_argument('--lead', type=float, default=0.5, help='Seconds from the start of a run to the opening.')
+    parser.add_argument('--timeout', type=float, default=2.0, help='Seconds after the opening to give up.')
+    parser.add_argument('--skew', type=float, default=0.0, help='Seconds the kitchen opens after the expected time.')
+    args = parser.parse_args(argv)
+
+    print(f'{"ENGINE":<16} {"SUCCESS":>8} {"P50":>9} {"P99":>9} {"REQUESTS":>9}')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in args.engine or ENGINES:
+            results = [run_once(ENGINES[name], args, Path(tmp_dir) / name) for _ in range(args.runs)]
+            reserved = [i for i, _ in results if i is not None]
+            p50, p99 = (percentile(reserved, i) for i in (0.5, 0.99))
+            print(
+                f'{name:<16} {len(reserved) / len(results):>8.0%} '
+                f'{f"{p50 * 1000:.1f}ms" if reserved else "-":>9} {f"{p99 * 1000:.1f}ms" if reserved else "-":>9} '
+                f'{sum(i for _, i in results) / len(results):>9.1f}',
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+"""Local stand-in for the MealPal API, for latency and contention benchmarks.
+
+Serves LOGIN_URL, CITIES_URL, MENU_URL, RESERVATION_URL and KITCHEN_URL over keep-alive HTTP/1.1 on 127.0.0.1, with a
+configurable opening instant, a limited inventory per schedule, injected latency and reservation error rates.
+LocalAdapter routes a mealpy session's BASE_URL requests to it, and Competitor threads crowd the kitchen as it opens.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+
+from mealpy import mealpy
+
+CITY_ID = 'standin_city_id'
+CITY_NAME = 'Stand-in City'
+SESSION_COOKIE = 'standin_session'
+
+
+def path_of(url):
+    return urlsplit(url).path
+
+
+class Kitchen:
+    """Menu, inventory and reservations, shared by every request handler thread."""
+
+    def __init__(
+            self,
+            opening_at,
+            schedules=200,
+            inventory=10,
+            latency=0.005,
+            jitter=0.005,
+            error_rate=0.0,
+    ):  # pylint: disable=too-many-arguments
+        self.opening_at = opening_at
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.menu = {
+            'generated_at': '2019-04-01T00:00:00Z',
+            'schedules': [
+                {
+                    'id': f'schedule{i}',
+                    'date': '20190401',
+                    'meal': {'id': f'meal{i}', 'name': f'Meal {i}'},
+                    'restaurant': {'id': f'restaurant{i}', 'name': f'Restaurant {i}'},
+                }
+                for i in range(schedules)
+            ],
+        }
+        self.inventory = {i['id']: inventory for i in self.menu['schedules']}
+        self.reservations = {}  # session token: (schedule id, time reserved)
+        self.requests = 0
+        self.requests_by_token = Counter()
+
+    def delay(self):
+        time.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+
+    def reserve(self, token, schedule_id):
+        """Returns (status code, error) for a reservation attempt."""
+        with self.lock:
+            if time.time() < self.opening_at:
+                return 400, 'ERROR_KITCHEN_CLOSED'
+            if token in self.reservations:
+                return 400, 'ERROR_RESERVATION_LIMIT'
+            if schedule_id not in self.inventory:
+                return 404, 'ERROR_SCHEDULE_NOT_FOUND'
+            if not self.inventory[schedule_id]:
+                return 400, 'ERROR_SOLD_OUT'
+
+            self.inventory[schedule_id] -= 1
+            self.reservations[token] = (schedule_id, time.time())
+            return 200, None
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MealPalStandIn'
+    # Headers and body are written separately, which Nagle's algorithm would hold back for a delayed ACK
+    disable_nagle_algorithm = True
+
+    routes = {
+        ('POST', path_of(mealpy.LOGIN_URL)): 'login',
+        ('POST', path_of(mealpy.CITIES_URL)): 'cities',
+        ('GET', path_of(mealpy.MENU_URL.format(CITY_ID))): 'menu',
+        ('POST', path_of(mealpy.RESERVATION_URL)): 'reserve',
+        ('POST', path_of(mealpy.KITCHEN_URL)): 'kitchen',
+    }
+
+    @property
+    def kitchen(self):
+        return self.server.kitchen
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def send_json(self, status_code, data=None, headers=()):
+        body = json.dumps(data).encode() if data is not None else b''
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def get_token(self):
+        for cookie in self.headers.get('Cookie', '').split(';'):
+            name, _, value = cookie.strip().partition('=')
+            if name == SESSION_COOKIE:
+                return value
+        return None
+
+    def handle_request(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        with self.kitchen.lock:
+            self.kitchen.requests += 1
+            self.kitchen.requests_by_token[self.get_token()] += 1
+        self.kitchen.delay()
+
+        route = self.routes.get((method, urlsplit(self.path).path))
+        if route is None:
+            self.send_json(404, {'error': 'ERROR_NOT_FOUND'})
+        elif route == 'reserve' and random.random() < self.kitchen.error_rate:
+            # Only the reservation endpoint buckles under the opening rush
+            self.send_json(503, {'error': 'ERROR_UNAVAILABLE'})
+        else:
+            getattr(self, f'do_{route}')(body)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.handle_request('GET')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self.handle_request('POST')
+
+    def do_HEAD(self):  # pylint: disable=invalid-name
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_login(self, body):
+        token = uuid.uuid4().hex
+        self.send_json(
+            200,
+            {'sessionToken': token, 'username': json.loads(body or b'{}').get('username')},
+            headers=[('Set-Cookie', f'{SESSION_COOKIE}={token}; Path=/')],
+        )
+
+    def do_cities(self, _):
+        self.send_json(200, {'result': [{'objectId': CITY_ID, 'name': CITY_NAME, 'neighborhoods': []}]})
+
+    def do_menu(self, _):
+        if self.headers.get('If-None-Match') == '"standin"':
+            self.send_json(304)
+        else:
+            self.send_json(200, self.kitchen.menu, headers=[('ETag', '"standin"')])
+
+    def do_kitchen(self, _):
+        if self.get_token() is None:
+            self.send_json(401, {'error': 'ERROR_NOT_LOGGED_IN'})
+        else:
+            self.send_json(200, {'result': {'status': 'OPEN' if time.time() >= self.kitchen.opening_at else 'CLOSED'}})
+
+    def do_reserve(self, body):
+        token = self.get_token()
+        if token is None:
+            self.send_json(401, {'error': 'ERROR_NOT_LOGGED_IN'})
+            return
+
+        status_code, error = self.kitchen.reserve(token, json.loads(body or b'{}').get('schedule_id'))
+        self.send_json(status_code, {'error': error} if error else {'schedule_id': token})
+
+
+class StandInServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # Every competitor connects at once when the kitchen opens
+    request_queue_size = 256
+
+    def __init__(self, kitchen, address=('127.0.0.1', 0)):
+        super().__init__(address, Handler)
+        self.kitchen = kitchen
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+class LocalAdapter(BaseAdapter):
+    """Wraps a session's adapter, sending its requests for mealpy.BASE_URL to a stand-in server instead.
+
+    The wrapped adapter keeps its pool size, retries and any tracing.
+    """
+
+    def __init__(self, target_url, adapter):
+        super().__init__()
+        self.target_url = target_url
+        self.adapter = adapter
+
+    def send(self, request, *args, **kwargs):  # pylint: disable=arguments-differ
+        # Send a copy, since burst engines send the same prepared request from several threads at once. The session
+        # only sees the original, so cookies stay on the BASE_URL domain.
+        routed = request.copy()
+        if routed.url.startswith(mealpy.BASE_URL):
+            routed.url = self.target_url + routed.url[len(mealpy.BASE_URL):]
+
+        response = self.adapter.send(routed, *args, **kwargs)
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+def route_session(session, target_url):
+    """Reroute a session made by mealpy.create_session to target_url."""
+    session.mount(mealpy.BASE_URL, LocalAdapter(target_url, session.get_adapter(mealpy.BASE_URL)))
+    return session
+
+
+class Competitor(threading.Thread):
+    """Another MealPal user going for the same schedule: logs in, then retries reservations from the opening on.
+
+    reaction is the mean delay after the opening before the first attempt, and retry_delay the pause between tries.
+    """
+
+    def __init__(self, server, schedule_id, reaction=0.02, retry_delay=0.05, give_up_at=None):
+        super().__init__(daemon=True)
+        self.server = server
+        self.schedule_id = schedule_id
+        self.reaction = reaction
+        self.retry_delay = retry_delay
+        self.give_up_at = give_up_at
+        self.session = requests.Session()
+        self.reserved = False
+
+    def run(self):
+        self.session.post(self.server.url + path_of(mealpy.LOGIN_URL), data='{}')
+        data = mealpy.MealPal.get_reservation_data('12:00pm-12:15pm', self.schedule_id)
+
+        start_at = self.server.kitchen.opening_at + random.expovariate(1 / self.reaction)
+        time.sleep(max(0.0, start_at - time.time()))
+
+        while self.give_up_at is None or time.time() < self.give_up_at:
+            try:
+                response = self.session.post(self.server.url + path_of(mealpy.RESERVATION_URL), json=data)
+            except requests.RequestException:
+                continue
+            if response.status_code == 200:
+                self.reserved = True
+                return
+            if response.status_code != 503:
+                error = response.json().get('error')
+                if error in ('ERROR_SOLD_OUT', 'ERROR_RESERVATION_LIMIT'):
+                    return
+            time.sleep(self.retry_delay)
@@ -0,0 +1,150 @@
+"""Cold start benchmark for the mealpy CLI.
+
+Runs each subcommand in a fresh interpreter with `-X importtime`, against a throwaway cache seeded so that no command
+touches the network, and reports the median wall time and total import time. Fails if a command got slower than the
+saved baseline by more than --tolerance, or if it imported a module it should not need.
+
+Timings depend on the machine, so the baseline isn't committed: `make benchmark` records one on its first run and
+compares against it from then on. Without a baseline only the imports are checked.
+
+    python benchmarks/startup.py --update   # record a baseline for this machine
+    python benchmarks/startup.py            # compare against it
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from mealpy import cache  # noqa: E402 pylint: disable=wrong-import-position
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'startup_baseline.json'
+CITY_NAME = 'San Francisco'
+CITY_ID = 'benchmark_city_id'
+
+HEAVY_MODULES = ('requests', 'strictyaml', 'asyncio')
+COMMANDS = {
+    '--help': (['--help'], HEAVY_MODULES),
+    'reserve --help': (['reserve', '--help'], HEAVY_MODULES),
+    'batch --help': (['batch', '--help'], HEAVY_MODULES),
+    'list cities': (['list', 'cities'], HEAVY_MODULES),
+    'list restaurants': (['list', 'restaurants', CITY_NAME], ('strictyaml', 'asyncio')),
+    'list meals': (['list', 'meals', CITY_NAME], ('strictyaml', 'asyncio')),
+}
+
+
+def seed_cache(cache_dir):
+    """Write a fresh city index and menu, so list commands are served without network access."""
+    cache.dump_json(
+        cache_dir / cache.CITIES_FILENAME,
+        cache.CityIndex.build([{'name': CITY_NAME, 'objectId': CITY_ID}]),
+    )
+    schedules = [
+        {
+            'id': f'schedule{i}',
+            'date': '20190401',
+            'meal': {'name': f'Meal {i}'},
+            'restaurant': {'name': f'Restaurant {i}'},
+        }
+        for i in range(200)
+    ]
+    cache.dump_json(
+        cache_dir / cache.MENUS_DIRNAME / f'{CITY_ID}-20190401.json',
+        {'city_id': CITY_ID, 'etag': None, 'last_modified': None, 'payload': {'schedules': schedules}},
+    )
+
+
+def parse_importtime(stderr):
+    """Total import time in microseconds, and the set of top level modules imported."""
+    total = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total += int(self_us)
+        modules.add(name.strip().split('.')[0])
+    return total, modules
+
+
+def run_command(args, env):
+    started_at = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'mealpy', *args],
+        cwd=str(ROOT_DIR),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    wall = time.perf_counter() - started_at
+    import_us, modules = parse_importtime(process.stderr)
+    return wall, import_us, modules
+
+
+def measure(repeat):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(
+            os.environ,
+            XDG_CACHE_HOME=str(Path(tmp_dir) / 'cache'),
+            XDG_CONFIG_HOME=str(Path(tmp_dir) / 'config'),
+        )
+        seed_cache(Path(tmp_dir) / 'cache' / 'mealpy')
+
+        results = {}
+        for name, (args, forbidden) in COMMANDS.items():
+            runs = [run_command(args, env) for _ in range(repeat)]
+            results[name] = {
+                'wall': statistics.median(i[0] for i in runs),
+                'imports': statistics.median(i[1] for i in runs),
+                'forbidden': sorted(set(forbidden) & runs[0][2]),
+            }
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per command; the median is reported.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown over the baseline.')
+    parser.add_argument('--update', action='store_true', help='Save the results as the new baseline.')
+    args = parser.parse_args(argv)
+
+    results = measure(args.repeat)
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    failures = []
+
+    print(f'{"COMMAND":<20} {"WALL":>9} {"IMPORTS":>10} {"BASELINE":>10}')
+    for name, result in results.items():
+        expected = baseline.get(name)
+        expected_wall = f'{expected["wall"] * 1000:.1f}ms' if expected else '-'
+        print(f'{name:<20} {result["wall"] * 1000:>7.1f}ms {result["imports"] / 1000:>8.1f}ms {expected_wall:>10}')
+
+        if result['forbidden']:
+            failures.append(f'{name} imported {", ".join(result["forbidden"])}')
+        if expected and not args.update:
+            for metric in ('wall', 'imports'):
+                if result[metric] > expected[metric] * (1 + args.tolerance):
+                    failures.append(f'{name} {metric} regressed: {result[metric]:.4g} > {expected[metric]:.4g}')
+
+    if args.update:
+        BASELINE_PATH.write_text(json.dumps(
+            {name: {'wall': i['wall'], 'imports': i['imports']} for name, i in results.items()},
+            indent=4,
+        ) + '\n')
+        print(f'Baseline saved to {BASELINE_PATH}.')
+
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
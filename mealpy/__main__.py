@@ -1,3 +1,3 @@
-from mealpy.mealpy import cli
+from mealpy.cli import cli
 
 cli(prog_name=__package__)  # pylint: disable=unexpected-keyword-arg
@@ -0,0 +1,191 @@
+import asyncio
+import functools
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+BURST_SIZE = 4
+
+BurstResult = namedtuple('BurstResult', 'response attempts elapsed reservation')
+
+
+def run(coroutine):
+    """Run a coroutine to completion on a fresh event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class AsyncMealPal:
+    """asyncio counterpart of MealPal, with the same methods as coroutines.
+
+    Calls run on a thread pool over the wrapped MealPal's pooled session, so up to max_workers requests can be in
+    flight on separate warm connections. The MealPal pool should be at least max_workers connections.
+    """
+
+    def __init__(self, mealpal, max_workers=BURST_SIZE):
+        self.mealpal = mealpal
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _submit(self, func, *args, **kwargs):
+        return asyncio.get_event_loop().run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def login(self, user, password):
+        return await self._submit(self.mealpal.login, user, password)
+
+    async def get_cities(self, **kwargs):
+        return await self._submit(self.mealpal.get_cities, **kwargs)
+
+    async def get_city_index(self, refresh=False):
+        return await self._submit(self.mealpal.get_city_index, refresh=refresh)
+
+    async def get_menu(self, city_name, **kwargs):
+        return await self._submit(self.mealpal.get_menu, city_name, **kwargs)
+
+    async def get_schedules(self, city_name, **kwargs):
+        return await self._submit(self.mealpal.get_schedules, city_name, **kwargs)
+
+    async def search(self, city_name, **filters):
+        return await self._submit(self.mealpal.search, city_name, **filters)
+
+    async def get_nearby(self, city_name, points, **kwargs):
+        return await self._submit(self.mealpal.get_nearby, city_name, points, **kwargs)
+
+    async def find_schedule(self, city_name, restaurant_name=None, meal_name=None):
+        return await self._submit(
+            self.mealpal.find_schedule,
+            city_name,
+            restaurant_name=restaurant_name,
+            meal_name=meal_name,
+        )
+
+    async def get_schedule_by_restaurant_name(self, restaurant_name, city_name):
+        return await self._submit(self.mealpal.get_schedule_by_restaurant_name, restaurant_name, city_name)
+
+    async def get_schedule_by_meal_name(self, meal_name, city_name):
+        return await self._submit(self.mealpal.get_schedule_by_meal_name, meal_name, city_name)
+
+    async def reserve_meal(self, timing, city_name, **kwargs):
+        return await self._submit(self.mealpal.reserve_meal, timing, city_name, **kwargs)
+
+    async def prepare_reservation(self, timing, city_name, **kwargs):
+        return await self._submit(self.mealpal.prepare_reservation, timing, city_name, **kwargs)
+
+    async def get_current_meal(self):
+        return await self._submit(self.mealpal.get_current_meal)
+
+    async def cancel_current_meal(self):
+        return await self._submit(self.mealpal.cancel_current_meal)
+
+    async def warm_up(self, connections=None):
+        """Open `connections` pooled connections at once by checking the kitchen concurrently."""
+        await asyncio.gather(*(self.get_current_meal() for _ in range(connections or self.max_workers)))
+
+    async def _send_after(self, delay, reservation):
+        await asyncio.sleep(delay)
+        return await self._submit(reservation.send)
+
+    async def reserve_burst(
+            self,
+            reservation,
+            concurrency=None,
+            max_attempts=None,
+            deadline=None,
+            classify=None,
+            policy=None,
+    ):  # pylint: disable=too-many-arguments
+        """Keep `concurrency` sends of a PreparedReservation in flight until one succeeds.
+
+        classify(response) returns 'success', 'retry' or anything else to stop; by default only a 200 succeeds and
+        everything else is retried. Each failed attempt (a retried response or a connection error) is replaced after
+        the delay policy (a retry.RetryPolicy) gives for it, straight away without a policy, until the policy gives
+        up, max_attempts have been sent or deadline (epoch seconds) has passed.
+        Sends already on the wire when one succeeds can't be recalled, but no new ones are started; MealPal only
+        allows one reservation per day, so the stragglers are rejected by the server.
+        Returns a BurstResult whose response is the successful one, or the last failure (None if all were errors).
+        """
+        concurrency = concurrency or self.max_workers
+        started_at = time.perf_counter()
+        pending = set()
+        attempts = failures = 0
+        response = None
+
+        def submit(delay=0):
+            nonlocal attempts
+            if max_attempts is not None and attempts >= max_attempts:
+                return
+            if deadline is not None and time.time() + delay >= deadline:
+                return
+            if delay:
+                pending.add(asyncio.ensure_future(self._send_after(delay, reservation)))
+            else:
+                pending.add(self._submit(reservation.send))
+            attempts += 1
+
+        try:
+            for _ in range(concurrency):
+                submit()
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Failures are only replaced once none of the finished attempts turned out to be a success
+                delays = []
+                for future in done:
+                    result = error = None
+                    try:
+                        result = response = future.result()
+                    except requests.RequestException as e:
+                        error = e
+                    else:
+                        if classify is not None:
+                            outcome = classify(result)
+                        else:
+                            outcome = 'success' if result.status_code == 200 else 'retry'
+                        if outcome != 'retry':
+                            return BurstResult(response, attempts, time.perf_counter() - started_at, reservation)
+
+                    failures += 1
+                    delays.append(0 if policy is None else policy.next_delay(failures, response=result, error=error))
+
+                for delay in delays:
+                    if delay is not None:
+                        submit(delay)
+
+            return BurstResult(response, attempts, time.perf_counter() - started_at, reservation)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def reserve_first_available(self, reservations, classify, concurrency=None, deadline=None, policy=None):
+        """Burst several PreparedReservations one after the other, in preference order.
+
+        Each choice gets a reserve_burst of `concurrency` sends, with classify, deadline and policy passed on. The next
+        choice is only tried once classify says this one is 'unavailable' or policy gave up on it, so a lower ranked
+        choice never wins over one ranked higher; 'fatal' stops everything. Returns a BurstResult with the reservation
+        that succeeded, or the last refusal once every choice is given up.
+        """
+        started_at = time.perf_counter()
+        attempts = 0
+        response = reservation = None
+
+        for choice in reservations:
+            result = await self.reserve_burst(
+                choice,
+                concurrency=concurrency,
+                deadline=deadline,
+                classify=classify,
+                policy=policy,
+            )
+            attempts += result.attempts
+            if result.response is not None:
+                response, reservation = result.response, choice
+                if classify(response) in ('success', 'fatal'):
+                    break
+
+        return BurstResult(response, attempts, time.perf_counter() - started_at, reservation)
@@ -0,0 +1,107 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import requests
+
+from mealpy import config
+from mealpy import retry
+from mealpy import scheduler
+from mealpy.index import ScheduleNotFoundError
+from mealpy.mealpy import BASE_URL
+from mealpy.mealpy import CLOCK_SAMPLING_MARGIN
+from mealpy.mealpy import Choice
+from mealpy.mealpy import get_reserve_retry_policy
+from mealpy.mealpy import initialize_mealpal
+from mealpy.mealpy import prepare_reservations_until
+
+
+BATCH_WORKERS = 20
+BATCH_WINDOW = 60
+
+AccountResult = namedtuple('AccountResult', 'email_address choice status attempts elapsed')
+
+
+def get_choice(account):
+    return account.get('meal') or account['restaurant']
+
+
+def prepare_account(mealpal, account, fire_at):
+    """One account's PreparedReservation, or None if it couldn't be prepared in time.
+
+    Errors only affect this account: reserve_account prepares it again when sending, and reports the error if that
+    fails too.
+    """
+    choice = Choice(account.get('restaurant'), account.get('meal'), account['reservation_time'])
+    try:
+        reservations = prepare_reservations_until(mealpal, fire_at, account['city'], [choice])
+    except requests.RequestException:
+        return None
+    return reservations[0] if reservations else None
+
+
+def reserve_account(mealpal, account, reservation, deadline):
+    """Send one account's reservation until it succeeds or the deadline passes."""
+    stats = retry.RetryStats()
+
+    def send():
+        nonlocal reservation
+        if reservation is None:
+            reservation = mealpal.prepare_reservation(
+                account['reservation_time'],
+                account['city'],
+                restaurant_name=account.get('restaurant'),
+                meal_name=account.get('meal'),
+                warm_up=False,
+            )
+        return reservation.send()
+
+    try:
+        retry.call(
+            send,
+            retry.Deadline(get_reserve_retry_policy(), deadline),
+            is_success=lambda response: response.status_code == 200,
+            retry_on=(ScheduleNotFoundError, requests.RequestException),
+            stats=stats,
+        )
+    except retry.RetryError:
+        status = stats.last_outcome
+    else:
+        status = 'reserved'
+
+    return AccountResult(account['email_address'], get_choice(account), status, stats.attempts, stats.elapsed)
+
+
+def format_report(results):
+    rows = [('ACCOUNT', 'CHOICE', 'STATUS', 'ATTEMPTS', 'TIME')]
+    rows.extend(
+        (i.email_address, i.choice, i.status, str(i.attempts), f'{i.elapsed:.3f}s')
+        for i in results
+    )
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    return '\n'.join('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+
+def execute_batch_reserve(accounts_path, fire_at=None, workers=BATCH_WORKERS):
+    """Reserve for every account in accounts_path in parallel, each with its own session and cookie jar."""
+    accounts = config.load_accounts_from_file(Path(accounts_path))
+
+    # Logging in may prompt for passwords, so sessions are set up one at a time
+    mealpals = [initialize_mealpal(account['email_address']) for account in accounts]
+    reservations = [None] * len(accounts)
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(accounts))) as executor:
+        if fire_at is not None:
+            until = fire_at - CLOCK_SAMPLING_MARGIN
+            clock = scheduler.estimate_clock_offset(mealpals[0].session, BASE_URL, until=until)
+            reservations = list(executor.map(prepare_account, mealpals, accounts, repeat(fire_at - clock.offset)))
+            # Only the main thread waits, so worker threads don't compete for the GIL while it spins
+            scheduler.wait_until(fire_at, clock_offset=clock.offset)
+
+        deadline = time.time() + BATCH_WINDOW
+        results = list(executor.map(reserve_account, mealpals, accounts, reservations, repeat(deadline)))
+
+    print(format_report(results))
+    return results
@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+from mealpy import config
+from mealpy import models
+from mealpy.index import ScheduleIndex
+from mealpy.search import SearchIndex
+
+
+CITIES_FILENAME = 'cities.json'
+CITIES_TTL = 24 * 60 * 60
+MENUS_DIRNAME = 'menus'
+MENU_MAX_AGE = 60
+MAX_MENU_SNAPSHOTS = 8
+FINGERPRINT_SIZE = 16
+
+
+def load_json(path: Path, max_age=None):
+    """Load a JSON document, returning None if it is missing, unreadable or older than max_age seconds."""
+    try:
+        if max_age is not None and time.time() - path.stat().st_mtime > max_age:
+            return None
+        with path.open() as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def dump_json(path: Path, data):
+    """Atomically write a JSON document, so concurrent readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, str(path))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def fingerprint_schedule(schedule):
+    """Digest of everything in a schedule, independent of key order."""
+    data = json.dumps(schedule, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.blake2b(data, digest_size=FINGERPRINT_SIZE).digest()
+
+
+class CityIndex:
+    """Map of city name to objectId and neighborhoods, persisted on disk for ttl seconds."""
+
+    def __init__(self, path: Path, ttl=CITIES_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._cities = None
+        self._loaded_at = 0
+
+    def get(self, fetch_cities, refresh=False):
+        """Return the index, only calling fetch_cities() if it is stale, missing or a refresh is requested."""
+        if not refresh and self._cities is not None and time.time() - self._loaded_at <= self.ttl:
+            return self._cities
+
+        cities = None if refresh else load_json(self.path, max_age=self.ttl)
+        if cities is None:
+            cities = self.build(fetch_cities())
+            dump_json(self.path, cities)
+            self._loaded_at = time.time()
+        else:
+            self._loaded_at = self.path.stat().st_mtime
+
+        self._cities = cities
+        return cities
+
+    @staticmethod
+    def build(cities):
+        return {
+            city['name']: {
+                'objectId': city['objectId'],
+                'neighborhoods': [
+                    {'id': i['id'], 'name': i['name']}
+                    for i in city.get('neighborhoods', ())
+                ],
+            }
+            for city in cities
+        }
+
+
+@lru_cache(maxsize=1)
+def get_city_index():
+    """Process-wide city index, shared by every MealPal lookup."""
+    return CityIndex(config.CACHE_DIR / CITIES_FILENAME)
+
+
+class MenuSnapshot:
+    """A downloaded menu for one city, with the validators needed to revalidate it."""
+
+    def __init__(self, city_id, payload, etag=None, last_modified=None, fetched_at=None):
+        self.city_id = city_id
+        self.payload = payload
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self._index = None
+        self._models = None
+        self._fingerprints = None
+        self._search_index = None
+        self._geo_index = None
+
+    @property
+    def generated_at(self):
+        return self.payload.get('generated_at')
+
+    @property
+    def schedules(self):
+        return self.payload['schedules']
+
+    @property
+    def index(self):
+        """ScheduleIndex over this snapshot, built on first use."""
+        if self._index is None:
+            self._index = ScheduleIndex(self.schedules)
+        return self._index
+
+    @property
+    def models(self):
+        """The schedules as models.Schedule objects, built on first use.
+
+        These are kept alongside the payload, which the indexes still read, so they add to its memory rather than
+        replacing it.
+        """
+        if self._models is None:
+            self._models = models.load_schedules(self.schedules)
+        return self._models
+
+    @property
+    def search_index(self):
+        """search.SearchIndex over this snapshot, built on first use."""
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.schedules)
+        return self._search_index
+
+    @property
+    def geo_index(self):
+        """geo.GeoIndex over this snapshot, built on first use."""
+        if self._geo_index is None:
+            # NumPy is only worth importing for distance queries
+            from mealpy.geo import GeoIndex
+
+            self._geo_index = GeoIndex(self.schedules)
+        return self._geo_index
+
+    @property
+    def fingerprints(self):
+        """Map of schedule id to a digest of the schedule, built on first use."""
+        if self._fingerprints is None:
+            self._fingerprints = {}
+            for schedule in self.schedules:
+                self._fingerprints.setdefault(schedule['id'], fingerprint_schedule(schedule))
+        return self._fingerprints
+
+    @property
+    def date(self):
+        """Menu date, used to keep only one snapshot per city per day."""
+        if self.schedules:
+            return self.schedules[0]['date']
+        return (self.generated_at or '')[:10].replace('-', '')
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_json(self):
+        return {
+            'city_id': self.city_id,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'payload': self.payload,
+        }
+
+
+class MenuCache:
+    """LRU of menu snapshots in memory, backed by one file per city and menu date on disk.
+
+    Storing a snapshot evicts any other date for the same city, and at most max_snapshots are kept overall. Safe to
+    share between threads fetching different cities.
+    """
+
+    def __init__(self, path: Path, max_snapshots=MAX_MENU_SNAPSHOTS):
+        self.path = path
+        self.max_snapshots = max_snapshots
+        self._snapshots = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _files(self, city_id='*'):
+        return sorted(self.path.glob(f'{city_id}-*.json'), key=lambda i: i.stat().st_mtime)
+
+    def get(self, city_id):
+        """Return the latest snapshot for a city from memory or disk, or None."""
+        with self._lock:
+            if city_id in self._snapshots:
+                self._snapshots.move_to_end(city_id)
+                return self._snapshots[city_id]
+
+            for path in reversed(self._files(city_id)):
+                data = load_json(path)
+                if data is not None:
+                    snapshot = MenuSnapshot(fetched_at=path.stat().st_mtime, **data)
+                    self._remember(snapshot)
+                    return snapshot
+
+            return None
+
+    def put(self, snapshot):
+        with self._lock:
+            self._remember(snapshot)
+
+            snapshot_path = self.path / f'{snapshot.city_id}-{snapshot.date}.json'
+            dump_json(snapshot_path, snapshot.to_json())
+            os.utime(str(snapshot_path), (snapshot.fetched_at, snapshot.fetched_at))
+
+            for path in self._files(snapshot.city_id):
+                if path != snapshot_path:
+                    path.unlink()
+
+            for path in self._files()[:-self.max_snapshots]:
+                path.unlink()
+
+    def touch(self, snapshot, etag=None, last_modified=None):
+        """Mark a snapshot as revalidated, only rewriting it if the server sent new validators."""
+        with self._lock:
+            snapshot.fetched_at = time.time()
+            validators = (etag or snapshot.etag, last_modified or snapshot.last_modified)
+            if validators != (snapshot.etag, snapshot.last_modified):
+                snapshot.etag, snapshot.last_modified = validators
+                self.put(snapshot)
+                return
+
+            self._remember(snapshot)
+
+            snapshot_path = self.path / f'{snapshot.city_id}-{snapshot.date}.json'
+            if snapshot_path.exists():
+                os.utime(str(snapshot_path), (snapshot.fetched_at, snapshot.fetched_at))
+
+    def _remember(self, snapshot):
+        self._snapshots[snapshot.city_id] = snapshot
+        self._snapshots.move_to_end(snapshot.city_id)
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+
+
+@lru_cache(maxsize=1)
+def get_menu_cache():
+    """Process-wide menu cache, shared by every MealPal lookup."""
+    return MenuCache(config.CACHE_DIR / MENUS_DIRNAME)
@@ -0,0 +1,396 @@
+"""Command line interface.
+
+Subcommands import what they need when they run, so `--help` and cached lookups don't pay for importing requests,
+strictyaml or asyncio. Keep module level imports here limited to click and cheap mealpy modules.
+"""
+import time
+
+import click
+
+from mealpy.config import WEEKDAYS
+
+
+@click.group()
+@click.option(
+    '--profile',
+    is_flag=True,
+    help='Profile the command with cProfile and a sampling profiler, saving the results in the cache directory.',
+)
+@click.option(
+    '--profile-window',
+    type=click.Choice(['command', 'reserve']),
+    default='command',
+    show_default=True,
+    help='Profile the whole command, or only from the first reservation attempt to success.',
+)
+@click.pass_context
+def cli(ctx, profile, profile_window):  # pragma: no cover
+    if not profile:
+        return
+
+    from mealpy import config
+    from mealpy import profiling
+
+    profiler = profiling.Profiler(
+        config.CACHE_DIR / profiling.PROFILES_DIRNAME / f'{ctx.invoked_subcommand}-{time.strftime("%Y%m%d-%H%M%S")}',
+    )
+    ctx.ensure_object(dict)['profiler'] = profiler
+    if profile_window == 'command':
+        profiler.start()
+
+    def save_profile():
+        paths = profiler.save()
+        if paths is None:
+            print('Nothing was profiled.')
+        else:
+            print(f'Profiled {profiler.elapsed:.3f}s, saved to {", ".join(str(i) for i in paths.values())}.')
+
+    ctx.call_on_close(save_profile)
+
+
+@cli.command('reserve', short_help='Reserve a meal on MealPal.')
+@click.argument('restaurant')
+@click.argument('reservation_time')
+@click.argument('city')
+@click.option(
+    '--at',
+    'fire_at',
+    help='Time (HH:MM:SS) to send the reservation at. Everything else is prepared ahead of it.',
+)
+@click.option(
+    '--concurrency',
+    default=1,
+    show_default=True,
+    help='Number of reservation attempts to keep in flight at once, all for the same choice.',
+)
+@click.option(
+    '--deadline',
+    type=float,
+    help='Give up if the reservation hasn\'t succeeded this many seconds after the first attempt.',
+)
+@click.option(
+    '--fallback',
+    'fallbacks',
+    multiple=True,
+    metavar='[restaurant:|meal:]NAME[@PICKUP_TIME]',
+    help='Another choice to fall back on if the ones before it are sold out. Can be repeated, in order of preference.',
+)
+@click.option(
+    '--trace',
+    is_flag=True,
+    help='Time every request, saving them as JSON lines in the cache directory and printing a summary at the end.',
+)
+@click.option(
+    '--wait-for-open',
+    is_flag=True,
+    help='Also watch the kitchen before --at, and fire early if it is seen open, polling faster as --at nears.',
+)
+@click.pass_obj
+def reserve(
+        obj,
+        restaurant,
+        reservation_time,
+        city,
+        fire_at,
+        concurrency,
+        deadline,
+        fallbacks,
+        trace,
+        wait_for_open,
+):  # pragma: no cover  # pylint: disable=too-many-arguments
+    from mealpy import config
+    from mealpy.mealpy import execute_reserve_meal
+    from mealpy.mealpy import parse_choice
+    from mealpy.mealpy import parse_fire_at
+    from mealpy.trace import TRACES_DIRNAME
+    from mealpy.trace import Tracer
+
+    if wait_for_open and not fire_at:
+        raise click.UsageError('--wait-for-open needs --at, the expected opening time.')
+
+    if fire_at:
+        try:
+            fire_at = parse_fire_at(fire_at)
+        except ValueError:
+            raise click.BadParameter('Use HH:MM:SS.', param_hint='--at')
+    tracer = None
+    if trace:
+        tracer = Tracer(config.CACHE_DIR / TRACES_DIRNAME / f'reserve-{time.strftime("%Y%m%d-%H%M%S")}.jsonl')
+
+    try:
+        execute_reserve_meal(
+            restaurant,
+            reservation_time,
+            city,
+            fire_at=fire_at,
+            concurrency=concurrency,
+            deadline=deadline,
+            fallbacks=[parse_choice(i, reservation_time) for i in fallbacks],
+            tracer=tracer,
+            profiler=(obj or {}).get('profiler'),
+            wait_for_open=wait_for_open,
+        )
+    finally:
+        if tracer is not None:
+            tracer.close()
+            print(tracer)
+            print(f'Request trace saved to {tracer.path}.')
+
+
+@cli.command('batch', short_help='Reserve meals for several accounts at once.')
+@click.argument('accounts_file', type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    '--at',
+    'fire_at',
+    help='Time (HH:MM:SS) to send the reservations at. Everything else is prepared ahead of it.',
+)
+@click.option('--workers', default=20, show_default=True, help='Maximum number of accounts handled in parallel.')
+def cli_batch(accounts_file, fire_at, workers):  # pragma: no cover
+    from mealpy.batch import execute_batch_reserve
+    from mealpy.mealpy import parse_fire_at
+
+    if fire_at:
+        try:
+            fire_at = parse_fire_at(fire_at)
+        except ValueError:
+            raise click.BadParameter('Use HH:MM:SS.', param_hint='--at')
+    execute_batch_reserve(accounts_file, fire_at=fire_at, workers=workers)
+
+
+@cli.command('daemon', short_help='Stay running and make every job\'s reservation on its weekdays.')
+@click.option(
+    '--ping-interval',
+    default=240,
+    show_default=True,
+    help='Seconds between kitchen checks that keep each session and its connection warm.',
+)
+def cli_daemon(ping_interval):  # pragma: no cover
+    from mealpy.daemon import Daemon
+    from mealpy.daemon import get_jobs_path
+
+    daemon = Daemon(get_jobs_path(), ping_interval=ping_interval)
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        daemon.stop()
+
+
+@cli.group(name='jobs')
+def cli_jobs():  # pragma: no cover
+    pass
+
+
+@cli_jobs.command('add', short_help='Add or replace a daily reservation job for the daemon.')
+@click.argument('name')
+@click.argument('choice', metavar='[restaurant:|meal:]NAME')
+@click.argument('reservation_time')
+@click.argument('city')
+@click.option('--at', 'fire_at', help='Time (HH:MM:SS) to send the reservation at.  [default: 17:00:00]')
+@click.option(
+    '--weekday',
+    'weekdays',
+    multiple=True,
+    type=click.Choice(WEEKDAYS),
+    help='Day to reserve on. Can be repeated.  [default: mon to fri]',
+)
+@click.option('--email', 'email_address', help='Account to reserve for, instead of the configured one.')
+@click.option(
+    '--fallback',
+    'fallbacks',
+    multiple=True,
+    metavar='[restaurant:|meal:]NAME[@PICKUP_TIME]',
+    help='Another choice to fall back on if the ones before it are sold out. Can be repeated, in order of preference.',
+)
+def cli_jobs_add(
+        name,
+        choice,
+        reservation_time,
+        city,
+        fire_at,
+        weekdays,
+        email_address,
+        fallbacks,
+):  # pragma: no cover  # pylint: disable=too-many-arguments
+    from mealpy.daemon import add_job
+    from mealpy.daemon import describe_job
+    from mealpy.daemon import get_jobs_path
+    from mealpy.mealpy import parse_choice
+    from mealpy.mealpy import parse_fire_at
+
+    parsed = parse_choice(choice, reservation_time)
+    job = {'name': name, 'city': city, 'reservation_time': parsed.timing}
+    if parsed.meal_name:
+        job['meal'] = parsed.meal_name
+    else:
+        job['restaurant'] = parsed.restaurant_name
+    if email_address:
+        job['email_address'] = email_address
+    if fire_at:
+        try:
+            parse_fire_at(fire_at)
+        except ValueError:
+            raise click.BadParameter('Use HH:MM:SS.', param_hint='--at')
+        job['at'] = fire_at
+    if weekdays:
+        job['weekdays'] = list(weekdays)
+    if fallbacks:
+        job['fallbacks'] = list(fallbacks)
+
+    replaced = add_job(get_jobs_path(), job)
+    print(f'{"Replaced" if replaced else "Added"} {describe_job(job)}.')
+
+
+@cli_jobs.command('remove', short_help='Remove a reservation job.')
+@click.argument('name')
+def cli_jobs_remove(name):  # pragma: no cover
+    from mealpy.daemon import get_jobs_path
+    from mealpy.daemon import remove_job
+
+    if not remove_job(get_jobs_path(), name):
+        raise click.ClickException(f'There is no job named {name}.')
+    print(f'Removed {name}.')
+
+
+@cli_jobs.command('show', short_help='Show the reservation jobs and when they run next.')
+def cli_jobs_show():  # pragma: no cover
+    from mealpy import config
+    from mealpy.daemon import describe_job
+    from mealpy.daemon import get_jobs_path
+    from mealpy.daemon import get_next_fire_at
+
+    jobs = config.load_jobs_from_file(get_jobs_path())
+    if not jobs:
+        print('No jobs.')
+    for job in jobs:
+        print(f'{describe_job(job)}; next run {time.ctime(get_next_fire_at(job, time.time()))}')
+
+
+@cli.group(name='list')
+def cli_list():  # pragma: no cover
+    pass
+
+
+def fetch_cities():  # pragma: no cover
+    from mealpy.mealpy import MealPal
+
+    return MealPal().get_cities()
+
+
+@cli_list.command('cities', short_help='List available cities.')
+@click.option('--refresh', is_flag=True, help='Re-fetch the cached city list.')
+def cli_list_cities(refresh):  # pragma: no cover
+    from mealpy import cache
+
+    # Only import the HTTP stack when the cached city list has to be re-fetched
+    cities = list(cache.get_city_index().get(fetch_cities, refresh=refresh))
+    print('\n'.join(cities))
+
+
+def print_schedules(city, all_cities, workers, get_name):  # pragma: no cover
+    from mealpy.mealpy import MealPal
+
+    if not all_cities:
+        if city is None:
+            raise click.UsageError('Give a CITY, or --all-cities.')
+        print('\n'.join(get_name(i) for i in MealPal().get_schedules(city)))
+        return
+
+    # Cities are printed as their menus arrive, rather than in a fixed order
+    for result in MealPal(pool_size=workers).get_all_schedules(max_workers=workers):
+        if result.error is not None:
+            print(f'{result.city_name}: failed to fetch the menu ({result.error})')
+            continue
+        print(f'{result.city_name}:')
+        for schedule in result.schedules:
+            print(f'    {get_name(schedule)}')
+
+
+@cli_list.command('restaurants', short_help='List available restaurants.')
+@click.argument('city', required=False)
+@click.option('--all-cities', is_flag=True, help='List the restaurants of every city, fetching menus in parallel.')
+@click.option('--workers', default=10, show_default=True, help='Menus fetched at once with --all-cities.')
+def cli_list_restaurants(city, all_cities, workers):  # pragma: no cover
+    print_schedules(city, all_cities, workers, lambda schedule: schedule['restaurant']['name'])
+
+
+@cli_list.command('meals', short_help='List meal choices.')
+@click.argument('city', required=False)
+@click.option('--all-cities', is_flag=True, help='List the meals of every city, fetching menus in parallel.')
+@click.option('--workers', default=10, show_default=True, help='Menus fetched at once with --all-cities.')
+def cli_list_meals(city, all_cities, workers):  # pragma: no cover
+    print_schedules(city, all_cities, workers, lambda schedule: schedule['meal']['name'])
+
+
+@cli.command('watch', short_help='Print changes to a city\'s menu as they happen.')
+@click.argument('city')
+@click.option('--interval', default=60.0, show_default=True, help='Seconds between menu checks.')
+def cli_watch(city, interval):  # pragma: no cover
+    from mealpy.feed import format_diff
+    from mealpy.feed import MenuWatcher
+    from mealpy.mealpy import MealPal
+
+    def print_diff(diff):
+        for line in format_diff(diff):
+            print(f'{time.strftime("%H:%M:%S")} {line}', flush=True)
+
+    watcher = MenuWatcher(MealPal(), city, interval=interval)
+    watcher.on_change(print_diff)
+    watcher.poll()
+    print(f'Watching {len(watcher.snapshot.fingerprints)} schedule(s) in {city}, checking every {interval:g}s.')
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command('search', short_help='Search a city\'s menu.')
+@click.argument('city')
+@click.option('--cuisine', help='Cuisine, e.g. asian.')
+@click.option('--veg', is_flag=True, help='Only vegetarian meals.')
+@click.option('--neighborhood', help='Neighborhood of the restaurant, e.g. "Financial District".')
+@click.option('--text', help='Words that must all appear in the meal name or description or the restaurant name.')
+@click.option('--limit', type=int, help='Print at most this many schedules.')
+def cli_search(city, cuisine, veg, neighborhood, text, limit):  # pragma: no cover  # pylint: disable=too-many-arguments
+    from mealpy.mealpy import MealPal
+
+    schedules = MealPal().search(city, cuisine=cuisine, veg=veg, neighborhood=neighborhood, text=text, limit=limit)
+    if not schedules:
+        print('No matching meals.')
+    for schedule in schedules:
+        meal = schedule['meal']
+        restaurant = schedule['restaurant']
+        details = ', '.join(filter(None, (
+            (restaurant.get('neighborhood') or {}).get('name'),
+            meal.get('cuisine'),
+            'veg' if meal.get('veg') else None,
+        )))
+        print(f'{meal["name"]} at {restaurant["name"]}' + (f' ({details})' if details else ''))
+
+
+@cli.command('nearby', short_help='List the restaurants nearest to one or more offices.')
+@click.argument('city')
+@click.option('--lat', 'latitudes', type=float, multiple=True, required=True, help='Latitude of an office.')
+@click.option('--lon', 'longitudes', type=float, multiple=True, required=True, help='Longitude of an office.')
+@click.option('--radius', help='Only restaurants this close, e.g. 500m, 1.5km or 0.3mi.')
+@click.option('--limit', default=10, show_default=True, help='Restaurants to list per office.')
+def cli_nearby(city, latitudes, longitudes, radius, limit):  # pragma: no cover  # pylint: disable=too-many-arguments
+    from mealpy.geo import format_distance
+    from mealpy.geo import parse_distance
+    from mealpy.mealpy import MealPal
+
+    if len(latitudes) != len(longitudes):
+        raise click.UsageError('Give one --lat and one --lon per office.')
+    if radius is not None:
+        try:
+            radius = parse_distance(radius)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--radius')
+
+    points = list(zip(latitudes, longitudes))
+    for (latitude, longitude), nearby in zip(points, MealPal().get_nearby(city, points, radius=radius, limit=limit)):
+        if len(points) > 1:
+            print(f'{latitude}, {longitude}:')
+        if not nearby:
+            print('No restaurants nearby.')
+        for schedule, distance in nearby:
+            print(f'{format_distance(distance):>7}  {schedule["restaurant"]["name"]} ({schedule["meal"]["name"]})')
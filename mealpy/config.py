@@ -1,13 +1,19 @@
+import datetime
+import hashlib
 from functools import lru_cache
 from pathlib import Path
 from shutil import copyfileobj
 
-import strictyaml
 import xdg
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
 CACHE_DIR = xdg.XDG_CACHE_HOME / 'mealpy'
 CONFIG_DIR = xdg.XDG_CONFIG_HOME / 'mealpy'
+COMPILED_DIRNAME = 'compiled'
+JOBS_FILENAME = 'jobs.yaml'
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+# Bump whenever a schema changes, so configs validated against the old schema are not reused
+COMPILED_VERSION = 2
 
 
 def initialize_directories():  # pragma: no cover
@@ -17,15 +23,131 @@ def initialize_directories():  # pragma: no cover
         i.mkdir(parents=True, exist_ok=True)
 
 
+def get_fingerprint(paths):
+    """Identify the current contents of source files by path, mtime and size."""
+    fingerprint = [COMPILED_VERSION]
+    for path in paths:
+        stat = path.stat()
+        fingerprint.append([str(path), stat.st_mtime_ns, stat.st_size])
+    return fingerprint
+
+
+def load_compiled(name, paths, compile_config):
+    """Return compile_config(), reusing the validated result under CACHE_DIR while none of the paths changed."""
+    from mealpy import cache
+
+    compiled_path = CACHE_DIR / COMPILED_DIRNAME / f'{name}.json'
+    fingerprint = get_fingerprint(paths)
+
+    compiled = cache.load_json(compiled_path)
+    if compiled is not None and compiled.get('fingerprint') == fingerprint:
+        return compiled['data']
+
+    data = compile_config()
+    try:
+        cache.dump_json(compiled_path, {'fingerprint': fingerprint, 'data': data})
+    except OSError:  # pragma: no cover
+        pass  # A read-only cache only costs the next process a full parse
+    return data
+
+
 def load_config_from_file(config_file: Path):  # pragma: no cover
+    # strictyaml (and ruamel.yaml under it) is slow to import, so only load it when a file is actually parsed
+    import strictyaml
+
     schema = strictyaml.Map({
         'email_address': strictyaml.Email(),
         'use_keyring': strictyaml.Bool(),
+        strictyaml.Optional('session_freshness'): strictyaml.Int(),
     })
 
     return strictyaml.load(config_file.read_text(), schema).data
 
 
+def load_accounts_from_file(accounts_file: Path):
+    """Load a batch reservation file: a list of accounts, each with one restaurant or meal choice."""
+    name = hashlib.sha1(str(accounts_file.resolve()).encode()).hexdigest()[:16]
+    return load_compiled(f'accounts-{name}', (accounts_file,), lambda: parse_accounts_file(accounts_file))
+
+
+def parse_accounts_file(accounts_file: Path):
+    import strictyaml
+
+    schema = strictyaml.Seq(strictyaml.Map({
+        'email_address': strictyaml.Email(),
+        'city': strictyaml.Str(),
+        'reservation_time': strictyaml.Str(),
+        strictyaml.Optional('restaurant'): strictyaml.Str(),
+        strictyaml.Optional('meal'): strictyaml.Str(),
+    }))
+
+    accounts = strictyaml.load(accounts_file.read_text(), schema).data
+    for account in accounts:
+        if not account.get('restaurant') and not account.get('meal'):
+            raise ValueError(f'{account["email_address"]} needs either a restaurant or a meal to reserve.')
+
+    return accounts
+
+
+def get_jobs_schema():
+    import strictyaml
+
+    return strictyaml.Seq(strictyaml.Map({
+        'name': strictyaml.Str(),
+        'city': strictyaml.Str(),
+        'reservation_time': strictyaml.Str(),
+        strictyaml.Optional('restaurant'): strictyaml.Str(),
+        strictyaml.Optional('meal'): strictyaml.Str(),
+        strictyaml.Optional('email_address'): strictyaml.Email(),
+        strictyaml.Optional('at'): strictyaml.Str(),
+        strictyaml.Optional('weekdays'): strictyaml.Seq(strictyaml.Enum(WEEKDAYS)),
+        strictyaml.Optional('fallbacks'): strictyaml.Seq(strictyaml.Str()),
+    }))
+
+
+def load_jobs_from_file(jobs_file: Path):
+    """Load the daemon's jobs: a list of named daily reservations. A missing or blank file has no jobs."""
+    if not jobs_file.exists():
+        return []
+    name = hashlib.sha1(str(jobs_file.resolve()).encode()).hexdigest()[:16]
+    return load_compiled(f'jobs-{name}', (jobs_file,), lambda: parse_jobs_file(jobs_file))
+
+
+def parse_jobs_file(jobs_file: Path):
+    import strictyaml
+
+    text = jobs_file.read_text()
+    if not text.strip():
+        return []
+
+    jobs = strictyaml.load(text, get_jobs_schema()).data
+    names = set()
+    for job in jobs:
+        if not job.get('restaurant') and not job.get('meal'):
+            raise ValueError(f'Job {job["name"]} needs either a restaurant or a meal to reserve.')
+        if job['name'] in names:
+            raise ValueError(f'There is more than one job named {job["name"]}.')
+        if 'at' in job:
+            try:
+                datetime.datetime.strptime(job['at'], '%H:%M:%S')
+            except ValueError:
+                raise ValueError(f'Job {job["name"]} is fired at {job["at"]}, use HH:MM:SS.') from None
+        names.add(job['name'])
+
+    return jobs
+
+
+def save_jobs_to_file(jobs_file: Path, jobs):
+    import strictyaml
+
+    text = strictyaml.as_document(jobs, get_jobs_schema()).as_yaml() if jobs else ''
+    jobs_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = jobs_file.with_name(f'.{jobs_file.name}.tmp')
+    tmp_path.write_text(text)
+    # Replaced in one step, so the daemon never reloads a half written file
+    tmp_path.replace(jobs_file)
+
+
 @lru_cache(maxsize=1)
 def get_config():
     initialize_directories()
@@ -43,6 +165,9 @@ def get_config():
             f'Please update the email_address field in {config_path} with your email address for MealPal.',
         )
 
-    config = load_config_from_file(template_config_path)
-    config.update(load_config_from_file(config_path))
-    return config
+    def compile_config():
+        config = load_config_from_file(template_config_path)
+        config.update(load_config_from_file(config_path))
+        return config
+
+    return load_compiled('config', (template_config_path, config_path), compile_config)
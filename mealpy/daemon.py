@@ -0,0 +1,252 @@
+import datetime
+import threading
+import time
+
+import requests
+import strictyaml
+
+from mealpy import config
+from mealpy import retry
+from mealpy import sessions
+from mealpy.index import ScheduleNotFoundError
+from mealpy.mealpy import Choice
+from mealpy.mealpy import SESSION_REFRESH_MARGIN
+from mealpy.mealpy import fire_reservations
+from mealpy.mealpy import initialize_mealpal
+from mealpy.mealpy import parse_choice
+
+
+DEFAULT_FIRE_AT = '17:00:00'
+DEFAULT_WEEKDAYS = config.WEEKDAYS[:5]
+# Idle keep-alive connections are dropped by the server after a few minutes
+PING_INTERVAL = 4 * 60
+POLL_INTERVAL = 1
+# Long enough to estimate the clock offset and fetch the menu before firing
+PREPARE_LEAD = 2 * 60
+JOB_DEADLINE = 60
+
+
+def log(message):
+    print(f'{time.strftime("%Y-%m-%d %H:%M:%S")} {message}', flush=True)
+
+
+def get_jobs_path():
+    return config.CONFIG_DIR / config.JOBS_FILENAME
+
+
+def get_choices(job):
+    timing = job['reservation_time']
+    return [
+        Choice(job.get('restaurant'), job.get('meal'), timing),
+        *(parse_choice(i, timing) for i in job.get('fallbacks', ())),
+    ]
+
+
+def get_next_fire_at(job, after):
+    """Epoch time of the job's first run after `after`, on one of its weekdays."""
+    fire_time = datetime.datetime.strptime(job.get('at', DEFAULT_FIRE_AT), '%H:%M:%S').time()
+    weekdays = job.get('weekdays') or DEFAULT_WEEKDAYS
+    date = datetime.date.fromtimestamp(after)
+
+    for _ in range(8):
+        fire_at = datetime.datetime.combine(date, fire_time).timestamp()
+        if fire_at > after and config.WEEKDAYS[date.weekday()] in weekdays:
+            return fire_at
+        date += datetime.timedelta(days=1)
+
+    raise ValueError(f'Job {job["name"]} has no weekdays to run on.')
+
+
+def describe_job(job):
+    choice = f'meal {job["meal"]}' if job.get('meal') else f'restaurant {job["restaurant"]}'
+    weekdays = ','.join(job.get('weekdays') or DEFAULT_WEEKDAYS)
+    description = (
+        f'{job["name"]}: {choice} at {job["reservation_time"]} in {job["city"]}, '
+        f'fired at {job.get("at", DEFAULT_FIRE_AT)} on {weekdays}'
+    )
+    if job.get('email_address'):
+        description += f' for {job["email_address"]}'
+    if job.get('fallbacks'):
+        description += f', falling back on {", ".join(job["fallbacks"])}'
+    return description
+
+
+def add_job(jobs_path, job):
+    """Add a job to the jobs file, replacing any job with the same name. Returns True if it replaced one."""
+    jobs = config.load_jobs_from_file(jobs_path)
+    replaced = any(i['name'] == job['name'] for i in jobs)
+    config.save_jobs_to_file(jobs_path, [i for i in jobs if i['name'] != job['name']] + [job])
+    return replaced
+
+
+def remove_job(jobs_path, name):
+    """Remove a job from the jobs file. Returns False if there was no such job."""
+    jobs = config.load_jobs_from_file(jobs_path)
+    remaining = [i for i in jobs if i['name'] != name]
+    if len(remaining) == len(jobs):
+        return False
+    config.save_jobs_to_file(jobs_path, remaining)
+    return True
+
+
+class Daemon:
+    """Resident process that makes every job's reservation on its weekdays.
+
+    Each account is logged in once and its session kept warm with a kitchen check every ping_interval seconds, so a
+    run only has to prepare the reservation (prepare_lead seconds ahead) and fire it. The jobs file is reloaded as
+    soon as it changes, e.g. through `mealpy jobs add`.
+    """
+
+    def __init__(self, jobs_path, ping_interval=PING_INTERVAL, prepare_lead=PREPARE_LEAD):
+        self.jobs_path = jobs_path
+        self.ping_interval = ping_interval
+        self.prepare_lead = prepare_lead
+        self.jobs = {}
+        self.next_fire_at = {}
+        self.mealpals = {}
+        self.last_pinged = {}
+        self.logged_out = set()
+        self.running = {}
+        self._fingerprint = None
+        self._stopped = threading.Event()
+
+    def reload(self, now):
+        """Pick up changes to the jobs file. Returns True if it changed."""
+        try:
+            fingerprint = config.get_fingerprint((self.jobs_path,))
+        except OSError:
+            fingerprint = None
+        if fingerprint == self._fingerprint:
+            return False
+        self._fingerprint = fingerprint
+
+        try:
+            jobs = {i['name']: i for i in config.load_jobs_from_file(self.jobs_path)}
+        except (ValueError, strictyaml.YAMLError) as e:
+            log(f'Keeping the current jobs, {self.jobs_path} is invalid: {e}')
+            return False
+
+        for name in set(self.jobs) - set(jobs):
+            log(f'Removed job {name}.')
+            self.next_fire_at.pop(name, None)
+
+        for name, job in jobs.items():
+            if self.jobs.get(name) == job:
+                continue
+            # Log in up front, so a run never waits on a password prompt
+            self.get_mealpal(job.get('email_address'))
+            self.next_fire_at[name] = get_next_fire_at(job, now)
+            log(f'Scheduled {describe_job(job)}; next run {time.ctime(self.next_fire_at[name])}.')
+
+        self.jobs = jobs
+        return True
+
+    def get_mealpal(self, email=None):
+        if email not in self.mealpals:
+            self.mealpals[email] = initialize_mealpal(email)
+            self.last_pinged[email] = time.time()
+        return self.mealpals[email]
+
+    def log_in_again(self, email=None):
+        """Switch the account to its saved session, e.g. one saved since by another mealpy command. Returns False if it
+        has none that is still good.
+
+        The daemon never asks for a password: the prompt would hold up every other account's jobs until answered.
+        """
+        try:
+            self.mealpals[email] = initialize_mealpal(email, interactive=False)
+        except sessions.LoginRequiredError:
+            return False
+        return True
+
+    def ping(self, now):
+        """Check the kitchen for every idle account, keeping its session and a pooled connection alive.
+
+        Sessions that expire within SESSION_REFRESH_MARGIN are swapped for a newer saved one, well before a job needs
+        them. An account whose session is rejected has its jobs skipped until a new session is saved for it.
+        """
+        busy = {self.jobs[name].get('email_address') for name in self.running if name in self.jobs}
+        due = [i for i in self.mealpals if i not in busy and now - self.last_pinged[i] >= self.ping_interval]
+        if not due:
+            return
+
+        expiring = {i.account for i in sessions.get_session_store().expiring(SESSION_REFRESH_MARGIN)}
+        for email in due:
+            self.last_pinged[email] = now
+            account = email or 'the default account'
+            if email in self.logged_out:
+                # The ping below checks whatever session was saved since
+                if not self.log_in_again(email):
+                    continue
+            elif (email or sessions.DEFAULT_ACCOUNT) in expiring:
+                if not self.log_in_again(email):
+                    log(f'Session for {account} is about to expire, restart the daemon to log in again.')
+                continue
+
+            try:
+                self.mealpals[email].get_current_meal()
+            except requests.HTTPError as e:
+                if email not in self.logged_out:
+                    log(f'Session for {account} was rejected ({e}), skipping its jobs until it logs in again.')
+                    self.logged_out.add(email)
+            except requests.RequestException as e:
+                log(f'Ping for {account} failed: {e}')
+            else:
+                if email in self.logged_out:
+                    log(f'Picked up a new session for {account}.')
+                    self.logged_out.discard(email)
+
+    def run_job(self, name, job, fire_at):
+        log(f'Preparing job {name} to fire at {time.ctime(fire_at)}.')
+        try:
+            fire_reservations(
+                self.get_mealpal(job.get('email_address')),
+                job['city'],
+                get_choices(job),
+                fire_at=fire_at,
+                deadline=JOB_DEADLINE,
+            )
+        except (retry.RetryError, requests.RequestException, ScheduleNotFoundError) as e:
+            log(f'Job {name} failed: {e}')
+        else:
+            log(f'Job {name} done.')
+
+    def tick(self, now):
+        """Reload the jobs, ping idle sessions and start every job that is due to prepare."""
+        self.reload(now)
+
+        for name, thread in list(self.running.items()):
+            if not thread.is_alive():
+                del self.running[name]
+
+        for name, fire_at in list(self.next_fire_at.items()):
+            if name in self.running or now < fire_at - self.prepare_lead:
+                continue
+
+            job = self.jobs[name]
+            self.next_fire_at[name] = get_next_fire_at(job, fire_at)
+            if job.get('email_address') in self.logged_out:
+                log(f'Skipping job {name}, its account needs to log in again.')
+                continue
+
+            self.running[name] = threading.Thread(
+                target=self.run_job,
+                args=(name, job, fire_at),
+                name=f'job-{name}',
+                daemon=True,
+            )
+            self.running[name].start()
+
+        self.ping(now)
+
+    def run(self):
+        log(f'Daemon started, watching {self.jobs_path}.')
+        self.tick(time.time())
+        if not self.jobs:
+            log('No jobs yet, add one with `mealpy jobs add`.')
+
+        while not self._stopped.wait(POLL_INTERVAL):
+            self.tick(time.time())
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import namedtuple
+from collections import OrderedDict
+
+import requests
+
+
+POLL_INTERVAL = 60
+WATCHED_FIELDS = ('priority', 'is_featured')
+
+ScheduleUpdate = namedtuple('ScheduleUpdate', 'schedule changes')
+
+
+class MenuDiff(namedtuple('MenuDiff', 'added removed restaurants updated')):
+    """What changed between two snapshots of a city's menu.
+
+    added and removed are schedules, restaurants the restaurants that weren't on the old menu, and updated a
+    ScheduleUpdate for every schedule with a change to one of WATCHED_FIELDS, changes mapping each to (old, new).
+    """
+
+    __slots__ = ()
+
+    def __bool__(self):
+        return any(self)
+
+
+EMPTY_DIFF = MenuDiff([], [], [], [])
+
+
+def diff_snapshots(old, new):
+    """MenuDiff between two cache.MenuSnapshots, keyed by schedule id.
+
+    Schedules are matched by their fingerprints (see cache.MenuSnapshot.fingerprints), and only those whose
+    fingerprint changed are compared field by field.
+    """
+    if old is new:
+        return EMPTY_DIFF
+
+    old_fingerprints = old.fingerprints
+    new_fingerprints = new.fingerprints
+    added = [new.index.by_id[i] for i in new_fingerprints if i not in old_fingerprints]
+    removed = [old.index.by_id[i] for i in old_fingerprints if i not in new_fingerprints]
+
+    updated = []
+    for schedule_id, fingerprint in new_fingerprints.items():
+        if old_fingerprints.get(schedule_id, fingerprint) == fingerprint:
+            continue
+
+        before = old.index.by_id[schedule_id]
+        after = new.index.by_id[schedule_id]
+        changes = OrderedDict(
+            (field, (before.get(field), after.get(field)))
+            for field in WATCHED_FIELDS
+            if before.get(field) != after.get(field)
+        )
+        if changes:
+            updated.append(ScheduleUpdate(after, changes))
+
+    old_restaurants = {i['restaurant']['id'] for i in old.schedules}
+    restaurants = OrderedDict(
+        (i['restaurant']['id'], i['restaurant'])
+        for i in added
+        if i['restaurant']['id'] not in old_restaurants
+    )
+
+    return MenuDiff(added, removed, list(restaurants.values()), updated)
+
+
+def format_diff(diff):
+    """Lines describing a MenuDiff: + added, - removed, * new restaurant, ~ updated."""
+    def describe(schedule):
+        return f'{schedule["meal"]["name"]} at {schedule["restaurant"]["name"]} ({schedule["id"]})'
+
+    lines = [f'+ {describe(i)}' for i in diff.added]
+    lines.extend(f'- {describe(i)}' for i in diff.removed)
+    lines.extend(f'* New restaurant {i["name"]}' for i in diff.restaurants)
+    for schedule, changes in diff.updated:
+        changed = ', '.join(f'{field} {old!r} -> {new!r}' for field, (old, new) in changes.items())
+        lines.append(f'~ {describe(schedule)}: {changed}')
+    return lines
+
+
+class MenuWatcher:
+    """Polls a city's menu every interval seconds, passing each non-empty MenuDiff to the on_change callbacks.
+
+    Menus are revalidated, so an unchanged menu costs a 304 and no diffing at all. The first poll only sets the
+    baseline.
+    """
+
+    def __init__(self, mealpal, city_name, interval=POLL_INTERVAL):
+        self.mealpal = mealpal
+        self.city_name = city_name
+        self.interval = interval
+        self.snapshot = None
+        self._callbacks = []
+        self._stopped = threading.Event()
+
+    def on_change(self, callback):
+        """Call callback(diff) with every non-empty MenuDiff."""
+        self._callbacks.append(callback)
+
+    def poll(self):
+        """Fetch the menu and return what changed since the last poll, or None on the first one."""
+        snapshot = self.mealpal.get_menu(self.city_name, max_age=0)
+        previous, self.snapshot = self.snapshot, snapshot
+        if previous is None:
+            return None
+
+        diff = diff_snapshots(previous, snapshot)
+        if diff:
+            for callback in self._callbacks:
+                callback(diff)
+        return diff
+
+    def run(self):
+        """Poll until stopped, starting with the baseline unless poll() already set it."""
+        wait = 0 if self.snapshot is None else self.interval
+        while not self._stopped.wait(wait):
+            try:
+                self.poll()
+            except requests.RequestException as e:
+                print(f'{time.strftime("%H:%M:%S")} Fetching the menu failed: {e}')
+            wait = self.interval
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,138 @@
+"""Distance queries over the restaurants of a menu, vectorized with NumPy."""
+import math
+import re
+
+import numpy as np
+
+
+EARTH_RADIUS = 6371008.8  # Mean radius, in meters
+METERS_PER_DEGREE = EARTH_RADIUS * math.pi / 180
+GRID_CELL_SIZE = 500
+DISTANCE_UNITS = {'m': 1, 'km': 1000, 'ft': 0.3048, 'mi': 1609.344}
+DISTANCE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d*)?|\.\d+)\s*([a-z]*)\s*$')
+
+
+def parse_distance(text):
+    """Meters in a distance like 500m, 1.5km or 0.3mi. Plain numbers are meters."""
+    match = DISTANCE_PATTERN.match(text.lower())
+    unit = match and (match.group(2) or 'm')
+    if unit not in DISTANCE_UNITS:
+        raise ValueError(f'Not a distance: {text!r}, use e.g. 500m, 1.5km or 0.3mi.')
+    return float(match.group(1)) * DISTANCE_UNITS[unit]
+
+
+def format_distance(meters):
+    return f'{meters:.0f}m' if meters < 1000 else f'{meters / 1000:.1f}km'
+
+
+def haversine(latitude, longitude, latitudes, longitudes):
+    """Great-circle distances in meters between points given in degrees, broadcasting like any NumPy operation."""
+    latitude, longitude, latitudes, longitudes = (np.radians(i) for i in (latitude, longitude, latitudes, longitudes))
+    a = (
+        np.sin((latitudes - latitude) / 2) ** 2 +
+        np.cos(latitude) * np.cos(latitudes) * np.sin((longitudes - longitude) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+def _coordinate(value):
+    try:
+        coordinate = float(value)
+    except (TypeError, ValueError):
+        return None
+    return coordinate if math.isfinite(coordinate) else None
+
+
+class GeoIndex:
+    """Restaurant coordinates of one menu snapshot as NumPy arrays, bucketed into a grid for radius queries.
+
+    Restaurants are indexed once each, by the first of their schedules; ones without coordinates are left out, and
+    ones without an id are indexed with every schedule.
+    Grid cells are about cell_size meters on a side at the restaurants' mean latitude, so a radius query only
+    computes distances to the restaurants in the cells overlapping the circle's bounding box. Works on raw API dicts
+    and models.Schedule objects alike.
+    """
+
+    def __init__(self, schedules, cell_size=GRID_CELL_SIZE):
+        self.schedules = []
+        coordinates = []
+        seen = set()
+        for schedule in schedules:
+            restaurant = schedule['restaurant']
+            latitude = _coordinate(restaurant.get('latitude'))
+            longitude = _coordinate(restaurant.get('longitude'))
+            restaurant_id = restaurant.get('id')
+            if restaurant_id in seen or latitude is None or longitude is None:
+                continue
+            if restaurant_id is not None:
+                seen.add(restaurant_id)
+            self.schedules.append(schedule)
+            coordinates.append((latitude, longitude))
+
+        coordinates = np.array(coordinates, dtype=float).reshape(-1, 2)
+        self.latitudes = coordinates[:, 0]
+        self.longitudes = coordinates[:, 1]
+
+        mean_latitude = float(self.latitudes.mean()) if len(self) else 0.0
+        self.cell_latitude = cell_size / METERS_PER_DEGREE
+        self.cell_longitude = self.cell_latitude / max(math.cos(math.radians(mean_latitude)), 0.01)
+
+        rows = np.floor(self.latitudes / self.cell_latitude).astype(int)
+        columns = np.floor(self.longitudes / self.cell_longitude).astype(int)
+        cells = {}
+        for position, cell in enumerate(zip(rows.tolist(), columns.tolist())):
+            cells.setdefault(cell, []).append(position)
+        self.cells = {cell: np.array(positions) for cell, positions in cells.items()}
+
+    def __len__(self):
+        return len(self.schedules)
+
+    def get_candidates(self, latitude, longitude, radius):
+        """Positions of the restaurants in the grid cells overlapping the bounding box of the circle."""
+        delta_latitude = radius / METERS_PER_DEGREE
+        widest = min(89.9, abs(latitude) + delta_latitude)
+        delta_longitude = delta_latitude / math.cos(math.radians(widest))
+
+        rows = range(
+            math.floor((latitude - delta_latitude) / self.cell_latitude),
+            math.floor((latitude + delta_latitude) / self.cell_latitude) + 1,
+        )
+        columns = range(
+            math.floor((longitude - delta_longitude) / self.cell_longitude),
+            math.floor((longitude + delta_longitude) / self.cell_longitude) + 1,
+        )
+        if len(rows) * len(columns) > len(self.cells):
+            return np.arange(len(self))
+
+        found = [self.cells[(row, column)] for row in rows for column in columns if (row, column) in self.cells]
+        # Sorted, so equally distant restaurants stay in menu order
+        return np.sort(np.concatenate(found)) if found else np.array([], dtype=int)
+
+    def _rank(self, positions, distances, radius, limit):
+        if radius is not None:
+            within = distances <= radius
+            positions, distances = positions[within], distances[within]
+        if limit is not None and limit < len(distances):
+            # Only the nearest limit need sorting; ties are broken by menu order, as a stable sort would
+            nearest = np.argpartition(distances, limit)[:limit]
+            order = nearest[np.lexsort((positions[nearest], distances[nearest]))]
+        else:
+            order = np.argsort(distances, kind='stable')[:limit]
+        return [(self.schedules[i], float(distance)) for i, distance in zip(positions[order], distances[order])]
+
+    def nearby(self, latitude, longitude, radius=None, limit=None):
+        """(schedule, meters) of the restaurants within radius meters of a point, nearest first."""
+        if radius is None:
+            positions = np.arange(len(self))
+        else:
+            positions = self.get_candidates(latitude, longitude, radius)
+
+        distances = haversine(latitude, longitude, self.latitudes[positions], self.longitudes[positions])
+        return self._rank(positions, distances, radius, limit)
+
+    def nearby_many(self, points, radius=None, limit=None):
+        """nearby for each (latitude, longitude) in points, from one matrix of distances to every restaurant."""
+        points = np.array(points, dtype=float).reshape(-1, 2)
+        distances = haversine(points[:, :1], points[:, 1:], self.latitudes, self.longitudes)
+        positions = np.arange(len(self))
+        return [self._rank(positions, row, radius, limit) for row in distances]
@@ -0,0 +1,59 @@
+class ScheduleNotFoundError(LookupError):
+    pass
+
+
+class CityNotFoundError(LookupError):
+    pass
+
+
+def normalize(name):
+    """Lookup key that ignores case and runs of whitespace."""
+    return ' '.join(name.split()).casefold()
+
+
+class ScheduleIndex:
+    """Dict lookups over the schedules of one menu snapshot.
+
+    When several schedules share a name, the first one in menu order wins, as it would with a linear scan.
+    """
+
+    def __init__(self, schedules):
+        self.by_id = {}
+        self.by_restaurant_name = {}
+        self.by_meal_name = {}
+        self._by_restaurant_key = {}
+        self._by_meal_key = {}
+
+        for schedule in schedules:
+            restaurant_name = schedule['restaurant']['name']
+            meal_name = schedule['meal']['name']
+
+            self.by_id.setdefault(schedule['id'], schedule)
+            self.by_restaurant_name.setdefault(restaurant_name, schedule)
+            self.by_meal_name.setdefault(meal_name, schedule)
+            self._by_restaurant_key.setdefault(normalize(restaurant_name), schedule)
+            self._by_meal_key.setdefault(normalize(meal_name), schedule)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def get_by_id(self, schedule_id):
+        try:
+            return self.by_id[schedule_id]
+        except KeyError:
+            raise ScheduleNotFoundError(f'No schedule with id {schedule_id!r} on the menu.') from None
+
+    def get_by_restaurant_name(self, restaurant_name):
+        schedule = (
+            self.by_restaurant_name.get(restaurant_name) or
+            self._by_restaurant_key.get(normalize(restaurant_name))
+        )
+        if schedule is None:
+            raise ScheduleNotFoundError(f'No schedule for restaurant {restaurant_name!r} on the menu.')
+        return schedule
+
+    def get_by_meal_name(self, meal_name):
+        schedule = self.by_meal_name.get(meal_name) or self._by_meal_key.get(normalize(meal_name))
+        if schedule is None:
+            raise ScheduleNotFoundError(f'No schedule for meal {meal_name!r} on the menu.')
+        return schedule
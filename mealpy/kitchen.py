@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import namedtuple
+
+import requests
+
+
+MIN_POLL_INTERVAL = 0.01
+MAX_POLL_INTERVAL = 60
+# The menu is a second request per poll, so it is revalidated at most this often
+MENU_POLL_INTERVAL = 1
+# Each poll waits this fraction of the time left to the expected opening, so polls close in on it geometrically
+APPROACH = 0.25
+# How long past the expected opening to keep polling before giving up on seeing it open
+OPEN_TIMEOUT = 10
+
+KitchenOpening = namedtuple('KitchenOpening', 'source opened_at polls')
+
+
+def is_kitchen_open(response):
+    """Read a KITCHEN_URL response, e.g. {"result": {"status": "OPEN"}}, as open or not."""
+    result = response.get('result', response) if isinstance(response, dict) else None
+    status = result.get('status') if isinstance(result, dict) else result
+    return isinstance(status, str) and status.lower() == 'open'
+
+
+def get_poll_interval(remaining, min_interval=MIN_POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL, approach=APPROACH):
+    """Seconds to wait before the next poll, remaining seconds before the expected opening.
+
+    Far from the opening polls are max_interval apart; nearer, they wait a fraction of the time left, never past the
+    opening itself, down to min_interval once it's due.
+    """
+    return max(min_interval, min(max_interval, remaining * approach))
+
+
+class KitchenWatcher:
+    """Polls a MealPal session until the kitchen opens, then sets the opened event.
+
+    The kitchen counts as open once KITCHEN_URL says so (as read by is_open) or, given city_name, once the menu's
+    generated_at changes from what it was on the first poll (checked at most every MENU_POLL_INTERVAL seconds). Polls
+    start every max_interval seconds and tighten as expected_at (epoch seconds, local clock) approaches; see
+    get_poll_interval.
+    """
+
+    def __init__(
+            self,
+            mealpal,
+            expected_at,
+            city_name=None,
+            is_open=is_kitchen_open,
+            min_interval=MIN_POLL_INTERVAL,
+            max_interval=MAX_POLL_INTERVAL,
+    ):  # pylint: disable=too-many-arguments
+        self.mealpal = mealpal
+        self.expected_at = expected_at
+        self.city_name = city_name
+        self.is_open = is_open
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.opened = threading.Event()
+        self.opening = None
+        self.polls = 0
+        self._generated_at = None
+        self._menu_checked_at = float('-inf')
+        self._callbacks = []
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def on_open(self, callback):
+        """Call callback(opening) from the watcher thread when the kitchen opens."""
+        self._callbacks.append(callback)
+
+    def poll(self):
+        """Check the kitchen once. Returns what showed it open, 'kitchen' or 'menu', or None while it's closed."""
+        self.polls += 1
+        try:
+            if self.is_open(self.mealpal.get_current_meal()):
+                return 'kitchen'
+
+            if self.city_name is not None and time.time() - self._menu_checked_at >= MENU_POLL_INTERVAL:
+                self._menu_checked_at = time.time()
+                generated_at = self.mealpal.get_menu(self.city_name, max_age=0).generated_at
+                if self._generated_at is None:
+                    self._generated_at = generated_at
+                elif generated_at != self._generated_at:
+                    return 'menu'
+        except requests.RequestException as e:
+            print(f'Kitchen check failed: {e}')
+        return None
+
+    def run(self):
+        while not self._stopped.is_set():
+            source = self.poll()
+            if source is not None:
+                self.opening = KitchenOpening(source, time.time(), self.polls)
+                self.opened.set()
+                for callback in self._callbacks:
+                    callback(self.opening)
+                return
+
+            remaining = self.expected_at - time.time()
+            self._stopped.wait(get_poll_interval(remaining, self.min_interval, self.max_interval))
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self.run, name='mealpy-kitchen', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def wait(self, timeout=None):
+        """Block until the kitchen opens, or timeout seconds. Returns True if it opened."""
+        return self.opened.wait(timeout)
+
+
+def wait_until_open(mealpal, expected_at, city_name=None, timeout=None):
+    """Watch the kitchen until it opens, or until timeout (epoch seconds, default OPEN_TIMEOUT past expected_at).
+
+    Returns the KitchenOpening, or None if it didn't open in time.
+    """
+    if timeout is None:
+        timeout = expected_at + OPEN_TIMEOUT
+
+    watcher = KitchenWatcher(mealpal, expected_at, city_name=city_name)
+    watcher.start()
+    try:
+        watcher.wait(max(0.0, timeout - time.time()))
+    finally:
+        watcher.stop()
+
+    if watcher.opening is None:
+        print(f'Kitchen wasn\'t seen open after {watcher.polls} check(s), sending anyway.')
+    else:
+        print(
+            f'Kitchen opened ({watcher.opening.source}) {watcher.opening.opened_at - expected_at:+.3f}s from the '
+            f'expected time, after {watcher.opening.polls} check(s).',
+        )
+    return watcher.opening
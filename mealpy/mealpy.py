@@ -1,13 +1,28 @@
+import datetime
 import getpass
 import json
 import time
-from http.cookiejar import MozillaCookieJar
+from collections import namedtuple
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
 
-import click
 import requests
-import xdg
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from mealpy import cache
 from mealpy import config
+from mealpy import kitchen
+from mealpy import models
+from mealpy import profiling
+from mealpy import retry
+from mealpy import scheduler
+from mealpy import sessions
+from mealpy import stream
+from mealpy import trace
+from mealpy.index import normalize
+from mealpy.index import CityNotFoundError
+from mealpy.index import ScheduleNotFoundError
 
 
 BASE_DOMAIN = 'secure.mealpal.com'
@@ -18,6 +33,15 @@ MENU_URL = f'{BASE_URL}/api/v1/cities/{{}}/product_offerings/lunch/menu'
 RESERVATION_URL = f'{BASE_URL}/api/v2/reservations'
 KITCHEN_URL = f'{BASE_URL}/1/functions/checkKitchen3'
 
+# URL prefixes that name each endpoint in request traces
+ENDPOINTS = (
+    (LOGIN_URL, 'login'),
+    (CITIES_URL, 'cities'),
+    (MENU_URL.split('{}')[0], 'menu'),
+    (RESERVATION_URL, 'reserve'),
+    (KITCHEN_URL, 'kitchen'),
+)
+
 HEADERS = {
     'Host': BASE_DOMAIN,
     'Origin': BASE_URL,
@@ -26,13 +50,76 @@ HEADERS = {
 }
 
 COOKIES_FILENAME = 'cookies.txt'
+COOKIES_DIRNAME = 'cookies'
+
+POOL_SIZE = 10
+MAX_RETRIES = 2
+PREPARE_POLL_INTERVAL = 1
+# Seconds before firing that estimating the clock offset must leave for fetching the menu
+CLOCK_SAMPLING_MARGIN = 3
+SESSION_FRESHNESS = 10 * 60
+SESSION_REFRESH_MARGIN = 60 * 60
+
+# Reservation errors that no other choice would get past
+ACCOUNT_ERRORS = frozenset(('ERROR_RESERVATION_LIMIT',))
+# Reservation errors that only this choice will keep getting, so the next one is tried instead
+UNAVAILABLE_ERRORS = frozenset(('ERROR_SOLD_OUT', 'ERROR_SCHEDULE_NOT_FOUND'))
+# Other refusals (e.g. the kitchen not being open yet) are retried for about 5 seconds before giving up on a choice
+CLIENT_ERROR_ATTEMPTS = 100
+
+Choice = namedtuple('Choice', 'restaurant_name meal_name timing')
+CitySchedules = namedtuple('CitySchedules', 'city_name schedules error')
+
+
+def create_session(pool_size=POOL_SIZE, max_retries=MAX_RETRIES, tracer=None):
+    """Session with a keep-alive connection pool to BASE_URL.
+
+    Retries happen in the adapter, so only failed connections and idempotent requests answered with a gateway error
+    are retried; reservation POSTs are never re-sent behind the caller's back. With a trace.Tracer, every request is
+    timed and recorded to it.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=0.1,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    if tracer is None:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    else:
+        adapter = trace.TracingAdapter(
+            tracer,
+            endpoints=ENDPOINTS,
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+
+    session = requests.Session()
+    session.mount(BASE_URL, adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+class PreparedReservation:
+    """A fully built reservation request, so firing it is a single send on a warm connection."""
+
+    def __init__(self, session, request, schedule, choice=None):
+        self.session = session
+        self.request = request
+        self.schedule = schedule
+        self.choice = choice
+        self.send_kwargs = session.merge_environment_settings(request.url, {}, None, None, None)
+
+    def send(self):
+        return self.session.send(self.request, **self.send_kwargs)
 
 
 class MealPal:
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+    def __init__(self, pool_size=POOL_SIZE, max_retries=MAX_RETRIES, tracer=None):
+        self.session = create_session(pool_size=pool_size, max_retries=max_retries, tracer=tracer)
+        self.session_token = None
 
     def login(self, user, password):
         data = {
@@ -42,37 +129,163 @@ class MealPal:
         request = self.session.post(LOGIN_URL, data=json.dumps(data))
 
         request.raise_for_status()
+        self.session_token = request.json().get('sessionToken')
 
         return request.status_code
 
-    @staticmethod
-    def get_cities():
-        response = requests.post(CITIES_URL)
+    def get_cities(self, as_models=False):
+        """All cities with their neighborhoods, as raw API dicts or, with as_models, models.City objects."""
+        response = self.session.post(CITIES_URL)
         response.raise_for_status()
 
         result = response.json()['result']
+        if as_models:
+            return models.load_cities(result)
 
         return result
 
-    @staticmethod
-    def get_schedules(city_name):
-        city_id = next((i['objectId'] for i in MealPal.get_cities() if i['name'] == city_name), None)
-        request = requests.get(MENU_URL.format(city_id))
+    def get_city_index(self, refresh=False):
+        return cache.get_city_index().get(self.get_cities, refresh=refresh)
+
+    def get_city_id(self, city_name):
+        """The city's objectId, refreshing the city index once if it doesn't know the city (yet)."""
+        city = self.get_city_index().get(city_name) or self.get_city_index(refresh=True).get(city_name)
+        if city is None:
+            raise CityNotFoundError(f'No city named {city_name!r}.')
+        return city['objectId']
+
+    def get_menu(self, city_name, max_age=cache.MENU_MAX_AGE):
+        """Return the menu snapshot for a city, revalidating it once it is older than max_age seconds."""
+        city_id = self.get_city_id(city_name)
+        menu_cache = cache.get_menu_cache()
+
+        snapshot = menu_cache.get(city_id)
+        if snapshot is not None and snapshot.age <= max_age:
+            return snapshot
+
+        headers = snapshot.conditional_headers() if snapshot is not None else {}
+        request = self.session.get(MENU_URL.format(city_id), headers=headers)
+        if snapshot is not None and request.status_code == 304:
+            menu_cache.touch(snapshot)
+            return snapshot
+
         request.raise_for_status()
-        return request.json()['schedules']
+        payload = request.json()
+
+        # Server didn't send a 304, but an unchanged generated_at means the menu is the same
+        generated_at = payload.get('generated_at')
+        if snapshot is not None and generated_at is not None and generated_at == snapshot.generated_at:
+            menu_cache.touch(
+                snapshot,
+                etag=request.headers.get('ETag'),
+                last_modified=request.headers.get('Last-Modified'),
+            )
+            return snapshot
 
-    @staticmethod
-    def get_schedule_by_restaurant_name(restaurant_name, city_name):
-        restaurant = next(
-            i
-            for i in MealPal.get_schedules(city_name)
-            if i['restaurant']['name'] == restaurant_name
+        snapshot = cache.MenuSnapshot(
+            city_id,
+            payload,
+            etag=request.headers.get('ETag'),
+            last_modified=request.headers.get('Last-Modified'),
         )
-        return restaurant
+        menu_cache.put(snapshot)
+        return snapshot
+
+    def get_schedules(self, city_name, as_models=False):
+        """The menu's schedules, as raw API dicts or, with as_models, models.Schedule objects."""
+        snapshot = self.get_menu(city_name)
+        return snapshot.models if as_models else snapshot.schedules
+
+    def search(self, city_name, **filters):
+        """Schedules on the menu matching filters, see search.SearchIndex.search."""
+        return self.get_menu(city_name).search_index.search(**filters)
+
+    def get_nearby(self, city_name, points, radius=None, limit=None):
+        """For each (latitude, longitude) in points, (schedule, meters) of the restaurants within radius meters.
+
+        One schedule per restaurant, nearest first; see geo.GeoIndex. With a radius, each point only looks at the
+        grid cells around it; without, the distances from every point to every restaurant are computed at once.
+        """
+        geo_index = self.get_menu(city_name).geo_index
+        if radius is not None:
+            return [geo_index.nearby(latitude, longitude, radius=radius, limit=limit) for latitude, longitude in points]
+        return geo_index.nearby_many(points, limit=limit)
+
+    def get_all_schedules(self, max_workers=POOL_SIZE, as_models=False):
+        """Fetch every city's menu concurrently, yielding a CitySchedules for each city as soon as it is done.
+
+        At most max_workers menus are fetched at once, over the session's connection pool. A city that fails is
+        yielded with its error instead of schedules, so one bad menu doesn't stop the others.
+        """
+        city_names = list(self.get_city_index())
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = {
+            executor.submit(self.get_schedules, city_name, as_models=as_models): city_name
+            for city_name in city_names
+        }
+
+        try:
+            for future in as_completed(futures):
+                try:
+                    yield CitySchedules(futures[future], future.result(), None)
+                except (requests.RequestException, ValueError) as e:
+                    yield CitySchedules(futures[future], None, e)
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def iter_schedules(self, city_name, fields=stream.RESERVE_FIELDS):
+        """Stream the schedules of a fresh menu straight from the server, keeping only fields of each.
+
+        This bypasses the menu cache, and the connection is released as soon as the caller stops iterating.
+        """
+        city_id = self.get_city_id(city_name)
+        with self.session.get(MENU_URL.format(city_id), stream=True) as response:
+            response.raise_for_status()
+            yield from stream.iter_schedules(response.iter_content(stream.CHUNK_SIZE), fields=fields)
+
+    def stream_schedule(self, city_name, restaurant_name=None, meal_name=None, fields=stream.RESERVE_FIELDS):
+        """Find a schedule by streaming the menu, without reading any further than the first match."""
+        assert restaurant_name or meal_name
+        key, name = ('meal', meal_name) if meal_name else ('restaurant', restaurant_name)
+        normalized_name = normalize(name)
+
+        schedules = self.iter_schedules(city_name, fields=fields)
+        try:
+            for schedule in schedules:
+                if normalize(schedule.get(key, {}).get('name', '')) == normalized_name:
+                    return schedule
+        finally:
+            schedules.close()
+
+        raise ScheduleNotFoundError(f'No schedule for {key} {name!r} on the menu.')
 
     @staticmethod
-    def get_schedule_by_meal_name(meal_name, city_name):
-        return next(i for i in MealPal.get_schedules(city_name) if i['meal']['name'] == meal_name)
+    def lookup_schedule(schedule_index, restaurant_name=None, meal_name=None):
+        if meal_name:
+            return schedule_index.get_by_meal_name(meal_name)
+        return schedule_index.get_by_restaurant_name(restaurant_name)
+
+    def find_schedule(self, city_name, restaurant_name=None, meal_name=None):
+        """Look up a schedule in the cached menu, revalidating the menu once if it is missing."""
+        requested_at = time.time()
+        snapshot = self.get_menu(city_name)
+
+        try:
+            return MealPal.lookup_schedule(snapshot.index, restaurant_name=restaurant_name, meal_name=meal_name)
+        except ScheduleNotFoundError:
+            if snapshot.fetched_at >= requested_at:
+                raise
+
+        snapshot = self.get_menu(city_name, max_age=0)
+        return MealPal.lookup_schedule(snapshot.index, restaurant_name=restaurant_name, meal_name=meal_name)
+
+    def get_schedule_by_restaurant_name(self, restaurant_name, city_name):
+        return self.find_schedule(city_name, restaurant_name=restaurant_name)
+
+    def get_schedule_by_meal_name(self, meal_name, city_name):
+        return self.find_schedule(city_name, meal_name=meal_name)
 
     def reserve_meal(
             self,
@@ -87,63 +300,213 @@ class MealPal:
             self.cancel_current_meal()
 
         if meal_name:
-            schedule_id = MealPal.get_schedule_by_meal_name(meal_name, city_name)['id']
+            schedule_id = self.get_schedule_by_meal_name(meal_name, city_name)['id']
         else:
-            schedule_id = MealPal.get_schedule_by_restaurant_name(restaurant_name, city_name)['id']
+            schedule_id = self.get_schedule_by_restaurant_name(restaurant_name, city_name)['id']
+
+        request = self.session.post(RESERVATION_URL, json=MealPal.get_reservation_data(timing, schedule_id))
+        return request.status_code
 
-        reserve_data = {
+    @staticmethod
+    def get_reservation_data(timing, schedule_id):
+        return {
             'quantity': 1,
             'schedule_id': schedule_id,
             'pickup_time': timing,
             'source': 'Web',
         }
 
-        request = self.session.post(RESERVATION_URL, json=reserve_data)
-        return request.status_code
+    def prepare_reservation(self, timing, city_name, restaurant_name=None, meal_name=None, warm_up=True):
+        """Do all the work of a reservation except sending it.
+
+        With warm_up, the session cookies are checked against KITCHEN_URL first, which also leaves an open connection
+        in the pool. Raises ScheduleNotFoundError if the menu doesn't have the choice (yet).
+        """
+        assert restaurant_name or meal_name
+        if warm_up:
+            self.get_current_meal()
+
+        schedule = self.find_schedule(city_name, restaurant_name=restaurant_name, meal_name=meal_name)
+        return self.build_reservation(timing, schedule)
+
+    def prepare_reservations(self, city_name, choices, warm_up=True, max_age=cache.MENU_MAX_AGE):
+        """Prepare a reservation for every Choice on the menu, in preference order, from a single menu snapshot.
+
+        The menu is revalidated once it is older than max_age seconds. Raises ScheduleNotFoundError if none of the
+        choices are on the menu (yet).
+        """
+        if warm_up:
+            self.get_current_meal()
+
+        requested_at = time.time()
+        snapshot = self.get_menu(city_name, max_age=max_age)
+        reservations = self._prepare_choices(snapshot, choices)
+        if not reservations and snapshot.fetched_at < requested_at:
+            snapshot = self.get_menu(city_name, max_age=0)
+            reservations = self._prepare_choices(snapshot, choices)
+
+        if not reservations:
+            raise ScheduleNotFoundError(f'None of the {len(choices)} choice(s) are on the menu.')
+        return reservations
+
+    def _prepare_choices(self, snapshot, choices):
+        reservations = []
+        for choice in choices:
+            try:
+                schedule = MealPal.lookup_schedule(
+                    snapshot.index,
+                    restaurant_name=choice.restaurant_name,
+                    meal_name=choice.meal_name,
+                )
+            except ScheduleNotFoundError:
+                continue
+            reservations.append(self.build_reservation(choice.timing, schedule, choice=choice))
+        return reservations
+
+    def build_reservation(self, timing, schedule, choice=None):
+        request = self.session.prepare_request(requests.Request(
+            'POST',
+            RESERVATION_URL,
+            json=MealPal.get_reservation_data(timing, schedule['id']),
+        ))
+        return PreparedReservation(self.session, request, schedule, choice=choice)
+
+    def validate_session(self):
+        """Check the session cookies against KITCHEN_URL, the lightest authenticated endpoint.
+
+        Flukes are retried according to get_validation_retry_policy, and retry.RetryError is raised if the session is
+        rejected.
+        """
+        retry.call(
+            self.get_current_meal,
+            get_validation_retry_policy(),
+            on_retry=lambda attempt, delay, response, error: print(
+                f'Login using cookies failed, retrying after {delay:g} second(s).',
+            ),
+        )
 
     def get_current_meal(self):
         request = self.session.post(KITCHEN_URL)
+        request.raise_for_status()
         return request.json()
 
     def cancel_current_meal(self):
         raise NotImplementedError()
 
 
-def get_mealpal_credentials():
-    email = config.get_config()['email_address']
-    password = getpass.getpass('Enter password: ')
+def is_final_refusal(response):
+    """Whether no retry of this reservation can succeed, see classify_reservation_response."""
+    return classify_reservation_response(response) in ('fatal', 'unavailable')
+
+
+def get_reserve_retry_policy():
+    """Default policy for sending reservations: back off quickly on server errors, poll steadily on client errors.
+
+    Gives up straight away once the choice is sold out or the account can't reserve, and after CLIENT_ERROR_ATTEMPTS
+    attempts when the server keeps refusing it for any other reason.
+    """
+    return retry.GiveUpOn(
+        retry.StatusAware(
+            server_error=retry.ExponentialBackoff(base=0.01, max_delay=0.5),
+            client_error=retry.FixedDelay(0.05, max_attempts=CLIENT_ERROR_ATTEMPTS),
+        ),
+        is_final_refusal,
+    )
+
+
+def get_choice_retry_policy():
+    """Policy for one of several choices: like get_reserve_retry_policy, but server errors are only retried a few
+    times before moving on to the next choice."""
+    return retry.GiveUpOn(
+        retry.StatusAware(
+            server_error=retry.ExponentialBackoff(base=0.01, max_delay=0.5, max_attempts=10),
+            client_error=retry.FixedDelay(0.05, max_attempts=CLIENT_ERROR_ATTEMPTS),
+        ),
+        is_final_refusal,
+    )
+
+
+def get_validation_retry_policy():
+    """Retry flukes when validating cookies, but give up straight away when the session is rejected."""
+    return retry.StatusAware(server_error=retry.ExponentialBackoff(base=1, jitter=False, max_attempts=5))
+
+
+def get_mealpal_credentials(email=None):
+    email = email or config.get_config()['email_address']
+    password = getpass.getpass(f'Enter password for {email}: ')
     return email, password
 
 
-def initialize_mealpal():
-    cookies_path = xdg.XDG_CACHE_HOME / 'mealpy' / COOKIES_FILENAME
-    mealpal = MealPal()
-    mealpal.session.cookies = MozillaCookieJar()
+def get_cookies_path(email=None):
+    """Cookie jar written by older versions, imported into the session store on first use."""
+    if email is None:
+        return config.CACHE_DIR / COOKIES_FILENAME
+    return config.CACHE_DIR / COOKIES_DIRNAME / f'{email}.txt'
 
-    if cookies_path.exists():
-        try:
-            mealpal.session.cookies.load(cookies_path, ignore_expires=True, ignore_discard=True)
-        except UnicodeDecodeError:
-            pass
+
+def load_legacy_session(account, email=None):
+    cookies_path = get_cookies_path(email)
+    if not cookies_path.exists():
+        return None
+
+    from http.cookiejar import LoadError
+    from http.cookiejar import MozillaCookieJar
+
+    jar = MozillaCookieJar()
+    try:
+        jar.load(str(cookies_path), ignore_expires=True, ignore_discard=True)
+    except (UnicodeDecodeError, LoadError) as e:
+        print(f'Ignoring unreadable cookies in {cookies_path}: {e}')
+        return None
+
+    return sessions.SessionRecord.from_jar(account, jar)
+
+
+def get_session_freshness(email=None):
+    """Seconds a validated session is trusted without checking it again."""
+    if email is None:
+        return config.get_config().get('session_freshness', SESSION_FRESHNESS)
+    return SESSION_FRESHNESS
+
+
+def initialize_mealpal(email=None, tracer=None, pool_size=POOL_SIZE, use_saved_session=True, interactive=True):
+    """Log in with the account's saved session if it is still good, or with credentials otherwise.
+
+    Without use_saved_session, e.g. once the server rejected it, the saved session is ignored and replaced. Without
+    interactive, sessions.LoginRequiredError is raised instead of prompting for a password.
+    """
+    account = email or sessions.DEFAULT_ACCOUNT
+    store = sessions.get_session_store()
+    mealpal = MealPal(pool_size=pool_size, tracer=tracer)
+
+    record = None
+    if use_saved_session:
+        record = store.load(account) or load_legacy_session(account, email)
+    if record is not None:
+        mealpal.session.cookies = record.to_jar()
+        mealpal.session_token = record.session_token
+
+        if record.expires_within(SESSION_REFRESH_MARGIN):
+            print('Saved session is about to expire, please re-enter your login credentials.')
+        elif record.is_fresh(get_session_freshness(email)):
+            print('Login using recently validated session.')
+            return mealpal
         else:
-            # hacky way of validating cookies
-            sleep_duration = 1
-            for _ in range(5):
-                try:
-                    MealPal.get_schedules('San Francisco')
-                except requests.HTTPError:
-                    # Possible fluke, retry validation
-                    print(f'Login using cookies failed, retrying after {sleep_duration} second(s).')
-                    time.sleep(sleep_duration)
-                    sleep_duration *= 2
-                else:
-                    print('Login using cookies successful!')
-                    return mealpal
-
-        print('Existing cookies are invalid, please re-enter your login credentials.')
+            try:
+                mealpal.validate_session()
+            except retry.RetryError:
+                print('Saved session is invalid, please re-enter your login credentials.')
+            else:
+                print('Login using saved session successful!')
+                record.validated_at = time.time()
+                store.save(record)
+                return mealpal
+
+    if not interactive:
+        raise sessions.LoginRequiredError(f'No usable saved session for {account}.')
 
     while True:
-        email, password = get_mealpal_credentials()
+        email, password = get_mealpal_credentials(email)
 
         try:
             mealpal.login(email, password)
@@ -152,71 +515,286 @@ def initialize_mealpal():
         else:
             break
 
-    # save latest cookies
-    print(f'Login successful! Saving cookies as {cookies_path}.')
-    mealpal.session.cookies.save(cookies_path, ignore_discard=True, ignore_expires=True)
+    # save latest session
+    print(f'Login successful! Saving session as {store.get_path(account)}.')
+    store.save(sessions.SessionRecord.from_jar(
+        account,
+        mealpal.session.cookies,
+        session_token=mealpal.session_token,
+        validated_at=time.time(),
+    ))
 
     return mealpal
 
 
-@click.group()
-def cli():  # pragma: no cover
-    pass
+def parse_fire_at(fire_at):
+    """Epoch time of today's HH:MM:SS wall-clock time."""
+    fire_time = datetime.datetime.strptime(fire_at, '%H:%M:%S').time()
+    return datetime.datetime.combine(datetime.date.today(), fire_time).timestamp()
 
 
-# SCHEDULER = BlockingScheduler()
-# @SCHEDULER.scheduled_job('cron', hour=16, minute=59, second=58)
-def execute_reserve_meal(restaurant, reservation_time, city):
-    mealpal = initialize_mealpal()
+def parse_choice(spec, timing):
+    """Parse a [restaurant:|meal:]NAME[@PICKUP_TIME] choice; names are restaurants and timing is used by default."""
+    name, _, choice_timing = spec.rpartition('@') if '@' in spec else (spec, '', '')
+    kind, _, rest = name.partition(':')
+    if kind == 'meal':
+        return Choice(None, rest, choice_timing or timing)
+    if kind == 'restaurant':
+        name = rest
+    return Choice(name, None, choice_timing or timing)
 
-    while True:
+
+def get_reservation_error(response):
+    try:
+        return response.json().get('error')
+    except (ValueError, AttributeError):
+        return None
+
+
+def is_schedule_missing(response):
+    """Whether the server doesn't know the reservation's schedule, e.g. because the menu changed since preparing it."""
+    return response.status_code == 404 or get_reservation_error(response) == 'ERROR_SCHEDULE_NOT_FOUND'
+
+
+def classify_reservation_response(response):
+    """One of 'success', 'fatal' (no choice can succeed), 'unavailable' (try another choice) or 'retry'.
+
+    Only a 404 or one of UNAVAILABLE_ERRORS makes a choice unavailable straight away. Other refusals, such as the
+    kitchen not being open yet, are retried, until the retry policy gives up on a choice that keeps being refused.
+    """
+    if response.status_code == 200:
+        return 'success'
+    error = get_reservation_error(response)
+    if error in ACCOUNT_ERRORS:
+        return 'fatal'
+    if error in UNAVAILABLE_ERRORS or response.status_code == 404:
+        return 'unavailable'
+    return 'retry'
+
+
+def reserve_first_available(reservations, policy=None, stats=None):
+    """Send reservations in preference order, moving on to the next one as soon as it is sold out.
+
+    Other refusals, server errors and connection problems are retried on the same choice according to policy, which
+    moves on to the next choice once it gives up. Returns the reservation and response that succeeded, or None and
+    the last response (None if there was none) once an account error stops everything or every choice is given up.
+    """
+    policy = policy or get_choice_retry_policy()
+    response = None
+
+    for reservation in reservations:
         try:
-            status_code = mealpal.reserve_meal(
-                reservation_time,
-                restaurant_name=restaurant,
-                city_name=city,
+            response = retry.call(
+                reservation.send,
+                policy,
+                is_success=lambda response: response.status_code == 200,
+                stats=stats,
             )
-            if status_code == 200:
-                print('Reservation success!')
-                # print('Leave this script running to reschedule again the next day!')
+        except retry.RetryError as e:
+            response = e.response
+            if response is not None and classify_reservation_response(response) == 'fatal':
                 break
-            else:
-                print('Reservation error, retrying!')
-        except IndexError:
-            print('Retrying...')
-            time.sleep(0.05)
-
-# SCHEDULER.start()
-
+        else:
+            return reservation, response
 
-@cli.command('reserve', short_help='Reserve a meal on MealPal.')
-@click.argument('restaurant')
-@click.argument('reservation_time')
-@click.argument('city')
-def reserve(restaurant, reservation_time, city):  # pragma: no cover
-    execute_reserve_meal(restaurant, reservation_time, city)
+    return None, response
 
 
-@cli.group(name='list')
-def cli_list():  # pragma: no cover
-    pass
+def prepare_reservations_until(mealpal, fire_at, city_name, choices):
+    """Prepare reservations for choices, polling the menu until one is published or fire_at is reached.
 
+    Returns an empty list if the menu didn't have any of them in time.
+    """
+    mealpal.get_current_meal()
 
-@cli_list.command('cities', short_help='List available cities.')
-def cli_list_cities():  # pragma: no cover
-    cities = [i['name'] for i in MealPal.get_cities()]
-    print('\n'.join(cities))
+    while True:
+        try:
+            return mealpal.prepare_reservations(city_name, choices, warm_up=False)
+        except ScheduleNotFoundError:
+            remaining = fire_at - time.time()
+            if remaining <= 0:
+                return []
+            time.sleep(min(PREPARE_POLL_INTERVAL, remaining))
+
+
+def send_reservations(reservations, engine=None, fallbacks=(), deadline=None, reprepare=None):
+    """Send prepared reservations until one succeeds: the reservation hot path, from first attempt to success.
+
+    reprepare() returns the single choice's reservation prepared against a fresh menu. Without fallbacks or an engine,
+    it is called when the server no longer knows the schedule (at most every PREPARE_POLL_INTERVAL seconds), and a
+    reservation for a new schedule is sent straight away. Other refusals never leave the prepared request.
+    """
+    if fallbacks:
+        policy = get_choice_retry_policy()
+        if engine is not None:
+            from mealpy import aio
+
+            result = aio.run(engine.reserve_first_available(
+                reservations,
+                classify_reservation_response,
+                deadline=deadline,
+                policy=policy,
+            ))
+            reservation, response = result.reservation, result.response
+        else:
+            reservation, response = reserve_first_available(
+                reservations,
+                policy=policy if deadline is None else retry.Deadline(policy, deadline),
+            )
 
+        if response is None or response.status_code != 200:
+            print('None of the choices could be reserved.')
+            return
+        print(f'Reservation success! Reserved {reservation.schedule["restaurant"]["name"]}.')
+        return
+
+    reservation = reservations[0]
+    if engine is not None:
+        from mealpy import aio
+
+        result = aio.run(engine.reserve_burst(
+            reservation,
+            deadline=deadline,
+            classify=classify_reservation_response,
+            policy=get_reserve_retry_policy(),
+        ))
+        if result.response is None or result.response.status_code != 200:
+            print(f'Reservation failed after {result.attempts} attempts in {result.elapsed:.3f}s.')
+            return
+        print(f'Reservation success after {result.attempts} attempts in {result.elapsed:.3f}s!')
+        return
+
+    prepared_at = float('-inf')
+
+    def send():
+        nonlocal reservation, prepared_at
+        response = reservation.send()
+        if (
+                reprepare is not None
+                and is_schedule_missing(response)
+                and time.time() - prepared_at >= PREPARE_POLL_INTERVAL
+        ):
+            prepared_at = time.time()
+            try:
+                fresh = reprepare()
+            except (ScheduleNotFoundError, requests.RequestException) as e:
+                print(f'Keeping the prepared reservation, preparing it again failed: {e}')
+            else:
+                if fresh.schedule['id'] != reservation.schedule['id']:
+                    print(f'Schedule {reservation.schedule["id"]} is gone, sending {fresh.schedule["id"]} instead.')
+                    reservation = fresh
+                    response = reservation.send()
+        return response
+
+    policy = get_reserve_retry_policy()
+    stats = retry.RetryStats()
+    try:
+        retry.call(
+            send,
+            policy if deadline is None else retry.Deadline(policy, deadline),
+            is_success=lambda response: response.status_code == 200,
+            stats=stats,
+            on_retry=lambda *_: print('Reservation error, retrying!'),
+        )
+    except retry.RetryError:
+        print('Reservation failed.')
+    else:
+        print('Reservation success!')
+    print(stats)
+
+
+def fire_reservations(
+        mealpal,
+        city,
+        choices,
+        fire_at=None,
+        engine=None,
+        deadline=None,
+        profiler=None,
+        wait_for_open=False,
+):  # pylint: disable=too-many-arguments
+    """Prepare reservations for choices ahead of fire_at (epoch seconds, server clock), then send them at fire_at.
+
+    Without fire_at, they are prepared and sent straight away. engine is an aio.AsyncMealPal to send through. With
+    wait_for_open, a kitchen.KitchenWatcher also watches for the kitchen opening ahead of fire_at, and they are sent
+    as soon as it is seen open or fire_at comes, whichever is first. deadline is how many seconds to keep trying for,
+    counted from then.
+    """
+    reservations = []
+
+    if fire_at is not None:
+        clock = scheduler.estimate_clock_offset(mealpal.session, BASE_URL, until=fire_at - CLOCK_SAMPLING_MARGIN)
+        if clock.error < float('inf'):
+            print(f'Server clock is {clock.offset:+.3f}s (±{clock.error:.3f}s) from local clock.')
+
+        reservations = prepare_reservations_until(mealpal, fire_at - clock.offset, city, choices)
+        if engine is not None:
+            from mealpy import aio
+
+            aio.run(engine.warm_up())
+        if wait_for_open:
+            # Whichever comes first: a kitchen that opens late is better caught by retrying than by polling it
+            expected_at = fire_at - clock.offset
+            kitchen.wait_until_open(mealpal, expected_at, city, timeout=expected_at)
+        else:
+            scheduler.wait_until(fire_at, clock_offset=clock.offset)
+
+    if deadline is not None:
+        deadline += time.time()
+
+    if not reservations:
+        policy = retry.FixedDelay(0.05)
+        reservations = retry.call(
+            lambda: mealpal.prepare_reservations(city, choices, warm_up=False),
+            policy if deadline is None else retry.Deadline(policy, deadline),
+            retry_on=(ScheduleNotFoundError,),
+            on_retry=lambda *_: print('Retrying...'),
+        )
 
-@cli_list.command('restaurants', short_help='List available restaurants.')
-@click.argument('city')
-def cli_list_restaurants(city):  # pragma: no cover
-    restaurants = [i['restaurant']['name'] for i in MealPal.get_schedules(city)]
-    print('\n'.join(restaurants))
+    with profiling.window(profiler):
+        send_reservations(
+            reservations,
+            engine=engine,
+            fallbacks=choices[1:],
+            deadline=deadline,
+            reprepare=lambda: mealpal.prepare_reservations(city, choices[:1], warm_up=False, max_age=0)[0],
+        )
 
 
-@cli_list.command('meals', short_help='List meal choices.')
-@click.argument('city')
-def cli_list_meals(city):  # pragma: no cover
-    restaurants = [i['meal']['name'] for i in MealPal.get_schedules(city)]
-    print('\n'.join(restaurants))
+def execute_reserve_meal(
+        restaurant,
+        reservation_time,
+        city,
+        fire_at=None,
+        concurrency=1,
+        deadline=None,
+        fallbacks=(),
+        tracer=None,
+        profiler=None,
+        wait_for_open=False,
+):  # pylint: disable=too-many-arguments
+    """Reserve restaurant, or the first available of the fallback Choices after it.
+
+    deadline (seconds from the first attempt) bounds how long reservations are retried for. tracer, a trace.Tracer,
+    records every request made along the way. profiler, a profiling.Profiler, is run from the first reservation attempt
+    to success. wait_for_open is passed on to fire_reservations.
+    """
+    # Every attempt in flight needs a connection of its own
+    mealpal = initialize_mealpal(tracer=tracer, pool_size=max(POOL_SIZE, concurrency))
+    engine = None
+    if concurrency > 1:
+        # asyncio is only worth importing when attempts are actually sent concurrently
+        from mealpy import aio
+
+        engine = aio.AsyncMealPal(mealpal, max_workers=concurrency)
+
+    fire_reservations(
+        mealpal,
+        city,
+        [Choice(restaurant, None, reservation_time), *fallbacks],
+        fire_at=fire_at,
+        engine=engine,
+        deadline=deadline,
+        profiler=profiler,
+        wait_for_open=wait_for_open,
+    )
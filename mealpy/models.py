@@ -0,0 +1,188 @@
+"""Compact, read-only models of the MealPal API objects.
+
+Raw API dicts carry every field the web app shows, plus a copy of the city in each restaurant. These models keep the
+fields mealpy uses in __slots__, intern repeated strings (cuisines, neighborhoods, dates) so every schedule shares
+one copy, and still support item access (schedule['meal']['name']) so code written against the dicts keeps working.
+"""
+from sys import intern
+
+
+def _intern(value):
+    return intern(value) if isinstance(value, str) else value
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Model:
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, i) == getattr(other, i) for i in self.__slots__)
+
+    def __hash__(self):
+        return hash((type(self), self.id))  # pylint: disable=no-member
+
+    def __repr__(self):
+        fields = ', '.join(f'{i}={getattr(self, i)!r}' for i in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class Neighborhood(Model):
+    __slots__ = ('id', 'name')
+
+    def __init__(self, id, name):  # pylint: disable=redefined-builtin
+        self.id = _intern(id)
+        self.name = _intern(name)
+
+    @classmethod
+    def from_json(cls, data):
+        if not data:
+            return None
+        return cls(data.get('id'), data.get('name'))
+
+
+class City(Model):
+    __slots__ = ('id', 'name', 'neighborhoods')
+
+    def __init__(self, id, name, neighborhoods=()):  # pylint: disable=redefined-builtin
+        self.id = _intern(id)
+        self.name = _intern(name)
+        self.neighborhoods = tuple(neighborhoods)
+
+    @classmethod
+    def from_json(cls, data):
+        """Build from a getCitiesWithNeighborhoods result, which calls the id objectId."""
+        return cls(
+            data.get('objectId', data.get('id')),
+            data['name'],
+            tuple(Neighborhood.from_json(i) for i in data.get('neighborhoods', ())),
+        )
+
+
+class Meal(Model):
+    __slots__ = ('id', 'name', 'description', 'cuisine', 'image', 'portion', 'veg')
+
+    def __init__(
+            self,
+            id,  # pylint: disable=redefined-builtin
+            name,
+            description=None,
+            cuisine=None,
+            image=None,
+            portion=None,
+            veg=None,
+    ):  # pylint: disable=too-many-arguments
+        self.id = id
+        self.name = name
+        self.description = description
+        self.cuisine = _intern(cuisine)
+        self.image = image
+        self.portion = portion
+        self.veg = veg
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            data.get('id'),
+            data['name'],
+            description=data.get('description'),
+            cuisine=data.get('cuisine'),
+            image=data.get('image'),
+            portion=data.get('portion'),
+            veg=data.get('veg'),
+        )
+
+
+class Restaurant(Model):
+    __slots__ = ('id', 'name', 'address', 'neighborhood', 'latitude', 'longitude')
+
+    def __init__(
+            self,
+            id,  # pylint: disable=redefined-builtin
+            name,
+            address=None,
+            neighborhood=None,
+            latitude=None,
+            longitude=None,
+    ):  # pylint: disable=too-many-arguments
+        self.id = id
+        self.name = name
+        self.address = address
+        self.neighborhood = neighborhood
+        self.latitude = latitude
+        self.longitude = longitude
+
+    @classmethod
+    def from_json(cls, data, neighborhoods=None):
+        """Build from a schedule's restaurant; neighborhoods, if given, shares Neighborhood instances by id."""
+        neighborhood = Neighborhood.from_json(data.get('neighborhood'))
+        if neighborhood is not None and neighborhoods is not None:
+            neighborhood = neighborhoods.setdefault(neighborhood.id, neighborhood)
+
+        return cls(
+            data.get('id'),
+            data['name'],
+            address=data.get('address'),
+            neighborhood=neighborhood,
+            latitude=_float(data.get('latitude')),
+            longitude=_float(data.get('longitude')),
+        )
+
+
+class Schedule(Model):
+    __slots__ = ('id', 'date', 'priority', 'is_featured', 'meal', 'restaurant')
+
+    def __init__(
+            self,
+            id,  # pylint: disable=redefined-builtin
+            date,
+            meal,
+            restaurant,
+            priority=None,
+            is_featured=False,
+    ):  # pylint: disable=too-many-arguments
+        self.id = id
+        self.date = _intern(date)
+        self.meal = meal
+        self.restaurant = restaurant
+        self.priority = priority
+        self.is_featured = is_featured
+
+    @classmethod
+    def from_json(cls, data, neighborhoods=None):
+        return cls(
+            data['id'],
+            data.get('date'),
+            Meal.from_json(data['meal']),
+            Restaurant.from_json(data['restaurant'], neighborhoods=neighborhoods),
+            priority=data.get('priority'),
+            is_featured=data.get('is_featured', False),
+        )
+
+
+def load_schedules(schedules):
+    """Models for a list of schedule dicts, sharing one Neighborhood instance per neighborhood."""
+    neighborhoods = {}
+    return [Schedule.from_json(i, neighborhoods=neighborhoods) for i in schedules]
+
+
+def load_cities(cities):
+    return [City.from_json(i) for i in cities]
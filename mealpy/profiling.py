@@ -0,0 +1,127 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+PROFILES_DIRNAME = 'profiles'
+SAMPLE_INTERVAL = 0.001
+STATS_LIMIT = 40
+
+
+def get_frame_name(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class Sampler:
+    """Low overhead sampling profiler for every thread, counting collapsed stacks.
+
+    A background thread snapshots all other threads' stacks every interval seconds. Each stack is kept as one
+    semicolon separated line rooted at the thread name, the format flame graph tools read.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='mealpy-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def sample(self):
+        names = {i.ident: i.name for i in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():  # pylint: disable=protected-access
+            if thread_id == threading.get_ident():
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(get_frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.stacks.items()))
+
+
+class Profiler:
+    """cProfile and a Sampler run together, over the whole command or over windows of it.
+
+    cProfile gives exact call counts and times, but only for the thread that started it; the sampler also sees the
+    worker threads sending concurrent reservations. save() writes, next to path_prefix, the cProfile stats (.prof, for
+    pstats or snakeviz), a text report of the top functions (.txt) and the collapsed stacks (.folded).
+    """
+
+    def __init__(self, path_prefix, interval=SAMPLE_INTERVAL):
+        self.path_prefix = path_prefix
+        self.profile = cProfile.Profile()
+        self.sampler = Sampler(interval=interval)
+        self.running = False
+        self.elapsed = 0.0
+        self._started_at = None
+
+    def start(self):
+        self.running = True
+        self._started_at = time.perf_counter()
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.sampler.stop()
+        self.elapsed += time.perf_counter() - self._started_at
+        self.running = False
+
+    def get_paths(self):
+        return {i: self.path_prefix.with_name(f'{self.path_prefix.name}.{i}') for i in ('prof', 'txt', 'folded')}
+
+    def save(self):
+        """Write the profiles, returning their paths, or None if nothing was profiled."""
+        if self.running:
+            self.stop()
+        if not self.elapsed:
+            return None
+
+        paths = self.get_paths()
+        paths['prof'].parent.mkdir(parents=True, exist_ok=True)
+        self.profile.dump_stats(str(paths['prof']))
+
+        report = io.StringIO()
+        report.write(f'Profiled {self.elapsed:.3f}s\n')
+        pstats.Stats(self.profile, stream=report).sort_stats('cumulative').print_stats(STATS_LIMIT)
+        paths['txt'].write_text(report.getvalue())
+        paths['folded'].write_text(self.sampler.collapsed())
+        return paths
+
+
+@contextmanager
+def window(profiler):
+    """Profile the block with profiler, unless there is none or it is already running."""
+    if profiler is None or profiler.running:
+        yield
+        return
+
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
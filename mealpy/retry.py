@@ -0,0 +1,236 @@
+import random
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+
+import requests
+
+
+class RetryError(Exception):
+    """Raised when a policy gives up. Carries the last failed response (if any) and the attempt stats."""
+
+    def __init__(self, message, response=None, stats=None):
+        super().__init__(message)
+        self.response = response
+        self.stats = stats
+
+
+class RetryPolicy:
+    """Decides how long to wait after a failed attempt, or None to give up.
+
+    attempt is the number of attempts made so far. response is the failed response, if there was one, and error the
+    exception raised by the attempt, if any.
+    """
+
+    def next_delay(self, attempt, response=None, error=None):
+        raise NotImplementedError()
+
+
+class FixedDelay(RetryPolicy):
+
+    def __init__(self, delay, max_attempts=None):
+        self.delay = delay
+        self.max_attempts = max_attempts
+
+    def next_delay(self, attempt, response=None, error=None):
+        if self.max_attempts is not None and attempt >= self.max_attempts:
+            return None
+        return self.delay
+
+
+class ExponentialBackoff(RetryPolicy):
+    """base * factor ** (attempt - 1), capped at max_delay. With jitter, a uniformly random delay up to that."""
+
+    def __init__(
+            self,
+            base=0.05,
+            factor=2,
+            max_delay=2,
+            jitter=True,
+            max_attempts=None,
+    ):  # pylint: disable=too-many-arguments
+        self.base = base
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.max_attempts = max_attempts
+
+    def next_delay(self, attempt, response=None, error=None):
+        if self.max_attempts is not None and attempt >= self.max_attempts:
+            return None
+
+        delay = min(self.max_delay, self.base * self.factor ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+class Deadline(RetryPolicy):
+    """Wraps a policy, giving up once the next attempt would start after deadline (epoch seconds)."""
+
+    def __init__(self, policy, deadline):
+        self.policy = policy
+        self.deadline = deadline
+
+    def next_delay(self, attempt, response=None, error=None):
+        delay = self.policy.next_delay(attempt, response=response, error=error)
+        if delay is None or time.time() + delay >= self.deadline:
+            return None
+        return delay
+
+
+class GiveUpOn(RetryPolicy):
+    """Wraps a policy, giving up straight away on a response for which give_up(response) is true."""
+
+    def __init__(self, policy, give_up):
+        self.policy = policy
+        self.give_up = give_up
+
+    def next_delay(self, attempt, response=None, error=None):
+        if response is not None and self.give_up(response):
+            return None
+        return self.policy.next_delay(attempt, response=response, error=error)
+
+
+def get_retry_after(response):
+    """Seconds to wait according to a Retry-After header, which is either a number of seconds or an HTTP date."""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is None:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class StatusAware(RetryPolicy):
+    """Picks a policy by what went wrong.
+
+    429 responses wait as long as Retry-After asks (falling back to server_error without it), other 4xx responses use
+    client_error (giving up without one), and 5xx or unexpected responses use server_error. Exceptions without a
+    response (connection errors, timeouts, ...) use error, which defaults to server_error.
+    """
+
+    def __init__(self, server_error, client_error=None, error=None):
+        self.server_error = server_error
+        self.client_error = client_error
+        self.error = error or server_error
+
+    def next_delay(self, attempt, response=None, error=None):
+        if response is None:
+            return self.error.next_delay(attempt, error=error)
+
+        if response.status_code == 429:
+            retry_after = get_retry_after(response)
+            if retry_after is not None:
+                return retry_after
+
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            if self.client_error is None:
+                return None
+            return self.client_error.next_delay(attempt, response=response, error=error)
+
+        return self.server_error.next_delay(attempt, response=response, error=error)
+
+
+class RetryStats:
+    """Attempt, outcome and latency accounting for a retried call, so policies can be compared."""
+
+    def __init__(self):
+        self.latencies = []
+        self.outcomes = Counter()
+        self.last_outcome = None
+        self.waited = 0.0
+
+    @property
+    def attempts(self):
+        return len(self.latencies)
+
+    @property
+    def elapsed(self):
+        return sum(self.latencies) + self.waited
+
+    def record(self, latency, outcome):
+        self.latencies.append(latency)
+        self.outcomes[outcome] += 1
+        self.last_outcome = outcome
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        return {
+            'attempts': self.attempts,
+            'outcomes': dict(self.outcomes),
+            'latency_mean': sum(latencies) / len(latencies) if latencies else None,
+            'latency_p50': latencies[len(latencies) // 2] if latencies else None,
+            'latency_max': latencies[-1] if latencies else None,
+            'waited': self.waited,
+            'elapsed': self.elapsed,
+        }
+
+    def __str__(self):
+        summary = self.summary()
+        outcomes = ', '.join(f'{outcome}: {count}' for outcome, count in self.outcomes.most_common())
+        if not self.latencies:
+            return 'No attempts.'
+        return (
+            f'{summary["attempts"]} attempt(s) ({outcomes}) in {summary["elapsed"]:.3f}s, '
+            f'latency mean {summary["latency_mean"]:.3f}s / max {summary["latency_max"]:.3f}s, '
+            f'waited {summary["waited"]:.3f}s'
+        )
+
+
+def get_outcome(response=None, error=None):
+    if error is not None:
+        return error.__class__.__name__
+    return f'HTTP {response.status_code}'
+
+
+def call(
+        func,
+        policy,
+        is_success=None,
+        retry_on=(requests.RequestException,),
+        stats=None,
+        on_retry=None,
+):  # pylint: disable=too-many-arguments
+    """Call func() until it succeeds or policy gives up, returning its result.
+
+    An attempt fails if it raises one of retry_on, or if is_success(result) is false (the result is then handed to the
+    policy as the failed response). on_retry(attempt, delay, response, error) is called before each wait.
+    Raises RetryError from the last exception once the policy gives up.
+    """
+    stats = stats if stats is not None else RetryStats()
+    attempt = 0
+
+    while True:
+        attempt += 1
+        response = error = None
+        started_at = time.perf_counter()
+
+        try:
+            result = func()
+        except retry_on as e:
+            error = e
+            response = getattr(e, 'response', None)
+        else:
+            if is_success is None or is_success(result):
+                stats.record(time.perf_counter() - started_at, 'success')
+                return result
+            response = result
+
+        stats.record(time.perf_counter() - started_at, get_outcome(response, error))
+
+        delay = policy.next_delay(attempt, response=response, error=error)
+        if delay is None:
+            raise RetryError(f'Gave up after {attempt} attempt(s).', response=response, stats=stats) from error
+
+        if on_retry is not None:
+            on_retry(attempt, delay, response, error)
+        stats.waited += delay
+        time.sleep(delay)
@@ -0,0 +1,76 @@
+import time
+from collections import namedtuple
+from email.utils import parsedate_to_datetime
+
+import requests
+
+
+SPIN_WINDOW = 0.005
+CLOCK_SAMPLES = 5
+
+ClockOffset = namedtuple('ClockOffset', 'offset error')
+
+
+def wait_until(fire_at, clock_offset=0, spin_window=SPIN_WINDOW):
+    """Block until the server clock reaches fire_at (epoch seconds).
+
+    clock_offset is server time minus local time. Sleeps coarsely until spin_window seconds before the deadline, then
+    busy-waits the rest, since time.sleep can overshoot by more than the few milliseconds that matter here.
+    """
+    deadline = fire_at - clock_offset
+
+    remaining = deadline - time.time()
+    while remaining > spin_window:
+        time.sleep(remaining - spin_window)
+        remaining = deadline - time.time()
+
+    while time.time() < deadline:
+        pass
+
+
+def estimate_clock_offset(session, url, samples=CLOCK_SAMPLES, until=None):
+    """Estimate server time minus local time from the Date header of HEAD requests to url.
+
+    Date only has one second resolution, so each sample only bounds the offset to a window of about a second plus the
+    round trip. Samples are spread across a second so the windows' intersection narrows down to a few round trips.
+    Returns ClockOffset(offset, error), with error being the half-width of the remaining window.
+
+    That takes about a second per sample, so with until (epoch seconds) no sample is started after it. Failed requests
+    and missing Date headers are skipped; without a single good sample the clocks are assumed to agree, with an
+    infinite error.
+    """
+    interval = 1 + 1 / samples
+    lower, upper = float('-inf'), float('inf')
+    midpoints = []
+
+    for i in range(samples):
+        if i:
+            if until is not None and time.time() + interval > until:
+                break
+            time.sleep(interval)
+
+        sent_at = time.time()
+        try:
+            response = session.head(url)
+        except requests.RequestException:
+            continue
+        received_at = time.time()
+
+        try:
+            server_second = parsedate_to_datetime(response.headers.get('Date')).timestamp()
+        except ValueError:
+            continue
+        lower = max(lower, server_second - received_at)
+        upper = min(upper, server_second + 1 - sent_at)
+        midpoints.append(server_second + 0.5 - (sent_at + received_at) / 2)
+
+    if not midpoints:
+        print('Could not read the server clock, assuming it matches the local one.')
+        return ClockOffset(0.0, float('inf'))
+
+    if lower > upper:
+        # Inconsistent samples (e.g. load balanced servers with different clocks), fall back to the median
+        midpoints.sort()
+        return ClockOffset(midpoints[len(midpoints) // 2], 0.5)
+
+    return ClockOffset((lower + upper) / 2, (upper - lower) / 2)
@@ -0,0 +1,68 @@
+import re
+
+from mealpy.index import normalize
+
+
+TOKEN_PATTERN = re.compile(r'\w+')
+NO_MATCHES = frozenset()
+
+
+def tokenize(*texts):
+    """Set of case-folded words in texts, ignoring None."""
+    return {i.casefold() for text in texts if text for i in TOKEN_PATTERN.findall(text)}
+
+
+class SearchIndex:
+    """Inverted indexes over the schedules of one menu snapshot, for filtered searches without scanning them.
+
+    Each index maps a key (a cuisine, a neighborhood name, a word from the meal name and description or restaurant
+    name) to the set of positions of the schedules having it, so a search is an intersection of the smallest sets.
+    Works on raw API dicts and models.Schedule objects alike.
+    """
+
+    def __init__(self, schedules):
+        self.schedules = list(schedules)
+        self.by_cuisine = {}
+        self.by_neighborhood = {}
+        self.by_token = {}
+        self.veg = set()
+
+        for position, schedule in enumerate(self.schedules):
+            meal = schedule['meal']
+            restaurant = schedule['restaurant']
+            neighborhood = restaurant.get('neighborhood') or {}
+
+            if meal.get('cuisine'):
+                self.by_cuisine.setdefault(normalize(meal['cuisine']), set()).add(position)
+            if neighborhood.get('name'):
+                self.by_neighborhood.setdefault(normalize(neighborhood['name']), set()).add(position)
+            if meal.get('veg'):
+                self.veg.add(position)
+            for token in tokenize(meal['name'], meal.get('description'), restaurant['name']):
+                self.by_token.setdefault(token, set()).add(position)
+
+    def __len__(self):
+        return len(self.schedules)
+
+    def search(self, cuisine=None, veg=False, neighborhood=None, text=None, limit=None):
+        """Schedules matching every given filter, in menu order.
+
+        cuisine and neighborhood match whole names, ignoring case and spacing; text matches schedules with all its
+        words in the meal name or description or the restaurant name.
+        """
+        filters = []
+        if cuisine is not None:
+            filters.append(self.by_cuisine.get(normalize(cuisine), NO_MATCHES))
+        if neighborhood is not None:
+            filters.append(self.by_neighborhood.get(normalize(neighborhood), NO_MATCHES))
+        if veg:
+            filters.append(self.veg)
+        if text is not None:
+            filters.extend(self.by_token.get(i, NO_MATCHES) for i in tokenize(text))
+
+        if not filters:
+            return self.schedules[:limit]
+
+        filters.sort(key=len)
+        positions = sorted(filters[0].intersection(*filters[1:]))
+        return [self.schedules[i] for i in positions[:limit]]
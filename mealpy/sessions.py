@@ -0,0 +1,112 @@
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from requests.cookies import create_cookie
+from requests.cookies import RequestsCookieJar
+
+from mealpy import cache
+from mealpy import config
+
+
+SESSIONS_DIRNAME = 'sessions'
+DEFAULT_ACCOUNT = 'default'
+
+
+class LoginRequiredError(Exception):
+    """The account has no usable saved session, and asking for its password isn't allowed."""
+
+
+class SessionRecord:
+    """Everything known about one account's login: its cookies, their expiry, the session token and when the session
+    was last known to be valid."""
+
+    def __init__(self, account, cookies=(), session_token=None, validated_at=None):
+        self.account = account
+        self.cookies = list(cookies)
+        self.session_token = session_token
+        self.validated_at = validated_at
+
+    @classmethod
+    def from_jar(cls, account, jar, session_token=None, validated_at=None):
+        cookies = [
+            {
+                'name': i.name,
+                'value': i.value,
+                'domain': i.domain,
+                'path': i.path,
+                'secure': i.secure,
+                'expires': i.expires,
+            }
+            for i in jar
+        ]
+        return cls(account, cookies, session_token=session_token, validated_at=validated_at)
+
+    def to_jar(self):
+        jar = RequestsCookieJar()
+        for i in self.cookies:
+            jar.set_cookie(create_cookie(**i))
+        return jar
+
+    @property
+    def expires_at(self):
+        """When the first cookie expires, or None if they all last for the session."""
+        expiries = [i['expires'] for i in self.cookies if i['expires'] is not None]
+        return min(expiries) if expiries else None
+
+    def expires_within(self, seconds):
+        return self.expires_at is not None and self.expires_at - time.time() <= seconds
+
+    def is_fresh(self, freshness):
+        """Whether the session was validated in the last `freshness` seconds."""
+        return self.validated_at is not None and time.time() - self.validated_at <= freshness
+
+    def to_json(self):
+        return {
+            'account': self.account,
+            'cookies': self.cookies,
+            'session_token': self.session_token,
+            'validated_at': self.validated_at,
+            'expires_at': self.expires_at,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            data['account'],
+            data['cookies'],
+            session_token=data.get('session_token'),
+            validated_at=data.get('validated_at'),
+        )
+
+
+class SessionStore:
+    """One atomically written JSON file per account, so loading a session never reads anyone else's."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def get_path(self, account):
+        return self.path / f'{account.replace("/", "_")}.json'
+
+    def load(self, account):
+        data = cache.load_json(self.get_path(account))
+        return None if data is None else SessionRecord.from_json(data)
+
+    def save(self, record):
+        cache.dump_json(self.get_path(record.account), record.to_json())
+
+    def records(self):
+        for path in sorted(self.path.glob('*.json')):
+            data = cache.load_json(path)
+            if data is not None:
+                yield SessionRecord.from_json(data)
+
+    def expiring(self, seconds):
+        """Sessions that expire within the next `seconds`, so they can be refreshed ahead of time."""
+        return [i for i in self.records() if i.expires_within(seconds)]
+
+
+@lru_cache(maxsize=1)
+def get_session_store():
+    return SessionStore(config.CACHE_DIR / SESSIONS_DIRNAME)
@@ -0,0 +1,133 @@
+import codecs
+import json
+
+
+SCHEDULES_KEY = 'schedules'
+# All a reservation needs from a schedule
+RESERVE_FIELDS = ('id', 'meal.name', 'restaurant.name')
+CHUNK_SIZE = 16 * 1024
+
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
+
+
+def project(value, fields):
+    """Copy only the dotted field paths of a decoded JSON object, keeping their nesting.
+
+    Missing fields are left out rather than raising, so a projection never fails on a sparse schedule.
+    """
+    projected = {}
+    for field in fields:
+        source = value
+        target = projected
+        *parents, name = field.split('.')
+        for parent in parents:
+            source = source.get(parent) if isinstance(source, dict) else None
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(parent, {})
+        else:
+            if name in source:
+                target[name] = source[name]
+    return projected
+
+
+class MenuStream:
+    """Parse a menu payload incrementally, yielding one schedule at a time.
+
+    Only the schedule being decoded and the unconsumed part of the current chunk are held in memory. With fields,
+    each schedule is cut down to those dotted paths as soon as it is decoded. The other top level keys (such as
+    generated_at) are collected into meta as they go by; ones after the schedules are only seen if the iteration
+    runs to the end. Stop iterating at any time to skip the rest of the body.
+    """
+
+    def __init__(self, chunks, fields=None):
+        self.meta = {}
+        self.fields = fields
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self):
+        self._expect('{')
+        if self._peek() == '}':
+            return
+
+        while True:
+            key = self._decode()
+            self._expect(':')
+            if key == SCHEDULES_KEY:
+                yield from self._iter_array()
+            else:
+                self.meta[key] = self._decode()
+
+            if self._expect(',}') == '}':
+                return
+
+    def _iter_array(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+
+        while True:
+            value = self._decode()
+            yield project(value, self.fields) if self.fields else value
+            if self._expect(',]') == ']':
+                return
+
+    def _read(self):
+        """Append the next chunk to the buffer, dropping what was already consumed. Returns False at the end."""
+        if self._eof:
+            return False
+
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            self._buffer = self._buffer[self._pos:] + self._utf8.decode(b'', final=True)
+        else:
+            if isinstance(chunk, bytes):
+                chunk = self._utf8.decode(chunk)
+            self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                raise ValueError('Unexpected end of menu payload.')
+
+    def _expect(self, characters):
+        character = self._peek()
+        if character not in characters:
+            raise ValueError(f'Expected one of {characters!r} in menu payload, got {character!r}.')
+        self._pos += 1
+        return character
+
+    def _decode(self):
+        """Decode the next JSON value, reading more chunks until it is complete."""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if not self._read():
+                    raise
+                continue
+
+            # A number at the very end of the buffer might continue in the next chunk
+            if end == len(self._buffer) and self._read():
+                continue
+
+            self._pos = end
+            return value
+
+
+def iter_schedules(chunks, fields=None):
+    return iter(MenuStream(chunks, fields=fields))
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+import weakref
+from collections import Counter
+from collections import namedtuple
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+
+TRACES_DIRNAME = 'traces'
+
+TraceEvent = namedtuple('TraceEvent', 'started_at endpoint method status new_connection ttfb total size error')
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of non-empty sorted values."""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class Tracer:
+    """Collects one TraceEvent per HTTP request sent through a TracingAdapter.
+
+    With a path, every event is also appended to it as a line of JSON as soon as it is recorded, so a trace survives
+    an interrupted run.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.events = []
+        self._lock = threading.Lock()
+        self._file = None
+
+    def record(self, event):
+        with self._lock:
+            self.events.append(event)
+            if self.path is not None:
+                if self._file is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._file = self.path.open('a')
+                self._file.write(json.dumps(event._asdict()) + '\n')
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def summary(self):
+        """Per endpoint statistics, in the order endpoints were first called."""
+        by_endpoint = OrderedDict()
+        for event in self.events:
+            by_endpoint.setdefault(event.endpoint, []).append(event)
+
+        summary = OrderedDict()
+        for endpoint, events in by_endpoint.items():
+            ttfbs = sorted(i.ttfb for i in events if i.ttfb is not None)
+            totals = sorted(i.total for i in events)
+            summary[endpoint] = {
+                'calls': len(events),
+                'new_connections': sum(1 for i in events if i.new_connection),
+                'errors': sum(1 for i in events if i.error is not None),
+                'statuses': dict(sorted(Counter(i.status for i in events if i.status is not None).items())),
+                'ttfb_p50': percentile(ttfbs, 0.5) if ttfbs else None,
+                'total_p50': percentile(totals, 0.5),
+                'total_p99': percentile(totals, 0.99),
+                'total_max': totals[-1],
+                'bytes': sum(i.size or 0 for i in events),
+            }
+        return summary
+
+    def __str__(self):
+        if not self.events:
+            return 'No requests.'
+
+        def ms(seconds):
+            return '-' if seconds is None else f'{seconds * 1000:.1f}ms'
+
+        lines = [
+            f'{"ENDPOINT":<12} {"CALLS":>5} {"NEW CONN":>8} {"TTFB P50":>9} {"P50":>9} {"P99":>9} {"MAX":>9} '
+            f'{"BYTES":>9}  STATUS',
+        ]
+        for endpoint, i in self.summary().items():
+            statuses = ', '.join(f'{status}: {count}' for status, count in i['statuses'].items())
+            if i['errors']:
+                statuses = ', '.join(filter(None, (statuses, f'errors: {i["errors"]}')))
+            lines.append(
+                f'{endpoint:<12} {i["calls"]:>5} {i["new_connections"]:>8} {ms(i["ttfb_p50"]):>9} '
+                f'{ms(i["total_p50"]):>9} {ms(i["total_p99"]):>9} {ms(i["total_max"]):>9} {i["bytes"]:>9}  {statuses}',
+            )
+        return '\n'.join(lines)
+
+
+class TracingAdapter(HTTPAdapter):
+    """HTTPAdapter that times every request and reports it to a Tracer.
+
+    endpoints is a sequence of (URL prefix, name) used to label requests by path. A response read from a socket that
+    hasn't been seen before was sent on a new connection. Unless the request streams, the body is read here so the
+    total time and size include it.
+    """
+
+    def __init__(self, tracer, endpoints=(), **kwargs):
+        self.tracer = tracer
+        self.endpoints = [(urlsplit(prefix).path, name) for prefix, name in endpoints]
+        self._connections = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def get_endpoint(self, request):
+        path = urlsplit(request.url).path
+        for prefix, name in self.endpoints:
+            if path.startswith(prefix):
+                return name
+        return path
+
+    def is_new_connection(self, response):
+        connection = getattr(response.raw, '_connection', None)
+        # A pooled connection object reconnects with a new socket once the server closes the old one
+        sock = getattr(connection, 'sock', None) or connection
+        if sock is None:
+            return None
+
+        with self._connections_lock:
+            if sock in self._connections:
+                return False
+            self._connections.add(sock)
+            return True
+
+    def send(self, request, stream=False, **kwargs):  # pylint: disable=arguments-differ
+        started_at = time.time()
+        start = time.perf_counter()
+        event = {
+            'started_at': started_at,
+            'endpoint': self.get_endpoint(request),
+            'method': request.method,
+            'status': None,
+            'new_connection': None,
+            'ttfb': None,
+            'size': None,
+            'error': None,
+        }
+
+        try:
+            response = super().send(request, stream=stream, **kwargs)
+            event['ttfb'] = time.perf_counter() - start
+            event['status'] = response.status_code
+            event['new_connection'] = self.is_new_connection(response)
+            if stream:
+                event['size'] = int(response.headers.get('Content-Length', 0)) or None
+            else:
+                event['size'] = len(response.content)
+            return response
+        except Exception as e:
+            event['error'] = e.__class__.__name__
+            raise
+        finally:
+            self.tracer.record(TraceEvent(total=time.perf_counter() - start, **event))
@@ -0,0 +1,156 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+import requests
+
+from mealpy import aio
+from mealpy import retry
+
+
+class FakeReservation:
+    """Stand-in for PreparedReservation whose sends return the given status codes in order, then 500s."""
+
+    def __init__(self, status_codes, latency=0.01):
+        self.status_codes = iter(status_codes)
+        self.latency = latency
+        self.sent = 0
+        self.lock = threading.Lock()
+
+    def send(self):
+        with self.lock:
+            self.sent += 1
+            status_code = next(self.status_codes, 500)
+        time.sleep(self.latency)
+        if isinstance(status_code, Exception):
+            raise status_code
+        return mock.Mock(status_code=status_code)
+
+
+@pytest.fixture
+def engine():
+    yield aio.AsyncMealPal(mock.Mock(), max_workers=3)
+
+
+def test_delegates_to_mealpal(engine):
+    engine.mealpal.get_schedules.return_value = mock.sentinel.schedules
+
+    assert aio.run(engine.get_schedules('mock_city')) is mock.sentinel.schedules
+    engine.mealpal.get_schedules.assert_called_once_with('mock_city')
+
+
+def test_warm_up(engine):
+    aio.run(engine.warm_up())
+
+    assert engine.mealpal.get_current_meal.call_count == 3
+
+
+def test_reserve_burst_success(engine):
+    reservation = FakeReservation([500, requests.ConnectionError(), 500, 200])
+
+    result = aio.run(engine.reserve_burst(reservation))
+    time.sleep(0.05)
+
+    assert result.response.status_code == 200
+    assert reservation.sent == result.attempts, 'No attempts should start after a success.'
+
+
+def test_reserve_burst_max_attempts(engine):
+    reservation = FakeReservation([500] * 5)
+
+    result = aio.run(engine.reserve_burst(reservation, concurrency=2, max_attempts=5))
+
+    assert result.response.status_code == 500
+    assert result.attempts == 5
+
+
+def test_reserve_burst_deadline(engine):
+    reservation = FakeReservation([], latency=0.01)
+
+    result = aio.run(engine.reserve_burst(reservation, concurrency=2, deadline=time.time() + 0.05))
+
+    assert result.response.status_code == 500
+    assert 2 <= result.attempts < 20
+
+
+def test_reserve_burst_concurrency_beats_serial(engine):
+    """With several attempts in flight, success arrives after fewer round trips than sending serially."""
+    serial = aio.run(engine.reserve_burst(FakeReservation([500] * 5 + [200], latency=0.05), concurrency=1))
+    burst = aio.run(engine.reserve_burst(FakeReservation([500] * 5 + [200] * 3, latency=0.05), concurrency=3))
+
+    assert burst.elapsed < serial.elapsed
+
+
+def classify(response):
+    return {200: 'success', 400: 'unavailable', 401: 'fatal'}.get(response.status_code, 'retry')
+
+
+def test_reserve_first_available(engine):
+    sold_out = FakeReservation([400])
+    flaky = FakeReservation([503, requests.ConnectionError(), 200], latency=0.02)
+    fallback = FakeReservation([200])
+
+    result = aio.run(engine.reserve_first_available([sold_out, flaky, fallback], classify, concurrency=2))
+
+    assert result.reservation is flaky
+    assert result.response.status_code == 200
+    assert not fallback.sent, 'A lower ranked choice is never sent while a higher ranked one can still succeed.'
+
+
+def test_reserve_first_available_none(engine):
+    last = FakeReservation([400], latency=0.05)
+
+    result = aio.run(engine.reserve_first_available([FakeReservation([400], latency=0), last], classify, concurrency=1))
+
+    assert result.response.status_code == 400
+    assert result.reservation is last
+    assert result.attempts == 2
+
+
+def test_reserve_first_available_fatal(engine):
+    result = aio.run(engine.reserve_first_available([FakeReservation([401], latency=0)], classify))
+
+    assert result.response.status_code == 401
+
+
+def test_reserve_first_available_policy(engine):
+    early = FakeReservation([409, 409, 200], latency=0)
+    given_up = FakeReservation([503, 503], latency=0)
+    fallback = FakeReservation([200], latency=0)
+
+    result = aio.run(engine.reserve_first_available([early], classify, concurrency=1, policy=retry.FixedDelay(0.02)))
+
+    assert result.response.status_code == 200
+    assert result.attempts == 3
+    assert result.elapsed >= 0.04, 'Retries should wait as long as the policy says.'
+
+    result = aio.run(engine.reserve_first_available(
+        [given_up, fallback],
+        classify,
+        concurrency=1,
+        policy=retry.FixedDelay(0, max_attempts=2),
+    ))
+
+    assert result.reservation is fallback
+    assert given_up.sent == 2
+
+
+def test_reserve_burst_stops_on_refusal(engine):
+    reservation = FakeReservation([503, 401, 200], latency=0)
+
+    result = aio.run(engine.reserve_burst(reservation, concurrency=1, classify=classify))
+
+    assert result.response.status_code == 401
+    assert result.attempts == 2
+
+
+def test_reserve_burst_policy(engine):
+    reservation = FakeReservation([], latency=0)
+    policy = mock.Mock(**{'next_delay.side_effect': [0.02, 0.02, None]})
+
+    result = aio.run(engine.reserve_burst(reservation, concurrency=1, policy=policy))
+
+    assert result.attempts == 3, 'The burst should stop once the policy gives up.'
+    assert result.elapsed >= 0.04, 'Failed attempts should be replaced after the policy delay.'
+    assert policy.next_delay.call_args[0] == (3,)
@@ -0,0 +1,144 @@
+from textwrap import dedent
+from unittest import mock
+
+import pytest
+import requests
+
+from mealpy import batch
+from mealpy.index import ScheduleNotFoundError
+
+
+pytestmark = pytest.mark.usefixtures('mock_cache_dir')
+
+
+@pytest.fixture
+def account():
+    yield {
+        'email_address': 'test@test.com',
+        'city': 'San Francisco',
+        'reservation_time': '12:15pm-12:30pm',
+        'restaurant': 'RestaurantName',
+    }
+
+
+def response(status_code):
+    return mock.Mock(status_code=status_code)
+
+
+def test_reserve_account(account):
+    reservation = mock.Mock()
+    reservation.send.side_effect = [response(500), requests.ConnectionError(), response(200)]
+
+    with mock.patch.object(batch.retry.time, 'sleep'):
+        result = batch.reserve_account(mock.Mock(), account, reservation, batch.time.time() + 60)
+
+    assert result.status == 'reserved'
+    assert result.attempts == 3
+    assert result.choice == 'RestaurantName'
+
+
+def test_reserve_account_prepares_when_needed(account):
+    mealpal = mock.Mock()
+    reservation = mock.Mock(**{'send.return_value': response(200)})
+    mealpal.prepare_reservation.side_effect = [ScheduleNotFoundError(), reservation]
+
+    with mock.patch.object(batch.retry.time, 'sleep'):
+        result = batch.reserve_account(mealpal, account, None, batch.time.time() + 60)
+
+    assert result.status == 'reserved'
+    assert mealpal.prepare_reservation.call_args == mock.call(
+        '12:15pm-12:30pm',
+        'San Francisco',
+        restaurant_name='RestaurantName',
+        meal_name=None,
+        warm_up=False,
+    )
+
+
+def test_reserve_account_deadline(account):
+    reservation = mock.Mock(**{'send.return_value': response(400)})
+
+    result = batch.reserve_account(mock.Mock(), account, reservation, batch.time.time())
+
+    assert result.status == 'HTTP 400'
+    assert result.attempts == 1
+
+
+def test_prepare_account_error(account):
+    mealpal = mock.Mock(**{'get_current_meal.side_effect': requests.HTTPError()})
+
+    assert batch.prepare_account(mealpal, account, batch.time.time() + 60) is None
+
+
+def test_execute_batch_reserve_prepare_error(tmp_path, account):
+    accounts_path = tmp_path / 'accounts.yaml'
+    accounts_path.write_text(dedent('''\
+        - email_address: a@test.com
+          city: San Francisco
+          reservation_time: 12:15pm-12:30pm
+          meal: Spam and Eggs
+        - email_address: b@test.com
+          city: San Francisco
+          reservation_time: 12:15pm-12:30pm
+          restaurant: RestaurantName
+    '''))
+    rejected = mock.Mock(**{
+        'get_current_meal.side_effect': requests.HTTPError(),
+        'prepare_reservation.side_effect': requests.HTTPError(),
+    })
+    ready = mock.Mock()
+    ready.prepare_reservations.return_value = [mock.Mock(**{'send.return_value': response(200)})]
+    clock = batch.scheduler.ClockOffset(0, 0)
+
+    with mock.patch.object(batch, 'initialize_mealpal', side_effect=[rejected, ready]), \
+            mock.patch.object(batch.scheduler, 'estimate_clock_offset', return_value=clock), \
+            mock.patch.object(batch.scheduler, 'wait_until'), \
+            mock.patch.object(batch, 'BATCH_WINDOW', 0), \
+            mock.patch.object(batch, 'format_report'):
+        results = batch.execute_batch_reserve(accounts_path, fire_at=batch.time.time())
+
+    assert [i.status for i in results] == ['HTTPError', 'reserved'], 'One account failing should not stop the others.'
+
+
+def test_reserve_account_sold_out(account):
+    reservation = mock.Mock()
+    reservation.send.return_value = mock.Mock(status_code=400, **{'json.return_value': {'error': 'ERROR_SOLD_OUT'}})
+
+    result = batch.reserve_account(mock.Mock(), account, reservation, batch.time.time() + 60)
+
+    assert result.status == 'HTTP 400'
+    assert result.attempts == 1, 'Sold out reservations are not retried.'
+
+
+def test_format_report():
+    report = batch.format_report([
+        batch.AccountResult('a@test.com', 'Spam and Eggs', 'reserved', 1, 0.0123),
+        batch.AccountResult('longer@test.com', 'Meal', 'HTTP 400', 12, 60.0),
+    ])
+
+    assert report == dedent('''\
+        ACCOUNT          CHOICE         STATUS    ATTEMPTS  TIME
+        a@test.com       Spam and Eggs  reserved  1         0.012s
+        longer@test.com  Meal           HTTP 400  12        60.000s''')
+
+
+def test_execute_batch_reserve(tmp_path, account):
+    accounts_path = tmp_path / 'accounts.yaml'
+    accounts_path.write_text(dedent('''\
+        - email_address: a@test.com
+          city: San Francisco
+          reservation_time: 12:15pm-12:30pm
+          meal: Spam and Eggs
+        - email_address: b@test.com
+          city: San Francisco
+          reservation_time: 12:15pm-12:30pm
+          restaurant: RestaurantName
+    '''))
+
+    with mock.patch.object(batch, 'initialize_mealpal') as initialize_mealpal, \
+            mock.patch.object(batch, 'reserve_account', side_effect=lambda *args: args[1]['email_address']), \
+            mock.patch.object(batch, 'format_report'):
+        results = batch.execute_batch_reserve(accounts_path)
+
+    assert results == ['a@test.com', 'b@test.com']
+    assert initialize_mealpal.call_args_list == [mock.call('a@test.com'), mock.call('b@test.com')]
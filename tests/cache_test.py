@@ -0,0 +1,171 @@
+import os
+import time
+from unittest import mock
+
+import pytest
+
+from mealpy import cache
+
+
+@pytest.fixture
+def cities():
+    yield [
+        {
+            'objectId': 'mock_objectId1',
+            'name': 'San Francisco',
+            'neighborhoods': [{'id': 'mock_fidi_id', 'name': 'Financial District'}],
+        },
+        {
+            'objectId': 'mock_objectId2',
+            'name': 'Seattle',
+        },
+    ]
+
+
+def test_dump_and_load_json(tmp_path):
+    path = tmp_path / 'nested' / 'data.json'
+    cache.dump_json(path, {'key': 'value'})
+
+    assert cache.load_json(path) == {'key': 'value'}
+    assert [i.name for i in path.parent.iterdir()] == ['data.json'], 'No temporary files should be left behind.'
+
+
+def test_load_json_expired(tmp_path):
+    path = tmp_path / 'data.json'
+    cache.dump_json(path, {})
+    stale = time.time() - 100
+    os.utime(str(path), (stale, stale))
+
+    assert cache.load_json(path, max_age=10) is None
+
+
+def test_load_json_missing_or_corrupt(tmp_path):
+    path = tmp_path / 'data.json'
+    assert cache.load_json(path) is None
+
+    path.write_text('{not json')
+    assert cache.load_json(path) is None
+
+
+class TestCityIndex:
+
+    @staticmethod
+    def test_build(cities):
+        index = cache.CityIndex.build(cities)
+
+        assert index == {
+            'San Francisco': {
+                'objectId': 'mock_objectId1',
+                'neighborhoods': [{'id': 'mock_fidi_id', 'name': 'Financial District'}],
+            },
+            'Seattle': {
+                'objectId': 'mock_objectId2',
+                'neighborhoods': [],
+            },
+        }
+
+    @staticmethod
+    def test_get_persists_across_instances(tmp_path, cities):
+        fetch_cities = mock.Mock(return_value=cities)
+        path = tmp_path / cache.CITIES_FILENAME
+
+        cache.CityIndex(path).get(fetch_cities)
+        index = cache.CityIndex(path).get(fetch_cities)
+
+        assert fetch_cities.call_count == 1
+        assert index['Seattle']['objectId'] == 'mock_objectId2'
+
+    @staticmethod
+    def test_get_refresh(tmp_path, cities):
+        fetch_cities = mock.Mock(return_value=cities)
+        city_index = cache.CityIndex(tmp_path / cache.CITIES_FILENAME)
+
+        city_index.get(fetch_cities)
+        city_index.get(fetch_cities, refresh=True)
+
+        assert fetch_cities.call_count == 2
+
+    @staticmethod
+    def test_get_expired(tmp_path, cities):
+        fetch_cities = mock.Mock(return_value=cities)
+        city_index = cache.CityIndex(tmp_path / cache.CITIES_FILENAME, ttl=-1)
+
+        city_index.get(fetch_cities)
+        city_index.get(fetch_cities)
+
+        assert fetch_cities.call_count == 2
+
+
+class TestMenuCache:
+
+    @staticmethod
+    def snapshot(city_id, date, generated_at='2019-04-01T00:00:00Z'):
+        return cache.MenuSnapshot(
+            city_id,
+            {'generated_at': generated_at, 'schedules': [{'id': 'GUID', 'date': date}]},
+            etag='"etag"',
+        )
+
+    def test_get_from_disk(self, tmp_path):
+        cache.MenuCache(tmp_path).put(self.snapshot('city', '20190401'))
+
+        snapshot = cache.MenuCache(tmp_path).get('city')
+
+        assert snapshot.schedules == [{'id': 'GUID', 'date': '20190401'}]
+        assert snapshot.conditional_headers() == {'If-None-Match': '"etag"'}
+        assert snapshot.age < 10
+
+    @staticmethod
+    def test_get_missing(tmp_path):
+        assert cache.MenuCache(tmp_path).get('city') is None
+
+    def test_put_evicts_other_dates(self, tmp_path):
+        menu_cache = cache.MenuCache(tmp_path)
+        menu_cache.put(self.snapshot('city', '20190401'))
+        menu_cache.put(self.snapshot('city', '20190402'))
+        menu_cache.put(self.snapshot('other_city', '20190401'))
+
+        assert sorted(i.name for i in tmp_path.iterdir()) == ['city-20190402.json', 'other_city-20190401.json']
+
+    def test_put_evicts_least_recently_used(self, tmp_path):
+        menu_cache = cache.MenuCache(tmp_path, max_snapshots=1)
+        menu_cache.put(self.snapshot('city', '20190401'))
+        menu_cache.put(self.snapshot('other_city', '20190401'))
+
+        assert [i.name for i in tmp_path.iterdir()] == ['other_city-20190401.json']
+        assert cache.MenuCache(tmp_path).get('city') is None
+
+    def test_touch(self, tmp_path):
+        menu_cache = cache.MenuCache(tmp_path)
+        snapshot = self.snapshot('city', '20190401')
+        snapshot.fetched_at = 0
+        menu_cache.put(snapshot)
+
+        menu_cache.touch(snapshot)
+
+        assert cache.MenuCache(tmp_path).get('city').age < 10
+
+    def test_touch_new_validators(self, tmp_path):
+        menu_cache = cache.MenuCache(tmp_path)
+        snapshot = self.snapshot('city', '20190401')
+        menu_cache.put(snapshot)
+
+        menu_cache.touch(snapshot, etag='"v2"')
+
+        assert cache.MenuCache(tmp_path).get('city').etag == '"v2"'
+
+    @staticmethod
+    def test_date_without_schedules():
+        snapshot = cache.MenuSnapshot('city', {'generated_at': '2019-04-01T00:00:00Z', 'schedules': []})
+
+        assert snapshot.date == '20190401'
+
+    @staticmethod
+    def test_fingerprints():
+        schedule = {'id': 'GUID', 'meal': {'id': 'meal', 'name': 'Spam'}, 'priority': 1}
+        snapshot = cache.MenuSnapshot('city', {'schedules': [schedule, dict(schedule, priority=2)]})
+        reordered = cache.MenuSnapshot('city', {'schedules': [dict(reversed(list(schedule.items())))]})
+
+        assert list(snapshot.fingerprints) == ['GUID'], 'The first schedule with an id wins.'
+        assert snapshot.fingerprints == reordered.fingerprints, 'Key order does not matter.'
+        assert cache.fingerprint_schedule(schedule) != cache.fingerprint_schedule(dict(schedule, priority=2))
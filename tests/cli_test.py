@@ -0,0 +1,72 @@
+import subprocess
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+from mealpy import cache
+from mealpy import cli
+
+
+pytestmark = pytest.mark.usefixtures('mock_cache_dir')
+
+
+def test_import_is_lightweight():
+    """The CLI entry point must not pull in the HTTP, YAML or asyncio stacks before a command needs them."""
+    modules = subprocess.check_output(
+        [sys.executable, '-c', 'import sys, mealpy.cli; print(" ".join(sys.modules))'],
+        universal_newlines=True,
+    ).split()
+
+    assert not {'requests', 'strictyaml', 'asyncio', 'http.cookiejar'} & set(modules)
+
+
+def test_help():
+    result = CliRunner().invoke(cli.cli, ['--help'])
+
+    assert result.exit_code == 0
+    assert 'reserve' in result.output
+
+
+def test_list_cities_from_cache(mock_cache_dir):
+    cache.dump_json(mock_cache_dir / cache.CITIES_FILENAME, {'San Francisco': {}, 'Seattle': {}})
+
+    result = CliRunner().invoke(cli.cli, ['list', 'cities'])
+
+    assert result.exit_code == 0
+    assert result.output.split('\n') == ['San Francisco', 'Seattle', '']
+
+
+def test_profile(mock_cache_dir):
+    cache.dump_json(mock_cache_dir / cache.CITIES_FILENAME, {'San Francisco': {}})
+
+    result = CliRunner().invoke(cli.cli, ['--profile', 'list', 'cities'])
+
+    assert result.exit_code == 0
+    assert sorted(i.suffix for i in (mock_cache_dir / 'profiles').iterdir()) == ['.folded', '.prof', '.txt']
+
+
+def test_profile_reserve_window_only(mock_cache_dir):
+    cache.dump_json(mock_cache_dir / cache.CITIES_FILENAME, {'San Francisco': {}})
+
+    result = CliRunner().invoke(cli.cli, ['--profile', '--profile-window', 'reserve', 'list', 'cities'])
+
+    assert result.exit_code == 0
+    assert 'Nothing was profiled.' in result.output
+
+
+def test_reserve_invalid_time():
+    result = CliRunner().invoke(cli.cli, ['reserve', '--at', '5pm', 'Spam', '12:15pm-12:30pm', 'San Francisco'])
+
+    assert result.exit_code == 2
+    assert 'Invalid value for --at: Use HH:MM:SS.' in result.output
+
+
+def test_batch_invalid_time(tmp_path):
+    accounts_path = tmp_path / 'accounts.yaml'
+    accounts_path.write_text('')
+
+    result = CliRunner().invoke(cli.cli, ['batch', '--at', '5pm', str(accounts_path)])
+
+    assert result.exit_code == 2
+    assert 'Invalid value for --at: Use HH:MM:SS.' in result.output
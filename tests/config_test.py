@@ -2,6 +2,7 @@ from textwrap import dedent
 from unittest import mock
 
 import pytest
+import strictyaml
 
 from mealpy import config
 
@@ -46,8 +47,43 @@ def test_get_config_override(mock_config_template, mock_config, mock_fs):
     assert _config['email_address'] == 'test@test.com'
 
 
+def test_load_accounts_from_file(mock_fs):
+    accounts_path = config.CONFIG_DIR / 'accounts.yaml'
+    mock_fs.create_file(
+        accounts_path,
+        contents=dedent('''\
+            - email_address: a@test.com
+              city: San Francisco
+              reservation_time: 12:15pm-12:30pm
+              meal: Spam and Eggs
+        '''),
+    )
+
+    assert config.load_accounts_from_file(accounts_path) == [{
+        'email_address': 'a@test.com',
+        'city': 'San Francisco',
+        'reservation_time': '12:15pm-12:30pm',
+        'meal': 'Spam and Eggs',
+    }]
+
+
+def test_load_accounts_from_file_missing_choice(mock_fs):
+    accounts_path = config.CONFIG_DIR / 'accounts.yaml'
+    mock_fs.create_file(
+        accounts_path,
+        contents=dedent('''\
+            - email_address: a@test.com
+              city: San Francisco
+              reservation_time: 12:15pm-12:30pm
+        '''),
+    )
+
+    with pytest.raises(ValueError):
+        config.load_accounts_from_file(accounts_path)
+
+
 @pytest.mark.xfail(
-    raises=config.strictyaml.YAMLValidationError,
+    raises=strictyaml.YAMLValidationError,
     reason='User config values are not optionally merged with default, #23',
 )
 def test_get_config_missing_values(mock_config_template, mock_config, mock_fs):  # pragma: no cover
@@ -61,3 +97,90 @@ def test_get_config_missing_values(mock_config_template, mock_config, mock_fs):
 
     assert _config['email_address'] == 'test@test.com', 'email_address should come from user config override.'
     assert not _config['use_keyring'], 'use_keyring should be default value from template.'
+
+
+def test_get_config_compiled(mock_config_template, mock_config, mock_fs):
+    """Test that a second process reuses the validated config instead of parsing YAML again."""
+    config.get_config()
+    config.get_config.cache_clear()
+
+    with mock.patch.object(config, 'load_config_from_file') as load_config_from_file:
+        _config = config.get_config()
+
+    assert not load_config_from_file.called
+    assert _config['email_address'] == 'test@test.com'
+
+
+def test_get_config_compiled_stale(mock_config_template, mock_config, mock_fs):
+    """Test that editing the user config invalidates the compiled copy."""
+    config.get_config()
+    config.get_config.cache_clear()
+
+    mock_config.write_text(dedent('''\
+        ---
+        email_address: 'other@test.com'
+        use_keyring: False
+    '''))
+    _config = config.get_config()
+
+    assert _config['email_address'] == 'other@test.com'
+
+
+def test_load_accounts_from_file_compiled(mock_fs):
+    accounts_path = config.CONFIG_DIR / 'accounts.yaml'
+    mock_fs.create_file(
+        accounts_path,
+        contents=dedent('''\
+            - email_address: a@test.com
+              city: San Francisco
+              reservation_time: 12:15pm-12:30pm
+              restaurant: Spam
+        '''),
+    )
+    accounts = config.load_accounts_from_file(accounts_path)
+
+    with mock.patch.object(config, 'parse_accounts_file') as parse_accounts_file:
+        assert config.load_accounts_from_file(accounts_path) == accounts
+
+    assert not parse_accounts_file.called
+
+
+def test_load_jobs_from_file_duplicate_names(mock_fs):
+    jobs_path = config.CONFIG_DIR / config.JOBS_FILENAME
+    mock_fs.create_file(
+        jobs_path,
+        contents=dedent('''\
+            - name: lunch
+              city: San Francisco
+              reservation_time: 12:15pm-12:30pm
+              restaurant: Spam
+            - name: lunch
+              city: San Francisco
+              reservation_time: 12:15pm-12:30pm
+              meal: Eggs
+        '''),
+    )
+
+    with pytest.raises(ValueError):
+        config.load_jobs_from_file(jobs_path)
+
+
+def test_load_jobs_from_file_invalid_time(mock_fs):
+    jobs_path = config.CONFIG_DIR / config.JOBS_FILENAME
+    mock_fs.create_file(
+        jobs_path,
+        contents=dedent('''\
+            - name: lunch
+              city: San Francisco
+              reservation_time: 12:15pm-12:30pm
+              restaurant: Spam
+              at: 5pm
+        '''),
+    )
+
+    with pytest.raises(ValueError):
+        config.load_jobs_from_file(jobs_path)
+
+
+def test_load_jobs_from_file_missing(mock_fs):
+    assert config.load_jobs_from_file(config.CONFIG_DIR / config.JOBS_FILENAME) == []
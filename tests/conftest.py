@@ -2,7 +2,9 @@ import pytest
 import xdg
 from pyfakefs.fake_filesystem_unittest import Patcher
 
+from mealpy import cache
 from mealpy import config
+from mealpy import sessions
 
 
 @pytest.fixture()
@@ -18,3 +20,18 @@ def mock_fs():
 
     with Patcher(modules_to_reload=modules_to_reload) as patcher:
         yield patcher.fs
+
+
+@pytest.fixture()
+def mock_cache_dir(tmp_path, monkeypatch):
+    """Keep caches and sessions out of the real XDG_CACHE_HOME.
+
+    The cached singletons are cleared on both sides, so none of them stays bound to another directory.
+    """
+    singletons = (sessions.get_session_store, cache.get_city_index, cache.get_menu_cache)
+    for singleton in singletons:
+        singleton.cache_clear()
+    monkeypatch.setattr(config, 'CACHE_DIR', tmp_path / 'cache')
+    yield tmp_path / 'cache'
+    for singleton in singletons:
+        singleton.cache_clear()
@@ -0,0 +1,173 @@
+import datetime
+from unittest import mock
+
+import pytest
+import requests
+
+from mealpy import config
+from mealpy import daemon
+
+
+pytestmark = pytest.mark.usefixtures('mock_cache_dir')
+
+
+@pytest.fixture
+def jobs_path(tmp_path):
+    yield tmp_path / 'jobs.yaml'
+
+
+@pytest.fixture
+def job():
+    yield {
+        'name': 'lunch',
+        'city': 'San Francisco',
+        'reservation_time': '12:15pm-12:30pm',
+        'restaurant': 'Spam',
+        'at': '17:00:00',
+    }
+
+
+@pytest.fixture
+def mock_mealpy(monkeypatch):
+    initialize_mealpal = mock.Mock()
+    fire_reservations = mock.Mock()
+    monkeypatch.setattr(daemon, 'initialize_mealpal', initialize_mealpal)
+    monkeypatch.setattr(daemon, 'fire_reservations', fire_reservations)
+    yield initialize_mealpal, fire_reservations
+
+
+def timestamp(*args):
+    return datetime.datetime(*args).timestamp()
+
+
+@pytest.mark.parametrize('after,weekdays,expected', (
+    (timestamp(2019, 4, 1, 12), None, timestamp(2019, 4, 1, 17)),  # Monday, before the opening
+    (timestamp(2019, 4, 1, 17), None, timestamp(2019, 4, 2, 17)),  # Monday, at the opening
+    (timestamp(2019, 4, 5, 18), None, timestamp(2019, 4, 8, 17)),  # Friday evening
+    (timestamp(2019, 4, 1, 12), ['sat'], timestamp(2019, 4, 6, 17)),
+))
+def test_get_next_fire_at(job, after, weekdays, expected):
+    job['weekdays'] = weekdays
+
+    assert daemon.get_next_fire_at(job, after) == expected
+
+
+def test_add_and_remove_job(jobs_path, job):
+    assert not daemon.add_job(jobs_path, job)
+    assert daemon.add_job(jobs_path, dict(job, meal='Eggs', fallbacks=['meal:Ham'])), 'Same name replaces the job.'
+    assert daemon.add_job(jobs_path, dict(job, name='dinner', weekdays=['sat'])) is False
+
+    assert [i['name'] for i in config.load_jobs_from_file(jobs_path)] == ['lunch', 'dinner']
+    assert config.load_jobs_from_file(jobs_path)[0]['fallbacks'] == ['meal:Ham']
+
+    assert daemon.remove_job(jobs_path, 'lunch')
+    assert daemon.remove_job(jobs_path, 'dinner')
+    assert not daemon.remove_job(jobs_path, 'dinner')
+    assert config.load_jobs_from_file(jobs_path) == []
+
+
+def test_tick_fires_due_job(jobs_path, job, mock_mealpy):
+    initialize_mealpal, fire_reservations = mock_mealpy
+    config.save_jobs_to_file(jobs_path, [job])
+    fire_at = timestamp(2019, 4, 1, 17)
+    resident = daemon.Daemon(jobs_path, prepare_lead=60)
+
+    resident.tick(fire_at - 120)
+    assert not resident.running, 'Too early to prepare.'
+    assert initialize_mealpal.call_count == 1, 'Accounts are logged in as soon as a job is loaded.'
+
+    resident.tick(fire_at - 30)
+    resident.running['lunch'].join()
+
+    _, kwargs = fire_reservations.call_args
+    assert fire_reservations.call_args[0][1:] == ('San Francisco', [daemon.Choice('Spam', None, '12:15pm-12:30pm')])
+    assert kwargs['fire_at'] == fire_at
+    assert resident.next_fire_at['lunch'] == timestamp(2019, 4, 2, 17)
+    assert initialize_mealpal.call_count == 1, 'The warm session is reused.'
+
+
+def test_reload_on_change(jobs_path, job, mock_mealpy):
+    config.save_jobs_to_file(jobs_path, [job])
+    resident = daemon.Daemon(jobs_path)
+    now = timestamp(2019, 4, 1, 12)
+
+    assert resident.reload(now)
+    assert not resident.reload(now), 'An unchanged file is not parsed again.'
+
+    config.save_jobs_to_file(jobs_path, [dict(job, at='17:30:00')])
+    assert resident.reload(now)
+    assert resident.next_fire_at['lunch'] == timestamp(2019, 4, 1, 17, 30)
+
+    jobs_path.write_text('- name: broken\n')
+    assert not resident.reload(now)
+    assert list(resident.jobs) == ['lunch'], 'An invalid file keeps the current jobs.'
+
+    config.save_jobs_to_file(jobs_path, [dict(job, at='5pm')])
+    assert not resident.reload(now)
+    assert resident.next_fire_at['lunch'] == timestamp(2019, 4, 1, 17, 30)
+
+    jobs_path.unlink()
+    assert resident.reload(now)
+    assert not resident.jobs
+    assert not resident.next_fire_at
+
+
+def test_ping(jobs_path, job, mock_mealpy):
+    initialize_mealpal, _ = mock_mealpy
+    config.save_jobs_to_file(jobs_path, [job])
+    resident = daemon.Daemon(jobs_path, ping_interval=60)
+    now = timestamp(2019, 4, 1, 12)
+    resident.reload(now)
+    resident.last_pinged[None] = now
+
+    resident.ping(now + 30)
+    assert not initialize_mealpal.return_value.get_current_meal.called
+
+    resident.ping(now + 60)
+    assert initialize_mealpal.return_value.get_current_meal.call_count == 1
+
+
+def test_ping_rejected_session(jobs_path, job, mock_mealpy):
+    initialize_mealpal, fire_reservations = mock_mealpy
+    config.save_jobs_to_file(jobs_path, [job])
+    resident = daemon.Daemon(jobs_path, ping_interval=60, prepare_lead=60)
+    now = timestamp(2019, 4, 1, 12)
+    resident.reload(now)
+    resident.last_pinged[None] = now
+
+    initialize_mealpal.return_value.get_current_meal.side_effect = requests.HTTPError()
+    resident.ping(now + 60)
+    assert resident.logged_out == {None}
+    assert initialize_mealpal.call_count == 1, 'The daemon never prompts for a password.'
+
+    initialize_mealpal.side_effect = daemon.sessions.LoginRequiredError()
+    resident.tick(timestamp(2019, 4, 1, 17) - 30)
+    assert not resident.running and not fire_reservations.called, 'Jobs are skipped while logged out.'
+    assert resident.next_fire_at['lunch'] == timestamp(2019, 4, 2, 17)
+
+    initialize_mealpal.side_effect = None
+    initialize_mealpal.return_value.get_current_meal.side_effect = None
+    resident.ping(timestamp(2019, 4, 1, 17) + 60)
+    assert initialize_mealpal.call_args == mock.call(None, interactive=False)
+    assert not resident.logged_out, 'A session saved since is picked up.'
+
+
+def test_ping_expiring_session(jobs_path, job, mock_mealpy):
+    initialize_mealpal, _ = mock_mealpy
+    config.save_jobs_to_file(jobs_path, [job])
+    resident = daemon.Daemon(jobs_path, ping_interval=60)
+    now = timestamp(2019, 4, 1, 12)
+    resident.reload(now)
+    resident.last_pinged[None] = now
+    expires = daemon.time.time() + daemon.SESSION_REFRESH_MARGIN / 2
+    daemon.sessions.get_session_store().save(daemon.sessions.SessionRecord(
+        daemon.sessions.DEFAULT_ACCOUNT,
+        [{'name': 'session', 'value': 'v', 'domain': '', 'path': '/', 'secure': True, 'expires': expires}],
+    ))
+
+    initialize_mealpal.side_effect = daemon.sessions.LoginRequiredError()
+    resident.ping(now + 60)
+
+    assert initialize_mealpal.call_args == mock.call(None, interactive=False)
+    assert not initialize_mealpal.return_value.get_current_meal.called
+    assert not resident.logged_out, 'The expiring session is kept until a new one is saved.'
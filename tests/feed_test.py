@@ -0,0 +1,109 @@
+import threading
+from unittest import mock
+
+import pytest
+import requests
+
+from mealpy import cache
+from mealpy import feed
+
+
+def make_schedule(schedule_id, restaurant_id='restaurant', **kwargs):
+    return dict({
+        'id': schedule_id,
+        'date': '20190401',
+        'meal': {'id': f'meal_{schedule_id}', 'name': f'Meal {schedule_id}'},
+        'restaurant': {'id': restaurant_id, 'name': f'Restaurant {restaurant_id}'},
+        'priority': 1,
+        'is_featured': False,
+    }, **kwargs)
+
+
+def make_snapshot(*schedules):
+    return cache.MenuSnapshot('city', {'schedules': list(schedules)})
+
+
+def test_diff_snapshots():
+    old = make_snapshot(
+        make_schedule('kept'),
+        make_schedule('removed'),
+        make_schedule('featured'),
+        make_schedule('described'),
+    )
+    new = make_snapshot(
+        make_schedule('kept'),
+        make_schedule('featured', priority=3, is_featured=True),
+        make_schedule('described', meal={'id': 'meal_described', 'name': 'Meal described', 'description': 'New'}),
+        make_schedule('added'),
+        make_schedule('new_restaurant', restaurant_id='other'),
+        make_schedule('new_restaurant_again', restaurant_id='other'),
+    )
+
+    diff = feed.diff_snapshots(old, new)
+
+    assert [i['id'] for i in diff.added] == ['added', 'new_restaurant', 'new_restaurant_again']
+    assert [i['id'] for i in diff.removed] == ['removed']
+    assert diff.restaurants == [{'id': 'other', 'name': 'Restaurant other'}]
+    assert [(i.schedule['id'], dict(i.changes)) for i in diff.updated] == [
+        ('featured', {'priority': (1, 3), 'is_featured': (False, True)}),
+    ], 'Changes outside WATCHED_FIELDS are not reported.'
+
+
+def test_diff_snapshots_unchanged():
+    snapshot = make_snapshot(make_schedule('kept'))
+
+    assert not feed.diff_snapshots(snapshot, snapshot)
+    assert not feed.diff_snapshots(snapshot, make_snapshot(make_schedule('kept')))
+
+
+def test_format_diff():
+    diff = feed.diff_snapshots(
+        make_snapshot(make_schedule('removed'), make_schedule('featured')),
+        make_snapshot(make_schedule('featured', is_featured=True), make_schedule('added', restaurant_id='other')),
+    )
+
+    assert feed.format_diff(diff) == [
+        '+ Meal added at Restaurant other (added)',
+        '- Meal removed at Restaurant restaurant (removed)',
+        '* New restaurant Restaurant other',
+        '~ Meal featured at Restaurant restaurant (featured): is_featured False -> True',
+    ]
+
+
+@pytest.fixture
+def mealpal():
+    mealpal = mock.Mock()
+    baseline = make_snapshot(make_schedule('kept'))
+    mealpal.get_menu.side_effect = [
+        baseline,
+        baseline,
+        make_snapshot(make_schedule('kept'), make_schedule('added')),
+    ]
+    yield mealpal
+
+
+def test_menu_watcher_poll(mealpal):
+    changes = []
+    watcher = feed.MenuWatcher(mealpal, 'San Francisco')
+    watcher.on_change(changes.append)
+
+    assert watcher.poll() is None, 'The first poll sets the baseline.'
+    assert not watcher.poll()
+    diff = watcher.poll()
+
+    assert [i['id'] for i in diff.added] == ['added']
+    assert changes == [diff]
+    mealpal.get_menu.assert_called_with('San Francisco', max_age=0)
+
+
+def test_menu_watcher_run(mealpal):
+    mealpal.get_menu.side_effect = [requests.ConnectionError(), *mealpal.get_menu.side_effect]
+    watcher = feed.MenuWatcher(mealpal, 'San Francisco', interval=0.001)
+    watcher.on_change(lambda diff: watcher.stop())
+
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert mealpal.get_menu.call_count == 4
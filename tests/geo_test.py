@@ -0,0 +1,133 @@
+import random
+
+import pytest
+
+from mealpy import cache
+from mealpy import models
+
+np = pytest.importorskip('numpy')
+geo = pytest.importorskip('mealpy.geo')
+
+# Around the Financial District, San Francisco
+OFFICE = (37.7946, -122.3999)
+
+
+def make_schedule(schedule_id, latitude, longitude, restaurant_id=None):
+    return {
+        'id': schedule_id,
+        'meal': {'id': f'meal_{schedule_id}', 'name': f'Meal {schedule_id}'},
+        'restaurant': {
+            'id': restaurant_id or f'restaurant_{schedule_id}',
+            'name': f'Restaurant {schedule_id}',
+            'latitude': latitude,
+            'longitude': longitude,
+        },
+    }
+
+
+@pytest.fixture
+def schedules():
+    yield [
+        make_schedule('far', '37.7599', '-122.4148'),  # Mission, ~4.1km
+        make_schedule('near', '37.7952', '-122.4028'),  # ~260m
+        make_schedule('same_restaurant', '37.7952', '-122.4028', restaurant_id='restaurant_near'),
+        make_schedule('nearer', 37.7946, -122.4010),  # ~100m
+        make_schedule('unknown', None, None),
+        make_schedule('invalid', 'nan', 'spam'),
+    ]
+
+
+@pytest.mark.parametrize('text,expected', (
+    ('500m', 500),
+    ('500', 500),
+    ('1.5km', 1500),
+    ('.5 KM', 500),
+    ('0.5mi', 804.672),
+))
+def test_parse_distance(text, expected):
+    assert geo.parse_distance(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('text', ('', 'far', '-5m', '5 parsecs'))
+def test_parse_distance_invalid(text):
+    with pytest.raises(ValueError):
+        geo.parse_distance(text)
+
+
+def test_haversine():
+    # San Francisco to Los Angeles
+    assert geo.haversine(37.7749, -122.4194, 34.0522, -118.2437) == pytest.approx(559_000, rel=0.01)
+    assert geo.haversine(*OFFICE, np.array([OFFICE[0], 0]), np.array([OFFICE[1], 0])).shape == (2,)
+
+
+def test_nearby(schedules):
+    index = geo.GeoIndex(schedules)
+
+    assert len(index) == 3, 'One per restaurant, with coordinates.'
+    assert [(i['id'], round(distance, -1)) for i, distance in index.nearby(*OFFICE)] == [
+        ('nearer', 100),
+        ('near', 260),
+        ('far', 4070),
+    ]
+    assert [i['id'] for i, _ in index.nearby(*OFFICE, radius=500)] == ['nearer', 'near']
+    assert [i['id'] for i, _ in index.nearby(*OFFICE, limit=1)] == ['nearer']
+    assert index.nearby(0, 0, radius=1000) == []
+
+
+def test_nearby_without_restaurant_ids():
+    schedules = [make_schedule('near', 37.7952, -122.4028), make_schedule('nearer', 37.7946, -122.4010)]
+    for schedule in schedules:
+        del schedule['restaurant']['id']
+
+    assert len(geo.GeoIndex(schedules)) == 2, 'Restaurants without an id cannot be told apart.'
+
+
+def test_nearby_models(schedules):
+    index = geo.GeoIndex(models.load_schedules(schedules))
+
+    assert [i.id for i, _ in index.nearby(*OFFICE, radius=500)] == ['nearer', 'near']
+
+
+def test_nearby_empty():
+    index = geo.GeoIndex([])
+
+    assert index.nearby(*OFFICE) == []
+    assert index.nearby(*OFFICE, radius=500) == []
+    assert index.nearby_many([OFFICE, OFFICE]) == [[], []]
+
+
+def test_nearby_matches_brute_force():
+    generator = random.Random(0)
+    schedules = [
+        make_schedule(str(i), OFFICE[0] + generator.uniform(-0.05, 0.05), OFFICE[1] + generator.uniform(-0.05, 0.05))
+        for i in range(500)
+    ]
+    index = geo.GeoIndex(schedules, cell_size=300)
+
+    for _ in range(20):
+        point = (OFFICE[0] + generator.uniform(-0.05, 0.05), OFFICE[1] + generator.uniform(-0.05, 0.05))
+        radius = generator.uniform(100, 3000)
+        expected = sorted(
+            (distance, schedule['id'])
+            for schedule, distance in zip(index.schedules, geo.haversine(*point, index.latitudes, index.longitudes))
+            if distance <= radius
+        )
+
+        assert [(distance, i['id']) for i, distance in index.nearby(*point, radius=radius)] == expected
+
+
+def test_nearby_many(schedules):
+    index = geo.GeoIndex(schedules)
+    mission = (37.7599, -122.4148)
+
+    results = index.nearby_many([OFFICE, mission], radius=1000)
+
+    assert [[i['id'] for i, _ in result] for result in results] == [['nearer', 'near'], ['far']]
+    assert results[0] == index.nearby(*OFFICE, radius=1000)
+
+
+def test_snapshot_geo_index(schedules):
+    snapshot = cache.MenuSnapshot('city', {'schedules': schedules})
+
+    assert snapshot.geo_index is snapshot.geo_index
+    assert len(snapshot.geo_index) == 3
@@ -0,0 +1,43 @@
+import pytest
+
+from mealpy import index
+
+
+@pytest.fixture
+def schedule_index():
+    yield index.ScheduleIndex([
+        {
+            'id': 'id1',
+            'meal': {'name': 'Spam and Eggs'},
+            'restaurant': {'name': 'Coast Poke Counter - Battery St.'},
+        },
+        {
+            'id': 'id2',
+            'meal': {'name': 'Spam and Eggs'},
+            'restaurant': {'name': 'Second Restaurant'},
+        },
+    ])
+
+
+def test_len(schedule_index):
+    assert len(schedule_index) == 2
+
+
+def test_get_by_id(schedule_index):
+    assert schedule_index.get_by_id('id2')['restaurant']['name'] == 'Second Restaurant'
+
+
+def test_get_by_restaurant_name_normalized(schedule_index):
+    schedule = schedule_index.get_by_restaurant_name('  coast poke  counter - BATTERY st.')
+
+    assert schedule['id'] == 'id1'
+
+
+def test_get_by_meal_name_first_match_wins(schedule_index):
+    assert schedule_index.get_by_meal_name('Spam and Eggs')['id'] == 'id1'
+
+
+@pytest.mark.parametrize('lookup', ('get_by_id', 'get_by_restaurant_name', 'get_by_meal_name'))
+def test_not_found(schedule_index, lookup):
+    with pytest.raises(index.ScheduleNotFoundError):
+        getattr(schedule_index, lookup)('NotFound')
@@ -0,0 +1,124 @@
+import time
+from unittest import mock
+
+import pytest
+import requests
+
+from mealpy import kitchen
+
+
+CLOSED = {'result': {'status': 'CLOSED'}}
+OPEN = {'result': {'status': 'OPEN'}}
+
+
+@pytest.fixture
+def mealpal():
+    mealpal = mock.Mock()
+    mealpal.get_current_meal.return_value = CLOSED
+    mealpal.get_menu.return_value.generated_at = '2019-04-01T00:00:00Z'
+    yield mealpal
+
+
+@pytest.mark.parametrize('response,expected', (
+    (OPEN, True),
+    ({'result': {'status': 'open'}}, True),
+    (CLOSED, False),
+    ({'result': 'OPEN'}, True),
+    ({'result': {}}, False),
+    ({}, False),
+    (None, False),
+))
+def test_is_kitchen_open(response, expected):
+    assert kitchen.is_kitchen_open(response) is expected
+
+
+@pytest.mark.parametrize('remaining,expected', (
+    (3600, 60),
+    (40, 10),
+    (0.2, 0.05),
+    (0.01, 0.01),
+    (0, 0.01),
+    (-5, 0.01),
+))
+def test_get_poll_interval(remaining, expected):
+    assert kitchen.get_poll_interval(remaining, min_interval=0.01, max_interval=60) == pytest.approx(expected)
+
+
+def test_poll_kitchen(mealpal):
+    watcher = kitchen.KitchenWatcher(mealpal, time.time())
+
+    assert watcher.poll() is None
+    mealpal.get_current_meal.return_value = OPEN
+    assert watcher.poll() == 'kitchen'
+    assert watcher.polls == 2
+    mealpal.get_menu.assert_not_called()
+
+
+def test_poll_menu(mealpal, monkeypatch):
+    monkeypatch.setattr(kitchen, 'MENU_POLL_INTERVAL', 0)
+    watcher = kitchen.KitchenWatcher(mealpal, time.time(), city_name='San Francisco')
+
+    assert watcher.poll() is None, 'The first menu seen is the baseline.'
+    assert watcher.poll() is None
+    mealpal.get_menu.return_value.generated_at = '2019-04-02T00:00:00Z'
+    assert watcher.poll() == 'menu'
+    mealpal.get_menu.assert_called_with('San Francisco', max_age=0)
+
+
+def test_poll_menu_rate_limited(mealpal):
+    watcher = kitchen.KitchenWatcher(mealpal, time.time(), city_name='San Francisco')
+
+    for _ in range(3):
+        watcher.poll()
+
+    assert mealpal.get_current_meal.call_count == 3
+    assert mealpal.get_menu.call_count == 1
+
+
+def test_poll_error(mealpal):
+    mealpal.get_current_meal.side_effect = requests.ConnectionError()
+    watcher = kitchen.KitchenWatcher(mealpal, time.time())
+
+    assert watcher.poll() is None
+
+
+def test_watcher(mealpal):
+    mealpal.get_current_meal.side_effect = [CLOSED, CLOSED, requests.ConnectionError(), OPEN]
+    opened = []
+    watcher = kitchen.KitchenWatcher(mealpal, time.time(), min_interval=0.001)
+    watcher.on_open(opened.append)
+
+    watcher.start()
+    try:
+        assert watcher.wait(timeout=5)
+    finally:
+        watcher.stop()
+
+    assert watcher.opening.source == 'kitchen'
+    assert watcher.opening.polls == 4
+    assert opened == [watcher.opening]
+
+
+def test_watcher_stop(mealpal):
+    watcher = kitchen.KitchenWatcher(mealpal, time.time() + 3600)
+
+    watcher.start()
+    assert not watcher.wait(timeout=0.01)
+    watcher.stop()
+
+    assert watcher.polls == 1, 'Far from the opening, the next poll is a long way off.'
+    assert watcher.opening is None
+
+
+def test_wait_until_open(mealpal, capsys):
+    mealpal.get_current_meal.side_effect = [CLOSED, OPEN]
+
+    opening = kitchen.wait_until_open(mealpal, time.time())
+
+    assert opening.source == 'kitchen'
+    assert 'Kitchen opened (kitchen)' in capsys.readouterr().out
+
+
+def test_wait_until_open_timeout(mealpal, capsys):
+    assert kitchen.wait_until_open(mealpal, time.time(), timeout=time.time() + 0.05) is None
+    assert 'sending anyway' in capsys.readouterr().out
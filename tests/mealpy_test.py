@@ -1,4 +1,6 @@
+import json
 from collections import namedtuple
+from http.cookiejar import MozillaCookieJar
 from unittest import mock
 
 import pytest
@@ -9,6 +11,8 @@ from mealpy import mealpy
 
 City = namedtuple('City', 'name objectId')
 
+pytestmark = pytest.mark.usefixtures('mock_cache_dir')
+
 
 @pytest.fixture(autouse=True)
 def mock_responses():
@@ -75,7 +79,7 @@ class TestCity:
             json=response,
         )
 
-        cities = mealpy.MealPal.get_cities()
+        cities = mealpy.MealPal().get_cities()
         city = [i for i in cities if i['name'] == 'San Francisco'][0]
 
         assert city.items() >= {
@@ -93,7 +97,29 @@ class TestCity:
         )
 
         with pytest.raises(requests.exceptions.HTTPError):
-            mealpy.MealPal.get_cities()
+            mealpy.MealPal().get_cities()
+
+
+class TestSession:
+
+    @staticmethod
+    def test_create_session_pool():
+        session = mealpy.create_session(pool_size=3, max_retries=1)
+        adapter = session.get_adapter(mealpy.CITIES_URL)
+
+        assert adapter._pool_maxsize == 3  # pylint: disable=protected-access
+        assert adapter.max_retries.total == 1
+        assert session.headers['Origin'] == mealpy.BASE_URL
+
+    @staticmethod
+    def test_endpoints_share_session(mock_responses):
+        mock_responses.add(responses.RequestsMock.POST, mealpy.CITIES_URL, json={'result': []})
+
+        mealpal = mealpy.MealPal()
+        with mock.patch.object(mealpal.session, 'post', wraps=mealpal.session.post) as session_post:
+            mealpal.get_cities()
+
+        assert session_post.called
 
 
 class TestLogin:
@@ -233,7 +259,7 @@ class TestSchedule:
     @staticmethod
     @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
     def test_get_schedule_by_restaurant_name(mock_city):
-        schedule = mealpy.MealPal.get_schedule_by_restaurant_name('RestaurantName', mock_city.name)
+        schedule = mealpy.MealPal().get_schedule_by_restaurant_name('RestaurantName', mock_city.name)
 
         meal = schedule['meal']
         restaurant = schedule['restaurant']
@@ -251,26 +277,32 @@ class TestSchedule:
 
     @staticmethod
     @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
-    @pytest.mark.xfail(
-        raises=StopIteration,
-        reason='#24 Invalid restaurant input not handled',
-    )
     def test_get_schedule_by_restaurant_name_not_found(mock_city):
-        mealpy.MealPal.get_schedule_by_restaurant_name('NotFound', mock_city.name)
+        with pytest.raises(mealpy.ScheduleNotFoundError):
+            mealpy.MealPal().get_schedule_by_restaurant_name('NotFound', mock_city.name)
 
     @staticmethod
     @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
-    @pytest.mark.xfail(
-        raises=StopIteration,
-        reason='#24 Invalid meal name not handled',
-    )
     def test_get_schedule_by_meal_name_not_found(mock_city):
-        mealpy.MealPal.get_schedule_by_meal_name('NotFound', mock_city.name)
+        with pytest.raises(mealpy.ScheduleNotFoundError):
+            mealpy.MealPal().get_schedule_by_meal_name('NotFound', mock_city.name)
+
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
+    def test_get_schedule_not_found_revalidates_cached_menu(mock_responses, mock_city):
+        mealpal = mealpy.MealPal()
+        mealpal.get_schedules(mock_city.name)
+
+        with pytest.raises(mealpy.ScheduleNotFoundError):
+            mealpal.get_schedule_by_meal_name('NotFound', mock_city.name)
+
+        menu_calls = [i for i in mock_responses.calls if i.request.url == mealpy.MENU_URL.format(mock_city.objectId)]
+        assert len(menu_calls) == 2, 'A cached menu should be revalidated once before giving up.'
 
     @staticmethod
     @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
     def test_get_schedule_by_meal_name(mock_city):
-        schedule = mealpy.MealPal.get_schedule_by_meal_name('Spam and Eggs', mock_city.name)
+        schedule = mealpy.MealPal().get_schedule_by_meal_name('Spam and Eggs', mock_city.name)
 
         meal = schedule['meal']
         restaurant = schedule['restaurant']
@@ -286,6 +318,68 @@ class TestSchedule:
             'address': 'RestaurantAddress',
         }.items()
 
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
+    def test_get_schedules_as_models(mock_city):
+        mealpal = mealpy.MealPal()
+        schedules = mealpal.get_schedules(mock_city.name, as_models=True)
+
+        assert schedules[0].restaurant.neighborhood.name == 'Financial District'
+        assert schedules[0]['meal']['name'] == 'Spam and Eggs'
+        assert mealpal.get_schedules(mock_city.name, as_models=True) is schedules, 'Models are built once per menu.'
+
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
+    def test_search(mock_city):
+        mealpal = mealpy.MealPal()
+
+        assert [i['meal']['name'] for i in mealpal.search(mock_city.name, cuisine='asian', text='eggs')] == [
+            'Spam and Eggs',
+        ]
+        assert mealpal.search(mock_city.name, neighborhood='Mission') == []
+
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
+    def test_get_nearby(mock_city):
+        pytest.importorskip('numpy')
+        mealpal = mealpy.MealPal()
+
+        nearby = mealpal.get_nearby(mock_city.name, [(111.111, -111.111), (0, 0)])
+        assert [[(i['id'], round(distance)) for i, distance in result] for result in nearby] == [
+            [('GUID', 0)],
+            [('GUID', 9178731)],
+        ]
+        assert mealpal.get_nearby(mock_city.name, [(111.111, -111.111), (0, 0)], radius=500) == [nearby[0], []]
+
+    @staticmethod
+    def test_get_all_schedules(mock_responses, success_response):
+        mock_responses.add(
+            method=responses.RequestsMock.POST,
+            url=mealpy.CITIES_URL,
+            json={'result': [{'objectId': 'id1', 'name': 'City 1'}, {'objectId': 'id2', 'name': 'City 2'}]},
+        )
+        mock_responses.add(method=responses.RequestsMock.GET, url=mealpy.MENU_URL.format('id1'), json=success_response)
+        mock_responses.add(method=responses.RequestsMock.GET, url=mealpy.MENU_URL.format('id2'), status=500)
+
+        results = {i.city_name: i for i in mealpy.MealPal().get_all_schedules(max_workers=2)}
+
+        assert results['City 1'].schedules == success_response['schedules']
+        assert results['City 1'].error is None
+        assert isinstance(results['City 2'].error, requests.HTTPError)
+
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
+    def test_stream_schedule(mock_city):
+        schedule = mealpy.MealPal().stream_schedule(mock_city.name, restaurant_name='restaurantname')
+
+        assert schedule == {'id': 'GUID', 'meal': {'name': 'Spam and Eggs'}, 'restaurant': {'name': 'RestaurantName'}}
+
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
+    def test_stream_schedule_not_found(mock_city):
+        with pytest.raises(mealpy.ScheduleNotFoundError):
+            mealpy.MealPal().stream_schedule(mock_city.name, meal_name='NotFound')
+
     @staticmethod
     @pytest.mark.usefixtures('mock_get_city')
     def test_get_schedules_fail(mock_responses, mock_city):
@@ -296,7 +390,94 @@ class TestSchedule:
         )
 
         with pytest.raises(requests.HTTPError):
-            mealpy.MealPal.get_schedules(mock_city.name)
+            mealpy.MealPal().get_schedules(mock_city.name)
+
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
+    def test_get_schedules_reuses_menu_snapshot(mock_responses, mock_city):
+        mealpal = mealpy.MealPal()
+        mealpal.get_schedule_by_restaurant_name('RestaurantName', mock_city.name)
+        mealpal.get_schedule_by_meal_name('Spam and Eggs', mock_city.name)
+
+        menu_calls = [i for i in mock_responses.calls if i.request.url == mealpy.MENU_URL.format(mock_city.objectId)]
+        assert len(menu_calls) == 1, 'Menu should be served from the snapshot cache.'
+
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city')
+    def test_get_menu_not_modified(mock_responses, mock_city, success_response):
+        menu_url = mealpy.MENU_URL.format(mock_city.objectId)
+        mock_responses.add(responses.RequestsMock.GET, menu_url, json=success_response, headers={'ETag': '"v1"'})
+        mock_responses.add(responses.RequestsMock.GET, menu_url, status=304)
+
+        mealpal = mealpy.MealPal()
+        snapshot = mealpal.get_menu(mock_city.name)
+        revalidated = mealpal.get_menu(mock_city.name, max_age=0)
+
+        assert revalidated is snapshot
+        assert mock_responses.calls[-1].request.headers['If-None-Match'] == '"v1"'
+
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
+    def test_get_menu_same_generated_at(mock_city):
+        mealpal = mealpy.MealPal()
+        snapshot = mealpal.get_menu(mock_city.name)
+        revalidated = mealpal.get_menu(mock_city.name, max_age=0)
+
+        assert revalidated is snapshot, 'Unchanged generated_at should keep the existing snapshot.'
+
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city')
+    def test_get_menu_same_generated_at_new_validators(mock_responses, mock_city, success_response):
+        menu_url = mealpy.MENU_URL.format(mock_city.objectId)
+        mock_responses.add(responses.RequestsMock.GET, menu_url, json=success_response)
+        mock_responses.add(responses.RequestsMock.GET, menu_url, json=success_response, headers={'ETag': '"v2"'})
+
+        mealpal = mealpy.MealPal()
+        mealpal.get_menu(mock_city.name)
+        mealpal.get_menu(mock_city.name, max_age=0)
+
+        assert mealpy.cache.MenuCache(mealpy.cache.get_menu_cache().path).get(mock_city.objectId).etag == '"v2"'
+
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city')
+    def test_get_menu_without_generated_at(mock_responses, mock_city):
+        menu_url = mealpy.MENU_URL.format(mock_city.objectId)
+        schedules = [{'id': 'new', 'date': '20190401'}]
+        mock_responses.add(responses.RequestsMock.GET, menu_url, json={'schedules': []})
+        mock_responses.add(responses.RequestsMock.GET, menu_url, json={'schedules': schedules})
+
+        mealpal = mealpy.MealPal()
+        snapshot = mealpal.get_menu(mock_city.name)
+        refreshed = mealpal.get_menu(mock_city.name, max_age=0)
+
+        assert refreshed is not snapshot, 'Without generated_at the menu cannot be assumed unchanged.'
+        assert refreshed.schedules == schedules
+
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city', 'menu_url_response')
+    def test_get_schedules_reuses_city_index(mock_responses, mock_city):
+        mealpy.MealPal().get_schedules(mock_city.name)
+        mealpy.MealPal().get_schedules(mock_city.name)
+
+        city_calls = [i for i in mock_responses.calls if i.request.url == mealpy.CITIES_URL]
+        assert len(city_calls) == 1, 'City list should only be fetched once per process.'
+
+    @staticmethod
+    def test_get_city_id_refreshes_index(mock_responses, mock_city):
+        for cities in ([], [{'objectId': mock_city.objectId, 'name': mock_city.name}]):
+            mock_responses.add(responses.RequestsMock.POST, mealpy.CITIES_URL, json={'result': cities})
+
+        assert mealpy.MealPal().get_city_id(mock_city.name) == mock_city.objectId, 'New cities are picked up.'
+
+    @staticmethod
+    @pytest.mark.usefixtures('mock_get_city')
+    def test_get_menu_unknown_city(mock_responses):
+        mock_responses.add(responses.RequestsMock.POST, mealpy.CITIES_URL, json={'result': []})
+
+        with pytest.raises(mealpy.CityNotFoundError):
+            mealpy.MealPal().get_menu('Atlantis')
+
+        assert not [i for i in mock_responses.calls if i.request.url != mealpy.CITIES_URL]
 
 
 class TestCurrentMeal:
@@ -619,3 +800,411 @@ class TestReserve:
             restaurant_name='restaurant_name',
             cancel_current_meal=True,
         )
+
+    @staticmethod
+    def test_prepare_reservation(mock_responses):
+        mock_responses.add(responses.RequestsMock.POST, mealpy.KITCHEN_URL, json={'result': {}})
+        mock_responses.add(responses.RequestsMock.POST, mealpy.RESERVATION_URL, json={'result': {}})
+        mealpal = mealpy.MealPal()
+
+        with mock.patch.object(mealpal, 'find_schedule', return_value={'id': 'GUID'}):
+            reservation = mealpal.prepare_reservation('mock_timing', 'mock_city', restaurant_name='restaurant_name')
+
+        assert [i.request.url for i in mock_responses.calls] == [mealpy.KITCHEN_URL], 'Only the warm up is sent.'
+        assert reservation.request.url == mealpy.RESERVATION_URL
+        assert json.loads(reservation.request.body) == {
+            'quantity': 1,
+            'schedule_id': 'GUID',
+            'pickup_time': 'mock_timing',
+            'source': 'Web',
+        }
+
+        assert reservation.send().status_code == 200
+        assert mock_responses.calls[-1].request.url == mealpy.RESERVATION_URL
+
+    @staticmethod
+    def test_prepare_reservation_invalid_session(mock_responses):
+        mock_responses.add(responses.RequestsMock.POST, mealpy.KITCHEN_URL, status=401)
+        mealpal = mealpy.MealPal()
+
+        with pytest.raises(requests.HTTPError):
+            mealpal.prepare_reservation('mock_timing', 'mock_city', restaurant_name='restaurant_name')
+
+    @staticmethod
+    def test_prepare_reservations_until_published():
+        mealpal = mealpy.MealPal()
+        prepared = [mock.sentinel.prepared]
+        choices = [mealpy.Choice('restaurant_name', None, 'mock_timing')]
+
+        with mock.patch.object(mealpal, 'get_current_meal'), \
+                mock.patch.object(
+                    mealpal,
+                    'prepare_reservations',
+                    side_effect=[mealpy.ScheduleNotFoundError(), prepared],
+                ) as prepare_reservations, \
+                mock.patch.object(mealpy.time, 'sleep') as sleep:
+            reservations = mealpy.prepare_reservations_until(mealpal, mealpy.time.time() + 60, 'mock_city', choices)
+
+        assert reservations is prepared
+        assert prepare_reservations.call_args == mock.call('mock_city', choices, warm_up=False)
+        assert sleep.call_args == mock.call(mealpy.PREPARE_POLL_INTERVAL)
+
+    @staticmethod
+    def test_prepare_reservations_until_too_late():
+        mealpal = mealpy.MealPal()
+        choices = [mealpy.Choice('restaurant_name', None, 'mock_timing')]
+
+        with mock.patch.object(mealpal, 'get_current_meal'), \
+                mock.patch.object(mealpal, 'prepare_reservations', side_effect=mealpy.ScheduleNotFoundError()):
+            reservations = mealpy.prepare_reservations_until(mealpal, mealpy.time.time(), 'mock_city', choices)
+
+        assert reservations == []
+
+    @staticmethod
+    def test_prepare_reservations_single_snapshot():
+        mealpal = mealpy.MealPal()
+        snapshot = mealpy.cache.MenuSnapshot('mock_city_id', {'schedules': [
+            {'id': 'id1', 'meal': {'name': 'Meal 1'}, 'restaurant': {'name': 'Restaurant 1'}},
+            {'id': 'id2', 'meal': {'name': 'Meal 2'}, 'restaurant': {'name': 'Restaurant 2'}},
+        ]})
+        choices = [
+            mealpy.Choice('Sold Out Yesterday', None, 'mock_timing'),
+            mealpy.Choice(None, 'Meal 2', 'other_timing'),
+            mealpy.Choice('Restaurant 1', None, 'mock_timing'),
+        ]
+
+        with mock.patch.object(mealpal, 'get_menu', return_value=snapshot) as get_menu:
+            reservations = mealpal.prepare_reservations('mock_city', choices, warm_up=False)
+
+        assert get_menu.call_count == 1
+        assert [i.schedule['id'] for i in reservations] == ['id2', 'id1']
+        assert [i.choice for i in reservations] == choices[1:]
+        assert json.loads(reservations[0].request.body)['pickup_time'] == 'other_timing'
+
+    @staticmethod
+    def test_prepare_reservations_none_on_menu():
+        mealpal = mealpy.MealPal()
+        snapshot = mealpy.cache.MenuSnapshot('mock_city_id', {'schedules': []})
+
+        with mock.patch.object(mealpal, 'get_menu', return_value=snapshot), \
+                pytest.raises(mealpy.ScheduleNotFoundError):
+            mealpal.prepare_reservations('mock_city', [mealpy.Choice('NotFound', None, 'mock_timing')], warm_up=False)
+
+
+class TestChoices:
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        ('spec', 'expected'),
+        (
+            ('Poke Place', mealpy.Choice('Poke Place', None, 'default')),
+            ('restaurant:Poke: The Place', mealpy.Choice('Poke: The Place', None, 'default')),
+            ('meal:Spam and Eggs@12:30pm-12:45pm', mealpy.Choice(None, 'Spam and Eggs', '12:30pm-12:45pm')),
+            ('Poke Place@12:30pm-12:45pm', mealpy.Choice('Poke Place', None, '12:30pm-12:45pm')),
+        ),
+    )
+    def test_parse_choice(spec, expected):
+        assert mealpy.parse_choice(spec, 'default') == expected
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        ('status_code', 'body', 'expected'),
+        (
+            (200, {}, 'success'),
+            (400, {'error': 'ERROR_RESERVATION_LIMIT'}, 'fatal'),
+            (400, {'error': 'ERROR_SOLD_OUT'}, 'unavailable'),
+            (404, {'error': 'ERROR_SCHEDULE_NOT_FOUND'}, 'unavailable'),
+            (400, {'error': 'ERROR_KITCHEN_CLOSED'}, 'retry'),
+            (429, {}, 'retry'),
+            (503, None, 'retry'),
+        ),
+    )
+    def test_classify_reservation_response(status_code, body, expected):
+        response = mock.Mock(status_code=status_code)
+        response.json.return_value = body
+        if body is None:
+            response.json.side_effect = ValueError()
+
+        assert mealpy.classify_reservation_response(response) == expected
+
+    @staticmethod
+    def reservation(*responses_):
+        """Mock reservation sending responses_, status codes or (status code, error) pairs, in order."""
+        reservation = mock.Mock()
+        reservation.send.side_effect = [
+            mock.Mock(status_code=i[0], **{'json.return_value': {'error': i[1]}})
+            if isinstance(i, tuple) else mock.Mock(status_code=i, **{'json.return_value': {}})
+            for i in responses_
+        ]
+        return reservation
+
+    def test_reserve_first_available(self):
+        sold_out = self.reservation((400, 'ERROR_SOLD_OUT'))
+        flaky = self.reservation(503, 200)
+        never_tried = self.reservation(200)
+
+        with mock.patch.object(mealpy.retry.time, 'sleep'):
+            reservation, response = mealpy.reserve_first_available([sold_out, flaky, never_tried])
+
+        assert reservation is flaky
+        assert response.status_code == 200
+        assert sold_out.send.call_count == 1, 'Sold out choices should not be retried.'
+        assert not never_tried.send.called
+
+    def test_reserve_first_available_kitchen_closed(self):
+        early = self.reservation((400, 'ERROR_KITCHEN_CLOSED'), (400, 'ERROR_KITCHEN_CLOSED'), 200)
+        never_tried = self.reservation(200)
+
+        with mock.patch.object(mealpy.retry.time, 'sleep'):
+            reservation, response = mealpy.reserve_first_available([early, never_tried])
+
+        assert reservation is early, 'Choices should be retried until the kitchen opens, not dropped.'
+        assert response.status_code == 200
+        assert not never_tried.send.called
+
+    def test_reserve_first_available_none(self):
+        last = self.reservation((404, 'ERROR_SCHEDULE_NOT_FOUND'))
+
+        reservation, response = mealpy.reserve_first_available([self.reservation((400, 'ERROR_SOLD_OUT')), last])
+
+        assert reservation is None
+        assert response.status_code == 404
+
+    def test_reserve_first_available_fatal(self):
+        limit_reached = self.reservation((400, 'ERROR_RESERVATION_LIMIT'))
+        never_tried = self.reservation(200)
+
+        reservation, response = mealpy.reserve_first_available([limit_reached, never_tried])
+
+        assert reservation is None
+        assert response.json() == {'error': 'ERROR_RESERVATION_LIMIT'}
+        assert not never_tried.send.called
+
+    def test_send_reservations_deadline(self, capsys):
+        closed = self.reservation((400, 'ERROR_KITCHEN_CLOSED'))
+
+        mealpy.send_reservations([closed], deadline=mealpy.time.time())
+
+        out = capsys.readouterr().out
+        assert out.startswith('Reservation failed.\n')
+        assert '1 attempt(s)' in out
+
+    def test_send_reservations_reprepares(self):
+        stale = self.reservation((404, 'ERROR_SCHEDULE_NOT_FOUND'))
+        stale.schedule = {'id': 'old'}
+        fresh = self.reservation((400, 'ERROR_KITCHEN_CLOSED'), 200)
+        fresh.schedule = {'id': 'new'}
+        reprepare = mock.Mock(return_value=fresh)
+
+        with mock.patch.object(mealpy.retry.time, 'sleep'):
+            mealpy.send_reservations([stale], reprepare=reprepare)
+
+        assert reprepare.call_count == 1
+        assert fresh.send.call_count == 2, 'The new schedule is sent straight away.'
+
+    def test_send_reservations_reprepare_only_when_missing(self):
+        reservation = self.reservation((400, 'ERROR_KITCHEN_CLOSED'), 200)
+        reprepare = mock.Mock()
+
+        with mock.patch.object(mealpy.retry.time, 'sleep'):
+            mealpy.send_reservations([reservation], reprepare=reprepare)
+
+        assert not reprepare.called, 'The menu is not fetched again in the hot path for other refusals.'
+        assert reservation.send.call_count == 2
+
+    def test_send_reservations_reprepare_error(self, capsys):
+        reservation = self.reservation((404, 'ERROR_SCHEDULE_NOT_FOUND'), 200)
+
+        with mock.patch.object(mealpy.retry.time, 'sleep'):
+            mealpy.send_reservations([reservation], reprepare=mock.Mock(side_effect=mealpy.ScheduleNotFoundError()))
+
+        assert reservation.send.call_count == 1, 'A schedule that is gone from the menu too is not retried.'
+        assert capsys.readouterr().out.startswith('Keeping the prepared reservation, preparing it again failed')
+
+    def test_send_reservations_gives_up_on_refusals(self, capsys):
+        sold_out = self.reservation((400, 'ERROR_SOLD_OUT'))
+        refused = self.reservation(*[(403, 'ERROR_UNKNOWN')] * mealpy.CLIENT_ERROR_ATTEMPTS)
+
+        with mock.patch.object(mealpy.retry.time, 'sleep'):
+            mealpy.send_reservations([sold_out])
+            mealpy.send_reservations([refused])
+
+        assert sold_out.send.call_count == 1
+        assert refused.send.call_count == mealpy.CLIENT_ERROR_ATTEMPTS
+        assert capsys.readouterr().out.count('Reservation failed.') == 2
+
+    def test_reserve_first_available_persistent_refusal(self):
+        refused = self.reservation(*[(403, 'ERROR_UNKNOWN')] * mealpy.CLIENT_ERROR_ATTEMPTS)
+        fallback = self.reservation(200)
+
+        with mock.patch.object(mealpy.retry.time, 'sleep'):
+            reservation, _ = mealpy.reserve_first_available([refused, fallback])
+
+        assert reservation is fallback, 'A choice that keeps being refused is given up on.'
+
+    def test_send_reservations_none_available(self, capsys):
+        sold_out = self.reservation((400, 'ERROR_SOLD_OUT'))
+
+        mealpy.send_reservations([sold_out], fallbacks=[mock.sentinel.fallback])
+
+        assert capsys.readouterr().out == 'None of the choices could be reserved.\n'
+
+
+@pytest.mark.parametrize(('concurrency', 'pool_size'), ((1, mealpy.POOL_SIZE), (16, 16)))
+def test_execute_reserve_meal_pool_size(concurrency, pool_size):
+    with mock.patch.object(mealpy, 'initialize_mealpal') as initialize_mealpal, \
+            mock.patch.object(mealpy, 'fire_reservations'):
+        mealpy.execute_reserve_meal('restaurant', 'timing', 'city', concurrency=concurrency)
+
+    assert initialize_mealpal.call_args[1]['pool_size'] == pool_size
+
+
+def test_fire_reservations_deadline_from_first_attempt():
+    now = [1000]
+    clock = mealpy.scheduler.ClockOffset(0, 0)
+    with mock.patch.object(mealpy.scheduler, 'estimate_clock_offset', return_value=clock), \
+            mock.patch.object(mealpy.scheduler, 'wait_until', side_effect=lambda *_, **__: now.append(1500)), \
+            mock.patch.object(mealpy, 'prepare_reservations_until', return_value=[mock.sentinel.reservation]), \
+            mock.patch.object(mealpy, 'send_reservations') as send_reservations, \
+            mock.patch.object(mealpy.time, 'time', side_effect=lambda: now[-1]):
+        mealpy.fire_reservations(mock.Mock(), 'city', [mock.sentinel.choice], fire_at=1500, deadline=30)
+
+    assert send_reservations.call_args[1]['deadline'] == 1530, 'Time spent before firing should not count.'
+
+
+def test_parse_fire_at():
+    fire_at = mealpy.datetime.datetime.fromtimestamp(mealpy.parse_fire_at('17:00:00'))
+
+    assert fire_at.date() == mealpy.datetime.date.today()
+    assert fire_at.time() == mealpy.datetime.time(17, 0, 0)
+
+
+def test_get_cookies_path(mock_cache_dir):
+    assert mealpy.get_cookies_path() == mock_cache_dir / mealpy.COOKIES_FILENAME
+    assert mealpy.get_cookies_path('a@test.com') == mock_cache_dir / mealpy.COOKIES_DIRNAME / 'a@test.com.txt'
+
+
+class TestInitializeMealpal:
+
+    @staticmethod
+    @pytest.fixture
+    def store(mock_cache_dir):  # pylint: disable=unused-argument
+        yield mealpy.sessions.get_session_store()
+
+    @staticmethod
+    @pytest.fixture
+    def record(store):
+        record = mealpy.sessions.SessionRecord(
+            'test@test.com',
+            [{
+                'name': 'session',
+                'value': 'mock_value',
+                'domain': mealpy.BASE_DOMAIN,
+                'path': '/',
+                'secure': True,
+                'expires': int(mealpy.time.time()) + 24 * 60 * 60,
+            }],
+            session_token='r:GUID',
+        )
+        store.save(record)
+        yield record
+
+    @staticmethod
+    @pytest.fixture
+    def mock_login(mock_responses):
+        mock_responses.add(responses.RequestsMock.POST, mealpy.LOGIN_URL, json={'sessionToken': 'r:NEW_GUID'})
+        with mock.patch.object(
+                mealpy,
+                'get_mealpal_credentials',
+                return_value=('test@test.com', 'password'),
+        ) as get_mealpal_credentials:
+            yield get_mealpal_credentials
+
+    @staticmethod
+    def test_recently_validated(store, record, mock_responses):
+        record.validated_at = mealpy.time.time()
+        store.save(record)
+
+        mealpal = mealpy.initialize_mealpal('test@test.com')
+
+        assert not mock_responses.calls, 'Fresh sessions should not be validated again.'
+        assert mealpal.session.cookies['session'] == 'mock_value'
+        assert mealpal.session_token == 'r:GUID'
+
+    @staticmethod
+    @pytest.mark.usefixtures('record')
+    def test_validate(store, mock_responses):
+        mock_responses.add(responses.RequestsMock.POST, mealpy.KITCHEN_URL, json={'result': {}})
+
+        mealpy.initialize_mealpal('test@test.com')
+
+        assert [i.request.url for i in mock_responses.calls] == [mealpy.KITCHEN_URL]
+        assert mock_responses.calls[0].request.headers['Cookie'] == 'session=mock_value'
+        assert store.load('test@test.com').validated_at > 0
+
+    @staticmethod
+    @pytest.mark.usefixtures('record')
+    def test_invalid_session_logs_in(store, mock_responses, mock_login):
+        mock_responses.add(responses.RequestsMock.POST, mealpy.KITCHEN_URL, status=401)
+
+        mealpy.initialize_mealpal('test@test.com')
+
+        assert mock_login.called
+        assert [i.request.url for i in mock_responses.calls] == [mealpy.KITCHEN_URL, mealpy.LOGIN_URL]
+        assert store.load('test@test.com').session_token == 'r:NEW_GUID'
+
+    @staticmethod
+    def test_expiring_session_logs_in(store, record, mock_responses, mock_login):
+        record.cookies[0]['expires'] = int(mealpy.time.time()) + 60
+        record.validated_at = mealpy.time.time()
+        store.save(record)
+
+        mealpy.initialize_mealpal('test@test.com')
+
+        assert mock_login.called
+        assert [i.request.url for i in mock_responses.calls] == [mealpy.LOGIN_URL]
+
+    @staticmethod
+    @pytest.mark.usefixtures('record')
+    def test_invalid_session_not_interactive(mock_responses):
+        mock_responses.add(responses.RequestsMock.POST, mealpy.KITCHEN_URL, status=401)
+
+        with mock.patch.object(mealpy, 'get_mealpal_credentials') as get_mealpal_credentials:
+            with pytest.raises(mealpy.sessions.LoginRequiredError):
+                mealpy.initialize_mealpal('test@test.com', interactive=False)
+
+        assert not get_mealpal_credentials.called, 'Credentials should never be asked for.'
+
+    @staticmethod
+    def test_saved_session_not_used(store, record, mock_responses, mock_login):
+        record.validated_at = mealpy.time.time()
+        store.save(record)
+
+        mealpal = mealpy.initialize_mealpal('test@test.com', use_saved_session=False)
+
+        assert mock_login.called, 'Even a recently validated session should be replaced.'
+        assert mealpal.session_token == 'r:NEW_GUID'
+        assert store.load('test@test.com').session_token == 'r:NEW_GUID'
+
+    @staticmethod
+    def test_legacy_cookies_imported(store, mock_responses):
+        cookies_path = mealpy.get_cookies_path('test@test.com')
+        cookies_path.parent.mkdir(parents=True)
+        jar = MozillaCookieJar()
+        jar.set_cookie(mealpy.requests.cookies.create_cookie('session', 'legacy_value', domain=mealpy.BASE_DOMAIN))
+        jar.save(str(cookies_path), ignore_discard=True)
+        mock_responses.add(responses.RequestsMock.POST, mealpy.KITCHEN_URL, json={'result': {}})
+
+        mealpy.initialize_mealpal('test@test.com')
+
+        assert store.load('test@test.com').cookies[0]['value'] == 'legacy_value'
+
+    @staticmethod
+    def test_legacy_cookies_unreadable(mock_login):
+        cookies_path = mealpy.get_cookies_path('test@test.com')
+        cookies_path.parent.mkdir(parents=True)
+        cookies_path.write_bytes(b'\xff\xfe not a cookie jar')
+
+        mealpy.initialize_mealpal('test@test.com')
+
+        assert mock_login.called
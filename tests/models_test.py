@@ -0,0 +1,66 @@
+import pytest
+
+from mealpy import models
+
+
+@pytest.fixture
+def schedule_json():
+    yield {
+        'id': 'schedule_id',
+        'priority': 9,
+        'is_featured': True,
+        'date': '20190401',
+        'meal': {
+            'id': 'meal_id',
+            'name': 'Spam and Eggs',
+            'cuisine': 'asian',
+            'veg': False,
+        },
+        'restaurant': {
+            'id': 'restaurant_id',
+            'name': 'RestaurantName',
+            'latitude': '37.5',
+            'longitude': 'not a number',
+            'neighborhood': {'id': 'neighborhood_id', 'name': 'Financial District'},
+            'city': {'id': 'city_id', 'name': 'San Francisco'},
+        },
+    }
+
+
+def test_schedule_from_json(schedule_json):
+    schedule = models.Schedule.from_json(schedule_json)
+
+    assert schedule.meal.name == 'Spam and Eggs'
+    assert schedule.restaurant.latitude == 37.5
+    assert schedule.restaurant.longitude is None
+    assert schedule.restaurant.neighborhood == models.Neighborhood('neighborhood_id', 'Financial District')
+    assert not hasattr(schedule, '__dict__')
+
+
+def test_schedule_item_access(schedule_json):
+    """Models can stand in for the API dicts."""
+    schedule = models.Schedule.from_json(schedule_json)
+
+    assert schedule['id'] == 'schedule_id'
+    assert schedule['restaurant']['name'] == 'RestaurantName'
+    assert schedule.get('city') is None
+    with pytest.raises(KeyError):
+        schedule['city']  # pylint: disable=pointless-statement
+
+
+def test_load_schedules_shares_values(schedule_json):
+    first, second = models.load_schedules([schedule_json, dict(schedule_json, meal=dict(schedule_json['meal']))])
+
+    assert first.restaurant.neighborhood is second.restaurant.neighborhood
+    assert first.meal.cuisine is second.meal.cuisine
+
+
+def test_load_cities():
+    cities = models.load_cities([{
+        'id': 'id',
+        'objectId': 'object_id',
+        'name': 'San Francisco',
+        'neighborhoods': [{'id': 'neighborhood_id', 'name': 'Mission'}],
+    }])
+
+    assert cities == [models.City('object_id', 'San Francisco', (models.Neighborhood('neighborhood_id', 'Mission'),))]
@@ -0,0 +1,50 @@
+import threading
+import time
+
+from mealpy import profiling
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_sampler_sees_other_threads():
+    sampler = profiling.Sampler(interval=0.001)
+    worker = threading.Thread(target=spin, args=(0.1,), name='worker')
+
+    sampler.start()
+    worker.start()
+    worker.join()
+    sampler.stop()
+
+    worker_stacks = [i for i in sampler.stacks if i.startswith('worker;')]
+    assert worker_stacks
+    assert all('spin (profiling_test.py:' in i for i in worker_stacks)
+    assert sampler.collapsed().endswith('\n')
+
+
+def test_profiler_windows(tmp_path):
+    profiler = profiling.Profiler(tmp_path / 'reserve')
+
+    with profiling.window(profiler):
+        spin(0.02)
+    spin(0.05)
+    with profiling.window(profiler):
+        spin(0.02)
+    paths = profiler.save()
+
+    assert 0.04 <= profiler.elapsed < 0.09, 'Only the windows should be profiled.'
+    assert 'spin' in paths['txt'].read_text()
+    assert paths['prof'].exists()
+    assert 'MainThread;' in paths['folded'].read_text()
+
+
+def test_profiler_nothing_profiled(tmp_path):
+    assert profiling.Profiler(tmp_path / 'reserve').save() is None
+
+
+def test_window_without_profiler():
+    with profiling.window(None):
+        pass
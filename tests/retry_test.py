@@ -0,0 +1,154 @@
+from email.utils import formatdate
+from unittest import mock
+
+import pytest
+import requests
+
+from mealpy import retry
+
+
+@pytest.fixture(autouse=True)
+def mock_sleep():
+    with mock.patch.object(retry.time, 'sleep') as _sleep:
+        yield _sleep
+
+
+def response(status_code, headers=None):
+    return mock.Mock(status_code=status_code, headers=headers or {})
+
+
+def test_fixed_delay():
+    policy = retry.FixedDelay(0.5, max_attempts=2)
+
+    assert policy.next_delay(1) == 0.5
+    assert policy.next_delay(2) is None
+
+
+def test_exponential_backoff():
+    policy = retry.ExponentialBackoff(base=1, factor=2, max_delay=5, jitter=False, max_attempts=5)
+
+    assert [policy.next_delay(i) for i in range(1, 6)] == [1, 2, 4, 5, None]
+
+
+def test_exponential_backoff_jitter():
+    policy = retry.ExponentialBackoff(base=1, factor=2, max_delay=5)
+
+    assert all(0 <= policy.next_delay(3) <= 4 for _ in range(20))
+
+
+def test_deadline():
+    policy = retry.Deadline(retry.FixedDelay(1), retry.time.time() + 1.5)
+
+    assert policy.next_delay(1) == 1
+
+    policy.deadline = retry.time.time() + 0.5
+    assert policy.next_delay(1) is None
+
+
+def test_give_up_on():
+    policy = retry.GiveUpOn(retry.FixedDelay(1), lambda response: response.status_code == 404)
+
+    assert policy.next_delay(1) == 1
+    assert policy.next_delay(1, response=mock.Mock(status_code=400)) == 1
+    assert policy.next_delay(1, response=mock.Mock(status_code=404)) is None
+
+
+@pytest.mark.parametrize(
+    ('retry_after', 'expected'),
+    (
+        (None, None),
+        ('3', 3.0),
+        ('-1', 0.0),
+        ('not a date', None),
+    ),
+)
+def test_get_retry_after(retry_after, expected):
+    headers = {} if retry_after is None else {'Retry-After': retry_after}
+
+    assert retry.get_retry_after(response(429, headers)) == expected
+
+
+def test_get_retry_after_http_date():
+    retry_after = formatdate(retry.time.time() + 30, usegmt=True)
+
+    assert 28 < retry.get_retry_after(response(429, {'Retry-After': retry_after})) <= 30
+
+
+class TestStatusAware:
+
+    @staticmethod
+    @pytest.fixture
+    def policy():
+        yield retry.StatusAware(
+            server_error=retry.FixedDelay(1),
+            client_error=retry.FixedDelay(2),
+            error=retry.FixedDelay(3),
+        )
+
+    @staticmethod
+    def test_server_error(policy):
+        assert policy.next_delay(1, response=response(503)) == 1
+
+    @staticmethod
+    def test_client_error(policy):
+        assert policy.next_delay(1, response=response(400)) == 2
+
+    @staticmethod
+    def test_client_error_gives_up_by_default():
+        policy = retry.StatusAware(server_error=retry.FixedDelay(1))
+
+        assert policy.next_delay(1, response=response(401)) is None
+
+    @staticmethod
+    def test_too_many_requests(policy):
+        assert policy.next_delay(1, response=response(429, {'Retry-After': '7'})) == 7
+        assert policy.next_delay(1, response=response(429)) == 1
+
+    @staticmethod
+    def test_error(policy):
+        assert policy.next_delay(1, error=requests.ConnectionError()) == 3
+
+
+def test_call_success_after_retries(mock_sleep):
+    func = mock.Mock(side_effect=[requests.ConnectionError(), response(500), response(200)])
+    on_retry = mock.Mock()
+    stats = retry.RetryStats()
+
+    result = retry.call(
+        func,
+        retry.FixedDelay(0.1),
+        is_success=lambda r: r.status_code == 200,
+        stats=stats,
+        on_retry=on_retry,
+    )
+
+    assert result.status_code == 200
+    assert mock_sleep.call_args_list == [mock.call(0.1), mock.call(0.1)]
+    assert on_retry.call_count == 2
+    assert stats.attempts == 3
+    assert stats.outcomes == {'ConnectionError': 1, 'HTTP 500': 1, 'success': 1}
+    assert stats.waited == pytest.approx(0.2)
+    assert 'success: 1' in str(stats)
+
+
+def test_call_gives_up():
+    error = requests.HTTPError(response=response(401))
+
+    with pytest.raises(retry.RetryError) as excinfo:
+        retry.call(mock.Mock(side_effect=error), retry.StatusAware(server_error=retry.FixedDelay(1)))
+
+    assert excinfo.value.response.status_code == 401
+    assert excinfo.value.stats.attempts == 1
+    assert excinfo.value.__cause__ is error
+
+
+def test_call_unexpected_error_propagates():
+    with pytest.raises(KeyError):
+        retry.call(mock.Mock(side_effect=KeyError()), retry.FixedDelay(1))
+
+
+def test_stats_summary_empty():
+    stats = retry.RetryStats()
+
+    assert stats.summary()['latency_mean'] is None
+    assert str(stats) == 'No attempts.'
@@ -0,0 +1,106 @@
+from email.utils import formatdate
+from unittest import mock
+
+import pytest
+import requests
+
+from mealpy import scheduler
+
+
+@pytest.fixture
+def mock_time():
+    with mock.patch.object(scheduler.time, 'time') as _time, \
+            mock.patch.object(scheduler.time, 'sleep') as _sleep:
+        yield _time, _sleep
+
+
+def test_wait_until_sleeps_then_spins(mock_time):
+    _time, _sleep = mock_time
+    _time.side_effect = [100.0, 109.999, 109.999, 110.0]
+
+    scheduler.wait_until(110, spin_window=0.005)
+
+    assert _sleep.call_args_list == [mock.call(pytest.approx(9.995))]
+    assert _time.call_count == 4, 'Should spin on the clock after the coarse sleep.'
+
+
+def test_wait_until_clock_offset(mock_time):
+    _time, _sleep = mock_time
+    _time.side_effect = [100.0, 101.0, 101.0]
+
+    scheduler.wait_until(102, clock_offset=1, spin_window=0.005)
+
+    assert _sleep.call_args_list == [mock.call(pytest.approx(0.995))]
+
+
+def test_wait_until_in_the_past(mock_time):
+    _time, _sleep = mock_time
+    _time.return_value = 200.0
+
+    scheduler.wait_until(100)
+
+    assert not _sleep.called
+
+
+def server_response(server_time):
+    response = mock.Mock()
+    response.headers = {'Date': formatdate(server_time, usegmt=True)}
+    return response
+
+
+def test_estimate_clock_offset(mock_time):
+    _time, _ = mock_time
+    # Server is 2.3s ahead. Samples are sent at fractional offsets, with a 10ms round trip each.
+    sent_at = [1000.0, 1001.4, 1002.8]
+    _time.side_effect = [t for i in sent_at for t in (i, i + 0.01)]
+    session = mock.Mock()
+    session.head.side_effect = [server_response(int(i + 0.005 + 2.3)) for i in sent_at]
+
+    clock = scheduler.estimate_clock_offset(session, 'https://example.com', samples=3)
+
+    assert clock.offset == pytest.approx(2.3, abs=clock.error)
+    assert clock.error < 0.5
+
+
+def test_estimate_clock_offset_inconsistent(mock_time):
+    _time, _ = mock_time
+    _time.side_effect = [1000.0, 1000.01, 1001.0, 1001.01]
+    session = mock.Mock()
+    session.head.side_effect = [server_response(1000), server_response(1100)]
+
+    clock = scheduler.estimate_clock_offset(session, 'https://example.com', samples=2)
+
+    assert clock.error == 0.5
+
+
+def test_estimate_clock_offset_skips_bad_samples(mock_time):
+    _time, _ = mock_time
+    _time.side_effect = [1000.0, 1001.2, 1001.21, 1002.4, 1002.41]
+    session = mock.Mock()
+    bad = mock.Mock(headers={})
+    session.head.side_effect = [requests.ConnectionError(), bad, server_response(1003)]
+
+    clock = scheduler.estimate_clock_offset(session, 'https://example.com', samples=3)
+
+    assert clock.offset == pytest.approx(1.3, abs=clock.error)
+
+
+def test_estimate_clock_offset_no_samples(mock_time):
+    session = mock.Mock()
+    session.head.side_effect = requests.ConnectionError()
+
+    clock = scheduler.estimate_clock_offset(session, 'https://example.com', samples=2)
+
+    assert clock == scheduler.ClockOffset(0.0, float('inf'))
+
+
+def test_estimate_clock_offset_until(mock_time):
+    _time, _sleep = mock_time
+    _time.side_effect = [1000.0, 1000.01, 1000.02]
+    session = mock.Mock()
+    session.head.return_value = server_response(1000)
+
+    scheduler.estimate_clock_offset(session, 'https://example.com', samples=5, until=1001)
+
+    assert session.head.call_count == 1, 'No sample should start after until.'
+    assert not _sleep.called
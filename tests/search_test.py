@@ -0,0 +1,56 @@
+import pytest
+
+from mealpy import models
+from mealpy import search
+
+
+def make_schedule(schedule_id, meal_name, restaurant_name, cuisine=None, veg=False, neighborhood=None, **meal):
+    return {
+        'id': schedule_id,
+        'meal': dict({'name': meal_name, 'cuisine': cuisine, 'veg': veg}, **meal),
+        'restaurant': {
+            'name': restaurant_name,
+            'neighborhood': neighborhood and {'id': neighborhood.lower(), 'name': neighborhood},
+        },
+    }
+
+
+@pytest.fixture
+def schedules():
+    yield [
+        make_schedule('poke', 'Spicy Ahi Poke Bowl', 'Coast Poke Counter', 'asian', False, 'Financial District'),
+        make_schedule('tofu', 'Tofu Poke Bowl', 'Coast Poke Counter', 'Asian', True, 'Financial District'),
+        make_schedule('salad', 'Kale Salad', 'Green Leaf', 'american', True, 'Mission', description='With tofu.'),
+        make_schedule('burrito', 'Burrito', 'Taqueria'),
+    ]
+
+
+def test_tokenize():
+    assert search.tokenize('Spicy Ahi-Poke', None, 'bowl!') == {'spicy', 'ahi', 'poke', 'bowl'}
+
+
+@pytest.mark.parametrize('filters,expected', (
+    ({}, ['poke', 'tofu', 'salad', 'burrito']),
+    ({'cuisine': 'asian'}, ['poke', 'tofu']),
+    ({'cuisine': ' ASIAN '}, ['poke', 'tofu']),
+    ({'veg': True}, ['tofu', 'salad']),
+    ({'neighborhood': 'financial  district'}, ['poke', 'tofu']),
+    ({'text': 'poke'}, ['poke', 'tofu']),
+    ({'text': 'Tofu'}, ['tofu', 'salad']),
+    ({'text': 'tofu bowl'}, ['tofu']),
+    ({'cuisine': 'asian', 'veg': True, 'neighborhood': 'Financial District', 'text': 'poke'}, ['tofu']),
+    ({'cuisine': 'italian'}, []),
+    ({'text': 'poke', 'limit': 1}, ['poke']),
+    ({'limit': 2}, ['poke', 'tofu']),
+))
+def test_search(schedules, filters, expected):
+    index = search.SearchIndex(schedules)
+
+    assert [i['id'] for i in index.search(**filters)] == expected
+
+
+def test_search_models(schedules):
+    index = search.SearchIndex(models.load_schedules(schedules))
+
+    assert len(index) == 4
+    assert [i.id for i in index.search(veg=True, neighborhood='Mission')] == ['salad']
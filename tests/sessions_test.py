@@ -0,0 +1,58 @@
+import time
+
+import pytest
+from requests.cookies import create_cookie
+from requests.cookies import RequestsCookieJar
+
+from mealpy import sessions
+
+
+@pytest.fixture
+def jar():
+    jar = RequestsCookieJar()
+    jar.set_cookie(create_cookie('session', 'value1', domain='example.com', expires=int(time.time()) + 100))
+    jar.set_cookie(create_cookie('other', 'value2', domain='example.com', expires=int(time.time()) + 200))
+    jar.set_cookie(create_cookie('browser_session', 'value3', domain='example.com'))
+    yield jar
+
+
+def test_record_round_trip(jar):
+    record = sessions.SessionRecord.from_jar('test@test.com', jar, session_token='r:GUID', validated_at=1)
+
+    loaded = sessions.SessionRecord.from_json(record.to_json())
+
+    assert loaded.to_jar().get_dict() == jar.get_dict()
+    assert loaded.session_token == 'r:GUID'
+    assert loaded.validated_at == 1
+
+
+def test_record_expiry(jar):
+    record = sessions.SessionRecord.from_jar('test@test.com', jar)
+
+    assert record.expires_at == min(i.expires for i in jar if i.expires)
+    assert record.expires_within(150)
+    assert not record.expires_within(50)
+
+
+def test_record_without_expiry():
+    record = sessions.SessionRecord('test@test.com')
+
+    assert record.expires_at is None
+    assert not record.expires_within(10 ** 9)
+
+
+def test_record_is_fresh():
+    assert sessions.SessionRecord('test@test.com', validated_at=time.time()).is_fresh(60)
+    assert not sessions.SessionRecord('test@test.com', validated_at=time.time() - 120).is_fresh(60)
+    assert not sessions.SessionRecord('test@test.com').is_fresh(60)
+
+
+def test_store(tmp_path, jar):
+    store = sessions.SessionStore(tmp_path)
+    store.save(sessions.SessionRecord.from_jar('a@test.com', jar))
+    store.save(sessions.SessionRecord('b@test.com'))
+
+    assert store.load('a@test.com').to_jar().get_dict() == jar.get_dict()
+    assert store.load('missing@test.com') is None
+    assert [i.account for i in store.records()] == ['a@test.com', 'b@test.com']
+    assert [i.account for i in store.expiring(150)] == ['a@test.com']
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from mealpy import stream
+
+
+@pytest.fixture
+def menu():
+    yield {
+        'city': {'id': 'GUID', 'name': 'San Francisco'},
+        'generated_at': '2019-04-01T00:00:00Z',
+        'schedules': [
+            {
+                'id': f'id{i}',
+                'priority': 1.5,
+                'meal': {'name': f'Meal {i} – ünïcode', 'description': 'x' * 100},
+                'restaurant': {'name': f'Restaurant {i}', 'neighborhood': {'name': 'Mission'}},
+            }
+            for i in range(20)
+        ],
+        'count': 20,
+    }
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', (1, 7, 64, 1 << 20))
+def test_iter_schedules_matches_full_parse(menu, size):
+    """Every chunking, including one splitting multi-byte characters and numbers, gives the same schedules."""
+    menu_stream = stream.MenuStream(chunked(json.dumps(menu, ensure_ascii=False).encode(), size))
+
+    assert list(menu_stream) == menu['schedules']
+    assert menu_stream.meta == {'city': menu['city'], 'generated_at': menu['generated_at'], 'count': 20}
+
+
+def test_iter_schedules_projection(menu):
+    schedules = stream.iter_schedules([json.dumps(menu)], fields=stream.RESERVE_FIELDS)
+
+    assert next(schedules) == {
+        'id': 'id0',
+        'meal': {'name': 'Meal 0 – ünïcode'},
+        'restaurant': {'name': 'Restaurant 0'},
+    }
+
+
+def test_iter_schedules_stops_early(menu):
+    """Chunks after the matching schedule are never read."""
+    chunks = iter(chunked(json.dumps(menu), 64))
+
+    for schedule in stream.iter_schedules(chunks):
+        if schedule['id'] == 'id2':
+            break
+
+    assert next(chunks, None) is not None
+
+
+@pytest.mark.parametrize('payload', ('{}', '{"schedules": []}', '{"generated_at": null}'))
+def test_iter_schedules_empty(payload):
+    assert list(stream.iter_schedules([payload])) == []
+
+
+@pytest.mark.parametrize('payload', ('', '[]', '{"schedules": [{"id": 1}', '{"schedules": [{"id": 1}}'))
+def test_iter_schedules_invalid(payload):
+    with pytest.raises(ValueError):
+        list(stream.iter_schedules([payload]))
+
+
+def test_project_missing_fields():
+    assert stream.project({'id': 1, 'meal': None}, ('id', 'meal.name', 'restaurant.name')) == {'id': 1}
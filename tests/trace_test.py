@@ -0,0 +1,91 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+
+import pytest
+import requests
+import responses
+
+from mealpy import mealpy
+from mealpy import trace
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = HTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_tracing_session(tmp_path):
+    tracer = trace.Tracer(tmp_path / 'trace.jsonl')
+    session = mealpy.create_session(tracer=tracer)
+
+    with responses.RequestsMock() as mock_responses:
+        mock_responses.add(responses.POST, mealpy.KITCHEN_URL, json={'result': {}})
+        mock_responses.add(responses.POST, mealpy.RESERVATION_URL, status=400, json={'error': 'ERROR'})
+        mock_responses.add(responses.GET, mealpy.MENU_URL.format('city_id'), json={'schedules': []})
+
+        session.post(mealpy.KITCHEN_URL)
+        session.post(mealpy.RESERVATION_URL)
+        session.get(mealpy.MENU_URL.format('city_id'))
+    tracer.close()
+
+    assert [(i.endpoint, i.method, i.status) for i in tracer.events] == [
+        ('kitchen', 'POST', 200),
+        ('reserve', 'POST', 400),
+        ('menu', 'GET', 200),
+    ]
+    assert tracer.events[2].size == len(b'{"schedules": []}')
+    assert [json.loads(i)['endpoint'] for i in (tmp_path / 'trace.jsonl').read_text().splitlines()] == [
+        'kitchen',
+        'reserve',
+        'menu',
+    ]
+
+
+def test_tracing_error():
+    tracer = trace.Tracer()
+    session = mealpy.create_session(max_retries=0, tracer=tracer)
+
+    with responses.RequestsMock() as mock_responses:
+        mock_responses.add(responses.POST, mealpy.LOGIN_URL, body=requests.ConnectionError())
+
+        with pytest.raises(requests.ConnectionError):
+            session.post(mealpy.LOGIN_URL)
+
+    assert tracer.events[0].error == 'ConnectionError'
+    assert tracer.summary()['login']['errors'] == 1
+    assert 'errors: 1' in str(tracer)
+
+
+def test_connection_reuse(local_server):
+    tracer = trace.Tracer()
+    session = requests.Session()
+    session.mount(local_server, trace.TracingAdapter(tracer, endpoints=((local_server, 'local'),)))
+
+    for _ in range(3):
+        session.get(local_server)
+
+    assert [i.new_connection for i in tracer.events] == [True, False, False]
+    assert tracer.summary()['local']['new_connections'] == 1
+
+
+def test_summary_empty():
+    assert str(trace.Tracer()) == 'No requests.'